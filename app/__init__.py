@@ -5,21 +5,42 @@ from flask_wtf import CSRFProtect
 #from flask_login import LoginManager
 from config import Config
 from flask_migrate import Migrate
+from .jobs import JobRunner
+from .cache import Cache
+from .scanning import Scanner
+from common.sqlite_tuning import SQLiteTuning, pool_options
+from .replicas import ReadReplicas, RoutingSession
+from common.instrumentation import Instrumentation
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 migrate = Migrate()
+jobs = JobRunner()
+cache = Cache()
+scanner = Scanner()
+sqlite_tuning = SQLiteTuning()
+replicas = ReadReplicas()
+instrumentation = Instrumentation()
 #login_manager = LoginManager()
 #login_manager.login_view = 'login'
 
-def create_app():
+def create_app(config_class=Config, replica_uri=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **pool_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('SQLALCHEMY_POOL_OPTIONS', {})),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
     csrf = CSRFProtect(app)
     
+    replicas.init_app(app, replica_uri)
     db.init_app(app)
+    sqlite_tuning.init_app(app, db)
+    instrumentation.init_app(app, db)
     bcrypt.init_app(app)
     migrate.init_app(app, db)
+    jobs.init_app(app)
+    cache.init_app(app)
+    scanner.init_app(app)
     #login_manager.init_app(app)
     
     from .routes.inventory import inventory_bp
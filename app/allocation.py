@@ -0,0 +1,148 @@
+"""Choose which warehouses fulfil an order.
+
+StockIndex holds {product_id: {warehouse_id: quantity}} in memory, so an
+allocation never touches the database: load it once (or for just the products
+in play), then allocate one order or a whole batch against it. Each
+allocation is all-or-nothing and takes its units out of the index, so later
+orders in a batch only see what is left.
+
+Without a location the allocator is greedy min-splits: it keeps picking the
+warehouse that covers the most outstanding units until the order is filled,
+which keeps the number of shipments down. With a location it goes
+nearest-first, using coverage only to break ties between equally near
+warehouses.
+"""
+from collections import defaultdict, namedtuple
+from app import db
+from app.models import Inventory, Warehouse
+
+# picks: [(product_id, warehouse_id, quantity)]; short: product ids that could not be covered.
+Allocation = namedtuple('Allocation', 'picks short')
+
+def same_location(a, b):
+  """Default distance: 0 for the same location (case-insensitive), else 1."""
+  return 0 if a.strip().casefold() == b.strip().casefold() else 1
+
+def merge_lines(lines):
+  """Accept {product_id: quantity} or [(product_id, quantity)] and sum duplicates."""
+  if isinstance(lines, dict):
+    lines = lines.items()
+  demand = defaultdict(int)
+  for product_id, quantity in lines:
+    demand[product_id] += quantity
+  return demand
+
+class StockIndex:
+  def __init__(self, stock=None, locations=None, distance=same_location):
+    self.stock = defaultdict(dict)
+    for product_id, warehouses in (stock or {}).items():
+      self.stock[product_id] = {warehouse_id: quantity for warehouse_id, quantity in warehouses.items() if quantity > 0}
+    self.locations = dict(locations or {})
+    self.distance = distance
+    self._rankings = {}
+
+  @classmethod
+  def load(cls, product_ids=None, distance=same_location):
+    """Build an index from the inventory table, optionally for some products only."""
+    query = db.session.query(Inventory.product_id, Inventory.warehouse_id, Inventory.quantity) \
+      .filter(Inventory.quantity > 0)
+    if product_ids is not None:
+      query = query.filter(Inventory.product_id.in_(list(product_ids)))
+    stock = defaultdict(dict)
+    for product_id, warehouse_id, quantity in query.yield_per(10000):
+      stock[product_id][warehouse_id] = quantity
+    locations = dict(db.session.query(Warehouse.id, Warehouse.location))
+    return cls(stock, locations, distance)
+
+  def available(self, product_id):
+    return sum(self.stock.get(product_id, {}).values())
+
+  def ranking(self, near):
+    """{warehouse_id: distance} from `near`, memoised per location."""
+    ranks = self._rankings.get(near)
+    if ranks is None:
+      ranks = self._rankings[near] = {warehouse_id: self.distance(near, location)
+                                      for warehouse_id, location in self.locations.items()}
+    return ranks
+
+  def plan(self, lines, near=None):
+    """Work out an allocation without taking the stock."""
+    demand = {product_id: quantity for product_id, quantity in merge_lines(lines).items() if quantity > 0}
+    short = {product_id for product_id, quantity in demand.items() if self.available(product_id) < quantity}
+    if short:
+      return Allocation([], short)
+    ranks = self.ranking(near) if near is not None else None
+    # A chosen warehouse gives up everything it holds of the remaining lines,
+    # so it never needs to be looked at again.
+    used = set()
+    picks = []
+    while demand:
+      if len(demand) == 1:
+        # One line left: nearest, then the warehouse covering most of it,
+        # then the fullest so stock stays spread out for later orders.
+        (product_id, needed), = demand.items()
+        warehouses = self.stock[product_id]
+        warehouse_id = min((w for w in warehouses if w not in used),
+                           key=lambda w: (ranks.get(w, 1) if ranks else 0,
+                                          -min(warehouses[w], needed), -warehouses[w], w))
+        take = min(warehouses[warehouse_id], needed)
+        picks.append((product_id, warehouse_id, take))
+        used.add(warehouse_id)
+        if needed > take:
+          demand[product_id] = needed - take
+        else:
+          del demand[product_id]
+        continue
+      coverage = defaultdict(int)
+      for product_id, needed in demand.items():
+        for warehouse_id, quantity in self.stock[product_id].items():
+          if warehouse_id not in used:
+            coverage[warehouse_id] += min(quantity, needed)
+      warehouse_id = min(coverage, key=lambda w: (ranks.get(w, 1) if ranks else 0, -coverage[w], w))
+      used.add(warehouse_id)
+      for product_id in list(demand):
+        quantity = self.stock[product_id].get(warehouse_id)
+        if not quantity:
+          continue
+        take = min(quantity, demand[product_id])
+        picks.append((product_id, warehouse_id, take))
+        if demand[product_id] > take:
+          demand[product_id] -= take
+        else:
+          del demand[product_id]
+    return Allocation(picks, set())
+
+  def take(self, picks):
+    for product_id, warehouse_id, quantity in picks:
+      warehouses = self.stock[product_id]
+      left = warehouses[warehouse_id] - quantity
+      if left > 0:
+        warehouses[warehouse_id] = left
+      else:
+        del warehouses[warehouse_id]
+
+  def allocate(self, lines, near=None):
+    """Allocate one order and take its units out of the index."""
+    allocation = self.plan(lines, near)
+    if not allocation.short:
+      self.take(allocation.picks)
+    return allocation
+
+  def allocate_batch(self, orders, locations=None):
+    """Allocate orders in sequence; locations, if given, lines up with orders."""
+    if locations is None:
+      return [self.allocate(lines) for lines in orders]
+    return [self.allocate(lines, near) for lines, near in zip(orders, locations)]
+
+def allocate(lines, near=None):
+  """Allocate a single order against current inventory without changing it."""
+  demand = merge_lines(lines)
+  return StockIndex.load(demand).plan(demand, near)
+
+def allocate_batch(orders, locations=None):
+  """Plan many orders against current inventory, earlier orders served first."""
+  orders = [merge_lines(lines) for lines in orders]
+  product_ids = {product_id for demand in orders for product_id in demand}
+  # Past a few hundred products one full scan beats a huge IN list.
+  index = StockIndex.load(product_ids if len(product_ids) <= 500 else None)
+  return index.allocate_batch(orders, locations)
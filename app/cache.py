@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class LRUBackend:
+  """Per-process LRU store. Invalidations only reach the current process."""
+
+  def __init__(self, max_entries=256):
+    self.max_entries = max_entries
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        return False, None
+      value, expires_at = entry
+      if expires_at < time.monotonic():
+        del self.entries[key]
+        return False, None
+      self.entries.move_to_end(key)
+      return True, value
+
+  def set(self, key, value, ttl):
+    with self.lock:
+      self.entries[key] = (value, time.monotonic() + ttl)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+  def delete(self, key):
+    with self.lock:
+      self.entries.pop(key, None)
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+
+class SQLiteBackend:
+  """Store shared by every worker process on the host through a local SQLite file.
+
+  Values must be JSON serializable.
+  """
+
+  def __init__(self, path):
+    self.path = path
+    with self._connect() as conn:
+      conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+  def _connect(self):
+    return sqlite3.connect(self.path, timeout=5)
+
+  def get(self, key):
+    with self._connect() as conn:
+      row = conn.execute("SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())).fetchone()
+    if row is None:
+      return False, None
+    return True, json.loads(row[0])
+
+  def set(self, key, value, ttl):
+    with self._connect() as conn:
+      conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                   (key, json.dumps(value), time.time() + ttl))
+
+  def delete(self, key):
+    with self._connect() as conn:
+      conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+  def clear(self):
+    with self._connect() as conn:
+      conn.execute("DELETE FROM cache")
+
+class Cache:
+  """TTL cache with explicit invalidation.
+
+  CACHE_BACKEND selects 'lru' (default), 'sqlite', or a backend instance;
+  CACHE_DEFAULT_TTL is in seconds.
+  """
+
+  def __init__(self, app=None):
+    self.backend = LRUBackend()
+    self.default_ttl = 300
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    backend = app.config.get('CACHE_BACKEND', 'lru')
+    if backend == 'lru':
+      backend = LRUBackend(app.config.get('CACHE_MAX_ENTRIES', 256))
+    elif backend == 'sqlite':
+      path = app.config.get('CACHE_PATH') or os.path.join(app.instance_path, 'cache.db')
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      backend = SQLiteBackend(path)
+    elif isinstance(backend, str):
+      raise ValueError(f"Unknown CACHE_BACKEND {backend!r}")
+    self.backend = backend
+    self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+    app.extensions['cache'] = self
+
+  def get_or_set(self, key, loader, ttl=None):
+    hit, value = self.backend.get(key)
+    if hit:
+      return value
+    value = loader()
+    self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+    return value
+
+  def invalidate(self, *keys):
+    for key in keys:
+      self.backend.delete(key)
+
+  def clear(self):
+    self.backend.clear()
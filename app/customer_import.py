@@ -0,0 +1,176 @@
+import json
+import pandas as pd
+from sqlalchemy import bindparam, case, func, insert
+from app import db
+from app.models import Customer, Order
+
+REQUIRED_COLUMNS = {'name', 'email'}
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'ndjson')
+
+# Highest first: a customer gets the first tier whose threshold their spend meets.
+DEFAULT_TIER_THRESHOLDS = (('Platinum', 10000), ('Gold', 5000), ('Silver', 1000))
+DEFAULT_TIER = 'Standard'
+# Orders that never turned into revenue do not count towards a tier.
+EXCLUDED_STATUSES = ('cancelled', 'returned')
+
+# Column carrying the reason an NDJSON line could not be parsed into a record.
+PARSE_ERROR = '_parse_error'
+
+def parse_ndjson_line(line):
+  try:
+    record = json.loads(line)
+  except ValueError as e:
+    return {PARSE_ERROR: f"Invalid JSON: {e}"}
+  if not isinstance(record, dict):
+    return {PARSE_ERROR: "Invalid JSON: expected an object"}
+  return record
+
+def ndjson_frame(records):
+  frame = pd.DataFrame(records, dtype=object)
+  # Every line is a record of its own: a key missing from a whole chunk is a
+  # per-row error, not a missing column.
+  for column in (*REQUIRED_COLUMNS, PARSE_ERROR):
+    if column not in frame.columns:
+      frame[column] = None
+  return frame
+
+def ndjson_chunks(stream, chunk_size):
+  # Built by hand rather than with pd.read_json so values keep their JSON
+  # types: a phone number of 5551234 must not come back as 5551234.0. A bad
+  # line becomes a row that fails validation instead of ending the import.
+  records = []
+  for line in stream:
+    if line.strip():
+      records.append(parse_ndjson_line(line))
+    if len(records) == chunk_size:
+      yield ndjson_frame(records)
+      records = []
+  if records:
+    yield ndjson_frame(records)
+
+def read_chunks(stream, fmt, chunk_size):
+  if fmt == 'ndjson':
+    return ndjson_chunks(stream, chunk_size)
+  return pd.read_csv(stream, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[''])
+
+def existing_emails(emails):
+  """The subset of emails (lower-cased) that already belong to a customer, in one query.
+
+  Compares lower(email), which the ix_customers_email_lower expression index
+  serves, so rows stored before emails were normalised still match.
+  """
+  candidates = {email.strip().lower() for email in emails}
+  if not candidates:
+    return set()
+  lowered = func.lower(Customer.email)
+  return {email for (email,) in db.session.query(lowered).filter(lowered.in_(candidates))}
+
+def validate_customers(df):
+  """Validate a customer frame with vectorized masks.
+
+  Emails are compared case-insensitively with the customers table (which
+  already holds the committed earlier chunks of a streamed import) and with
+  the rest of the frame; duplicates are reported rather than inserted.
+  Returns (mappings, errors) like product_import.validate_products.
+  """
+  name = df['name'].astype(object)
+  raw_email = df['email'].astype(object).where(df['email'].notna(), None)
+  # Emails are stored lower-cased so later imports de-dup with a plain IN.
+  email = raw_email.map(lambda value: value.strip().lower() if isinstance(value, str) else None)
+  tier = df['membership_tier'] if 'membership_tier' in df.columns else pd.Series(None, index=df.index, dtype=object)
+  tier = tier.where(tier.notna(), DEFAULT_TIER).astype(str)
+
+  known = existing_emails({value for value in raw_email if isinstance(value, str)})
+  checks = [
+    (name.isna() | email.isna(), "Missing required data (name or email)"),
+    (name.astype(str).str.strip() == '', "Customer name cannot be empty"),
+    (name.astype(str).str.len() > 50, "Customer name is longer than 50 characters"),
+    (~email.fillna('').str.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+") | (email.fillna('').str.len() > 120), "Invalid email"),
+    (tier.str.len() > 20, "Invalid membership tier"),
+    (email.isin(known), "Email '" + email.astype(str) + "' is already registered"),
+    (email.notna() & email.duplicated(), "Email '" + email.astype(str) + "' appears more than once in the file"),
+  ]
+  for column, limit in (('phone', 15), ('address', 200)):
+    if column in df.columns:
+      checks.append((df[column].astype(str).str.len().gt(limit) & df[column].notna(), f"{column.capitalize()} is too long"))
+  if PARSE_ERROR in df.columns:
+    # Checked first so an unparseable line reports why, not "missing data".
+    checks.insert(0, (df[PARSE_ERROR].notna(), df[PARSE_ERROR]))
+  errors = pd.Series(None, index=df.index, dtype=object)
+  for mask, message in reversed(checks):
+    errors = errors.mask(mask, message)
+  invalid = errors.notna()
+
+  valid = ~invalid
+  rows = pd.DataFrame({'name': name[valid].astype(str).str.strip(), 'email': email[valid], 'membership_tier': tier[valid]})
+  for column in ('phone', 'address'):
+    rows[column] = df[column][valid].map(lambda value: None if pd.isna(value) else str(value)) if column in df.columns else None
+  rows = rows.astype(object).where(rows.notna(), None)
+
+  error_report = [{"row": int(index) + 1, "error": message}
+                  for index, message in errors[invalid].items()]
+  return rows.to_dict('records'), error_report
+
+def import_customers_stream(stream, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+  """Import customers chunk by chunk, committing each chunk separately.
+
+  Works like product_import.import_products_stream: one chunk in memory, one
+  email lookup and one executemany INSERT per chunk. Raises ValueError on an
+  unknown format or missing columns.
+  """
+  if fmt not in FORMATS:
+    raise ValueError(f"Unsupported format '{fmt}' (expected one of {', '.join(FORMATS)})")
+  summary = {"rows": 0, "inserted": 0, "invalid": 0, "errors": []}
+  for chunk in read_chunks(stream, fmt, chunk_size):
+    # Keep row numbers counting across chunks (NDJSON chunks restart at 0).
+    chunk.index = range(summary["rows"], summary["rows"] + len(chunk))
+    missing = REQUIRED_COLUMNS - set(chunk.columns)
+    if missing:
+      raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+    try:
+      mappings, errors = validate_customers(chunk)
+      if mappings:
+        db.session.execute(insert(Customer), mappings)
+      db.session.commit()
+    except Exception:
+      db.session.rollback()
+      raise
+    summary["rows"] += len(chunk)
+    summary["inserted"] += len(mappings)
+    summary["invalid"] += len(errors)
+    room = MAX_REPORTED_ERRORS - len(summary["errors"])
+    summary["errors"].extend(errors[:max(room, 0)])
+    if on_progress:
+      on_progress(summary)
+  return summary
+
+def tier_expression(total, thresholds=DEFAULT_TIER_THRESHOLDS):
+  return case(*[(total >= threshold, tier) for tier, threshold in thresholds], else_=DEFAULT_TIER)
+
+def recompute_tiers(thresholds=DEFAULT_TIER_THRESHOLDS, batch_size=DEFAULT_CHUNK_SIZE):
+  """Set every customer's tier from their order totals.
+
+  One grouped aggregate (customers LEFT JOIN orders) yields only the
+  customers whose tier changes, which are then written with executemany
+  UPDATEs of batch_size rows. The caller owns the transaction. Returns
+  {tier: number of customers moved into it}.
+  """
+  total = func.coalesce(func.sum(Order.total_price), 0)
+  new_tier = tier_expression(total, thresholds)
+  changes = db.session.query(Customer.id, new_tier) \
+    .outerjoin(Order, (Order.customer_id == Customer.id) & Order.status.notin_(EXCLUDED_STATUSES)) \
+    .group_by(Customer.id, Customer.membership_tier) \
+    .having(new_tier != Customer.membership_tier) \
+    .all()
+
+  table = Customer.__table__
+  update = table.update().where(table.c.id == bindparam('c_id')).values(membership_tier=bindparam('tier'))
+  moved = {}
+  for start in range(0, len(changes), batch_size):
+    batch = changes[start:start + batch_size]
+    db.session.execute(update, [{"c_id": customer_id, "tier": tier} for customer_id, tier in batch])
+    for _, tier in batch:
+      moved[tier] = moved.get(tier, 0) + 1
+  return moved
@@ -0,0 +1,77 @@
+from sqlalchemy import String, case, cast, literal, select, union_all
+from app import db
+from app.models import Product, Subcategory
+
+# (label, lower bound inclusive, upper bound exclusive or None)
+PRICE_BUCKETS = [
+  ('0-100', 0, 100),
+  ('100-500', 100, 500),
+  ('500-1000', 500, 1000),
+  ('1000-5000', 1000, 5000),
+  ('5000+', 5000, None),
+]
+
+class FacetFilters:
+  """Parsed facet selections; empty lists / None mean 'not filtered'."""
+
+  def __init__(self, category_ids=(), subcategory_ids=(), min_price=None, max_price=None, discounted=None):
+    self.category_ids = list(category_ids)
+    self.subcategory_ids = list(subcategory_ids)
+    self.min_price = min_price
+    self.max_price = max_price
+    self.discounted = discounted
+
+  def conditions(self, exclude=None):
+    """SQL conditions for every selected facet except `exclude`."""
+    conditions = []
+    if self.category_ids and exclude != 'category':
+      conditions.append(Subcategory.category_id.in_(self.category_ids))
+    if self.subcategory_ids and exclude != 'subcategory':
+      conditions.append(Product.subcategory_id.in_(self.subcategory_ids))
+    if exclude != 'price':
+      if self.min_price is not None:
+        conditions.append(Product.price >= self.min_price)
+      if self.max_price is not None:
+        conditions.append(Product.price <= self.max_price)
+    if self.discounted is not None and exclude != 'discount':
+      has_discount = db.func.coalesce(Product.discount, 0) > 0
+      conditions.append(has_discount if self.discounted else ~has_discount)
+    return conditions
+
+def price_bucket():
+  whens = [((Product.price >= low) & (Product.price < high), label) for label, low, high in PRICE_BUCKETS if high is not None]
+  return case(*whens, else_=PRICE_BUCKETS[-1][0])
+
+def discount_bucket():
+  return case((db.func.coalesce(Product.discount, 0) > 0, 'discounted'), else_='full_price')
+
+FACETS = {
+  'category': lambda: Subcategory.category_id,
+  'subcategory': lambda: Product.subcategory_id,
+  'price': price_bucket,
+  'discount': discount_bucket,
+}
+
+def facet_counts(filters):
+  """Count products per facet value in a single UNION ALL statement.
+
+  Each facet is counted with the other facets' selections applied but not its
+  own, so the sidebar can show how many products each alternative would give.
+  """
+  selects = []
+  for name, key in FACETS.items():
+    value = key()
+    selects.append(
+      select(literal(name).label('facet'), cast(value, String).label('value'), db.func.count(Product.id).label('count'))
+      .select_from(Product)
+      .outerjoin(Subcategory, Product.subcategory_id == Subcategory.id)
+      .where(*filters.conditions(exclude=name))
+      .group_by(value))
+  counts = {name: {} for name in FACETS}
+  for facet, value, count in db.session.execute(union_all(*selects)):
+    if value is not None:
+      counts[facet][value] = count
+  return counts
+
+def filtered_products(query, filters):
+  return query.outerjoin(Subcategory, Product.subcategory_id == Subcategory.id).filter(*filters.conditions())
@@ -0,0 +1,91 @@
+import io
+import os
+import queue
+import tempfile
+from contextlib import contextmanager
+import magic
+from app import scanner
+
+SNIFF_BYTES = 2048
+
+class MagicPool:
+  """Reusable libmagic handles.
+
+  A handle loads the magic database when created and must not be shared
+  between threads, so each caller borrows one for the duration of a call.
+  """
+
+  def __init__(self, max_idle=8):
+    self.max_idle = max_idle
+    self.idle = queue.LifoQueue()
+
+  @contextmanager
+  def detector(self):
+    try:
+      detector = self.idle.get_nowait()
+    except queue.Empty:
+      detector = magic.Magic(mime=True)
+    try:
+      yield detector
+    finally:
+      if self.idle.qsize() < self.max_idle:
+        self.idle.put(detector)
+
+  def from_buffer(self, header):
+    with self.detector() as detector:
+      return detector.from_buffer(header)
+
+magic_pool = MagicPool()
+
+def stream_size(stream):
+  """Size of an upload stream without reading it."""
+  if isinstance(stream, tempfile.SpooledTemporaryFile):
+    # fileno() would force the spool to disk; look at the backing file instead.
+    stream = stream._file
+  if isinstance(stream, io.BytesIO):
+    return stream.getbuffer().nbytes
+  try:
+    return os.fstat(stream.fileno()).st_size
+  except (AttributeError, OSError, io.UnsupportedOperation):
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+def upload_size(file, max_size):
+  """Size of an upload, measured without reading its content."""
+  # The part's Content-Length is client supplied: trust it only to reject early.
+  if file.content_length and file.content_length > max_size:
+    return file.content_length
+  return stream_size(file.stream)
+
+def sniff(file):
+  """Detect an upload's MIME type from a single header read; the stream is left at 0."""
+  stream = file.stream
+  stream.seek(0)
+  header = stream.read(SNIFF_BYTES)
+  stream.seek(0)
+  return magic_pool.from_buffer(header)
+
+def validate_upload(file, extensions, mime_types, max_size=None, label='File'):
+  """Extension, declared MIME type, size and virus scan checks for data uploads.
+
+  Returns (valid, message) like the other validators; valid is None when the
+  scan itself failed.
+  """
+  if not ('.' in file.filename and file.filename.rsplit('.',1)[1].lower() in extensions):
+    return False, f"Invalid {label} extension."
+
+  if file.content_type not in mime_types:
+    return False, f"Invalid {label} MIME type."
+
+  size = stream_size(file.stream)
+  if max_size is not None and size>max_size:
+    return False, f"{label} file size exceeds limit."
+
+  is_clean, scan_message = scanner.verdict(scanner.submit(file.stream, size))
+  if not is_clean:
+    return is_clean, scan_message
+
+  return True, f"{label} is valid."
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import tempfile
+from flask import current_app
+from PIL import Image
+from app import db, jobs
+from app.models import Product
+from app.versions import bump_versions
+
+# name -> (max width/height, filename suffix); all variants are WebP.
+VARIANTS = {
+  'thumbnail': ((200, 200), '_thumb.webp'),
+  'webp': ((1200, 1200), '.webp'),
+}
+HASH_CHUNK_SIZE = 64*1024
+
+def upload_folder():
+  return current_app.config.get('UPLOAD_FOLDER') or os.path.join(current_app.static_folder, 'uploads')
+
+def variant_filenames(digest):
+  return {name: digest + suffix for name, (_, suffix) in VARIANTS.items()}
+
+def store_image(file, extension):
+  """Save an upload under its SHA-256 digest and return (digest, filename).
+
+  Identical uploads map to the same file, so duplicates are stored once.
+  """
+  folder = upload_folder()
+  os.makedirs(folder, exist_ok=True)
+  digest = hashlib.sha256()
+  fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+  try:
+    with os.fdopen(fd, 'wb') as out:
+      file.stream.seek(0)
+      for chunk in iter(lambda: file.stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        out.write(chunk)
+    filename = f"{digest.hexdigest()}.{extension}"
+    path = os.path.join(folder, filename)
+    if os.path.exists(path):
+      os.remove(temp_path)
+    else:
+      os.replace(temp_path, path)
+  except BaseException:
+    if os.path.exists(temp_path):
+      os.remove(temp_path)
+    raise
+  return digest.hexdigest(), filename
+
+def existing_variants(digest):
+  folder = upload_folder()
+  filenames = variant_filenames(digest)
+  if all(os.path.exists(os.path.join(folder, f)) for f in filenames.values()):
+    return filenames
+  return None
+
+def render_variants(digest, filename):
+  folder = upload_folder()
+  filenames = variant_filenames(digest)
+  with Image.open(os.path.join(folder, filename)) as original:
+    original = original.convert('RGBA')
+    for name, (size, _) in VARIANTS.items():
+      target = os.path.join(folder, filenames[name])
+      if os.path.exists(target):
+        continue
+      image = original.copy()
+      image.thumbnail(size)
+      # Write to a temp name first so readers never see a half-written variant.
+      image.save(target + '.part', 'WEBP', quality=80)
+      os.replace(target + '.part', target)
+  return filenames
+
+def generate_variants_job(job_id, digest, filename):
+  filenames = render_variants(digest, filename)
+  Product.query.filter_by(image_hash=digest).update(
+    {"thumbnail_url": filenames['thumbnail'], "webp_url": filenames['webp']}, synchronize_session=False)
+  bump_versions('products')
+  db.session.commit()
+
+def attach_image(product, file, extension):
+  """Store file for product; resize on the job pool unless the variants already exist."""
+  digest, filename = store_image(file, extension)
+  product.image_url = filename
+  product.image_hash = digest
+  variants = existing_variants(digest)
+  if variants:
+    product.thumbnail_url = variants['thumbnail']
+    product.webp_url = variants['webp']
+  else:
+    product.thumbnail_url = None
+    product.webp_url = None
+  return variants is not None
+
+def queue_variants(product):
+  jobs.submit('image_variants', generate_variants_job, product.image_hash, product.image_url,
+              filename=product.image_url)
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  status TEXT NOT NULL,
+  filename TEXT,
+  rows INTEGER NOT NULL DEFAULT 0,
+  inserted INTEGER NOT NULL DEFAULT 0,
+  invalid INTEGER NOT NULL DEFAULT 0,
+  errors TEXT NOT NULL DEFAULT '[]',
+  message TEXT,
+  pid INTEGER,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+)
+"""
+
+def process_alive(pid):
+  if not pid:
+    # Rows without a pid predate the column.
+    return False
+  if pid == os.getpid():
+    return True
+  try:
+    os.kill(pid, 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    return True
+  return True
+
+class JobStore:
+  """Job bookkeeping in a small SQLite file, separate from the catalog database."""
+
+  def __init__(self, path):
+    self.path = path
+    with self._connect() as conn:
+      conn.execute(SCHEMA)
+      columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+      if 'pid' not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN pid INTEGER")
+
+  def _connect(self):
+    return sqlite3.connect(self.path, timeout=30)
+
+  def create(self, kind, filename=None):
+    job_id = uuid.uuid4().hex
+    now = datetime.utcnow().isoformat()
+    with self._connect() as conn:
+      conn.execute("INSERT INTO jobs (id, kind, status, filename, pid, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                   (job_id, kind, filename, os.getpid(), now, now))
+    return job_id
+
+  def update(self, job_id, **fields):
+    if 'errors' in fields:
+      fields['errors'] = json.dumps(fields['errors'])
+    fields['updated_at'] = datetime.utcnow().isoformat()
+    assignments = ', '.join(f"{column} = ?" for column in fields)
+    with self._connect() as conn:
+      conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+  def fail_orphaned(self):
+    """Mark queued/running jobs whose process has exited as failed; returns their ids.
+
+    Jobs live in the memory of the process that accepted them, so once it is
+    gone nothing will ever finish them. Jobs of live sibling workers sharing
+    this file are left alone.
+    """
+    with self._connect() as conn:
+      rows = conn.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+      orphaned = [job_id for job_id, pid in rows if not process_alive(pid)]
+      conn.executemany("UPDATE jobs SET status = 'failed', message = ?, updated_at = ? WHERE id = ?",
+                       [("Interrupted: the worker process exited before the job finished.",
+                         datetime.utcnow().isoformat(), job_id) for job_id in orphaned])
+    return orphaned
+
+  def get(self, job_id):
+    with self._connect() as conn:
+      conn.row_factory = sqlite3.Row
+      row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+      return None
+    job = dict(row)
+    job['errors'] = json.loads(job['errors'])
+    return job
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def shared_executor(max_workers):
+  """Return this process's job thread pool, creating it on first use.
+
+  Every app in the process shares it, so initialising another app (tests,
+  several app factories) does not leak a pool. A forked child gets its own.
+  """
+  global _executor, _executor_pid
+  with _executor_lock:
+    if _executor is None or _executor_pid != os.getpid():
+      _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jobs')
+      _executor_pid = os.getpid()
+    return _executor
+
+class JobRunner:
+  """Runs background jobs on a thread pool inside the application context."""
+
+  def __init__(self, app=None):
+    self.store = None
+    self.executor = None
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    path = app.config.get('JOB_DATABASE_PATH') or os.path.join(app.instance_path, 'jobs.db')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self.app = app
+    self.store = JobStore(path)
+    orphaned = self.store.fail_orphaned()
+    if orphaned:
+      app.logger.warning("Marked %d interrupted job(s) as failed", len(orphaned))
+    self.executor = shared_executor(app.config.get('JOB_WORKERS', 2))
+    app.extensions['jobs'] = self
+
+  def submit(self, kind, func, *args, filename=None):
+    """Queue func(job_id, *args) and return the new job id immediately."""
+    job_id = self.store.create(kind, filename)
+    self.executor.submit(self._run, job_id, func, args)
+    return job_id
+
+  def submit_upload(self, kind, file, import_stream, suffix=''):
+    """Import an uploaded file in a background job and return the job id.
+
+    import_stream(stream, on_progress=...) reads a copy of the upload and
+    reports {"rows", "inserted", "invalid", "errors"} summaries, which are
+    recorded on the job as it goes.
+    """
+    # The request stream is gone once we return, so hand the worker a copy on disk.
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+      with os.fdopen(fd, 'wb') as out:
+        file.save(out)
+      return self.submit(kind, self._run_upload, path, import_stream, filename=file.filename)
+    except BaseException:
+      os.remove(path)
+      raise
+
+  def _run_upload(self, job_id, path, import_stream):
+    def record_progress(summary):
+      self.store.update(job_id, rows=summary["rows"], inserted=summary["inserted"],
+                        invalid=summary["invalid"], errors=summary["errors"])
+
+    try:
+      with open(path, 'rb') as stream:
+        import_stream(stream, on_progress=record_progress)
+    finally:
+      os.remove(path)
+
+  def _run(self, job_id, func, args):
+    with self.app.app_context():
+      self.store.update(job_id, status='running')
+      try:
+        func(job_id, *args)
+      except Exception as e:
+        self.app.logger.exception("Job %s failed", job_id)
+        self.store.update(job_id, status='failed', message=str(e))
+      else:
+        self.store.update(job_id, status='finished')
+
+  def get(self, job_id):
+    return self.store.get(job_id)
@@ -6,8 +6,11 @@ class Product(db.Model):
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
     price = db.Column(db.Float, nullable=False)
-    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id', name='fk1'), nullable=True)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id', name='fk1'), nullable=True, index=True)
     image_url = db.Column(db.String(200), nullable=True)
+    image_hash = db.Column(db.String(64), nullable=True, index=True)
+    thumbnail_url = db.Column(db.String(200), nullable=True)
+    webp_url = db.Column(db.String(200), nullable=True)
     specifications = db.Column(db.Text, nullable=True)
     discount = db.Column(db.Float, default=0.0) 
 
@@ -21,7 +24,7 @@ class Category(db.Model):
 
 class Subcategory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id', name='fk2'), nullable=False)
     products = db.relationship('Product', backref='subcategory', lazy=True)
 
@@ -33,10 +36,33 @@ class Warehouse(db.Model):
 class Inventory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id', name='fk3', ondelete='CASCADE'), nullable=False)
-    warehouse_id = db.Column(db.Integer, db.ForeignKey('warehouse.id', name='fk4'), nullable=False)
+    warehouse_id = db.Column(db.Integer, db.ForeignKey('warehouse.id', name='fk4'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False, default=0)
     product = db.relationship('Product', backref=db.backref('inventory_records', lazy=True))
 
+    # Leading product_id column also serves product-only lookups.
+    __table_args__ = (db.Index('uq_inventory_product_warehouse', 'product_id', 'warehouse_id', unique=True),)
+
+# Running totals kept in step with Inventory by app.stock, so the stock
+# report does not aggregate the whole inventory table on every view.
+class ProductStock(db.Model):
+    __tablename__ = 'product_stock'
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', name='fk6', ondelete='CASCADE'), primary_key=True)
+    total_stock = db.Column(db.Integer, nullable=False, default=0, index=True)
+    product = db.relationship('Product')
+
+class ResourceVersion(db.Model):
+    __tablename__ = 'resource_version'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class CategoryStock(db.Model):
+    __tablename__ = 'category_stock'
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id', name='fk7', ondelete='CASCADE'), primary_key=True)
+    total_stock = db.Column(db.Integer, nullable=False, default=0)
+    category = db.relationship('Category')
+
 
 
 
@@ -52,14 +78,19 @@ class Customer(db.Model):
     membership_tier = db.Column(db.String(20), nullable=False, default='Standard')
     orders = db.relationship('Order', backref='customer', lazy=True)
 
+# Case-insensitive email lookups (duplicate checks on import) use this index.
+db.Index('ix_customers_email_lower', db.func.lower(Customer.email))
+
 
 class Order(db.Model):
     __tablename__ = 'orders'
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id', name='fk5'), nullable=False)
     product_id = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.String(20), nullable=False, default='pending')
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
     quantity = db.Column(db.Integer, nullable=False)
     total_price = db.Column(db.Float, nullable=False)
     order_date = db.Column(db.DateTime, default=datetime.utcnow)
-    tracking_number = db.Column(db.String(50), nullable=True)
\ No newline at end of file
+    tracking_number = db.Column(db.String(50), nullable=True)
+    # Serves both lookups by customer and their history newest-first.
+    __table_args__ = (db.Index('ix_orders_customer_id_order_date', 'customer_id', 'order_date'),)
\ No newline at end of file
@@ -0,0 +1,101 @@
+import pandas as pd
+from sqlalchemy import insert
+from app import db
+from app.models import Product
+from app.reference_data import resolve_subcategory_ids
+from app.versions import bump_versions
+
+REQUIRED_COLUMNS = {'name', 'price', 'subcategory_name'}
+DEFAULT_CHUNK_SIZE = 5000
+
+def missing_columns(df):
+  return REQUIRED_COLUMNS - set(df.columns)
+
+def validate_products(df, subcategory_ids):
+  """Validate a product frame with vectorized masks.
+
+  Returns (mappings, errors): insert-ready dicts for the valid rows and a
+  list of {"row", "error"} entries (1-based row numbers) for the rest.
+  """
+  name = df['name']
+  subcategory_name = df['subcategory_name']
+  price = pd.to_numeric(df['price'], errors='coerce')
+  if 'discount' in df.columns:
+    discount = pd.to_numeric(df['discount'].fillna(0.0), errors='coerce')
+  else:
+    discount = pd.Series(0.0, index=df.index)
+  subcategory_id = subcategory_name.map(subcategory_ids)
+
+  checks = [
+    (name.isna() | subcategory_name.isna(), "Missing required data (name or subcategory_name)"),
+    (name.astype(str).str.strip() == '', "Product name cannot be empty"),
+    (price.isna() | (price < 0), "Invalid price"),
+    (discount.isna() | (discount < 0) | (discount > 100), "Invalid discount (should be between 0 and 100)"),
+    (subcategory_id.isna(), "Subcategory '" + subcategory_name.astype(str) + "' does not exist"),
+  ]
+  errors = pd.Series(None, index=df.index, dtype=object)
+  # Apply in reverse so each row keeps the first failing check.
+  for mask, message in reversed(checks):
+    errors = errors.mask(mask, message)
+  invalid = errors.notna()
+
+  valid = ~invalid
+  rows = pd.DataFrame({
+    'name': name[valid],
+    'description': df['description'][valid] if 'description' in df.columns else '',
+    'price': price[valid],
+    'subcategory_id': subcategory_id[valid].astype('int64'),
+    'specifications': df['specifications'][valid] if 'specifications' in df.columns else '',
+    'discount': discount[valid],
+  })
+  rows = rows.astype(object).where(rows.notna(), None)
+
+  error_report = [{"row": int(index) + 1, "error": message}
+                  for index, message in errors[invalid].items()]
+  return rows.to_dict('records'), error_report
+
+def insert_products(mappings, chunk_size=DEFAULT_CHUNK_SIZE):
+  for start in range(0, len(mappings), chunk_size):
+    db.session.execute(insert(Product), mappings[start:start + chunk_size])
+  if mappings:
+    bump_versions('products')
+
+def import_products(df, chunk_size=DEFAULT_CHUNK_SIZE):
+  """Validate and insert a product frame in the current session.
+
+  Returns (inserted, errors). The caller owns the transaction.
+  """
+  subcategory_ids = resolve_subcategory_ids(df['subcategory_name'].dropna().unique())
+  mappings, errors = validate_products(df, subcategory_ids)
+  insert_products(mappings, chunk_size)
+  return len(mappings), errors
+
+MAX_REPORTED_ERRORS = 1000
+
+def import_products_stream(stream, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+  """Import a CSV stream chunk by chunk, committing each chunk separately.
+
+  Only one chunk is held in memory at a time. on_progress, if given, is
+  called with the running summary after every committed chunk. Raises
+  ValueError if required columns are missing; chunks committed before a
+  database error are kept.
+  """
+  summary = {"rows": 0, "inserted": 0, "invalid": 0, "errors": []}
+  for chunk in pd.read_csv(stream, chunksize=chunk_size):
+    missing = missing_columns(chunk)
+    if missing:
+      raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    try:
+      inserted, errors = import_products(chunk, chunk_size)
+      db.session.commit()
+    except Exception:
+      db.session.rollback()
+      raise
+    summary["rows"] += len(chunk)
+    summary["inserted"] += inserted
+    summary["invalid"] += len(errors)
+    room = MAX_REPORTED_ERRORS - len(summary["errors"])
+    summary["errors"].extend(errors[:max(room, 0)])
+    if on_progress:
+      on_progress(summary)
+  return summary
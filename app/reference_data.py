@@ -0,0 +1,90 @@
+from app import cache, db
+from app.models import Category, Subcategory, Warehouse
+
+# Reference lists are cached as plain dicts rather than ORM instances so they
+# can outlive the session that loaded them; templates read them the same way.
+CATEGORIES = 'reference:categories'
+SUBCATEGORIES = 'reference:subcategories'
+WAREHOUSES = 'reference:warehouses'
+CATEGORY_NAMES = 'reference:category_names'
+SUBCATEGORY_NAMES = 'reference:subcategory_names'
+# Stay well below SQLite's bound-parameter limit when building IN lists.
+IN_CLAUSE_BATCH = 500
+
+def categories():
+  return cache.get_or_set(CATEGORIES, lambda: [
+    {"id": c.id, "name": c.name} for c in Category.query.order_by(Category.id)])
+
+def subcategories():
+  return cache.get_or_set(SUBCATEGORIES, lambda: [
+    {"id": s.id, "name": s.name, "category_id": s.category_id} for s in Subcategory.query.order_by(Subcategory.id)])
+
+def warehouses():
+  return cache.get_or_set(WAREHOUSES, lambda: [
+    {"id": w.id, "location": w.location} for w in Warehouse.query.order_by(Warehouse.id)])
+
+def normalize_name(name):
+  return name.strip().lower()
+
+def name_index(rows):
+  # Rows are in id order, so the lowest id wins for duplicate names, as
+  # filter_by(name=...).first() did.
+  index = {}
+  for row in rows:
+    index.setdefault(normalize_name(row["name"]), row["id"])
+  return index
+
+def resolve_names(model, index_key, rows, names, invalidate):
+  """Map each name in names to an id, or leave it out if no such row exists.
+
+  Lookups go through the cached index; names it does not know (possibly
+  created by another process since it was built) are checked with one IN
+  query per batch. If any of them turn up, invalidate() drops the index
+  together with the cached list it was built from.
+  """
+  index = cache.get_or_set(index_key, lambda: name_index(rows()))
+  resolved, missing = {}, {}
+  for name in names:
+    if not isinstance(name, str):
+      continue
+    key = normalize_name(name)
+    if key in index:
+      resolved[name] = index[key]
+    else:
+      missing.setdefault(key, []).append(name)
+
+  keys = list(missing)
+  found = {}
+  for start in range(0, len(keys), IN_CLAUSE_BATCH):
+    batch = keys[start:start + IN_CLAUSE_BATCH]
+    normalized = db.func.lower(db.func.trim(model.name))
+    rows_found = db.session.query(normalized, model.id).filter(normalized.in_(batch)) \
+      .order_by(model.id.desc()).all()
+    found.update(dict(rows_found))
+  if found:
+    invalidate()
+  for key, id in found.items():
+    for name in missing[key]:
+      resolved[name] = id
+  return resolved
+
+def resolve_subcategory_ids(names):
+  return resolve_names(Subcategory, SUBCATEGORY_NAMES, subcategories, names, invalidate_subcategories)
+
+def resolve_category_ids(names):
+  return resolve_names(Category, CATEGORY_NAMES, categories, names, invalidate_categories)
+
+def subcategory_id(name):
+  return resolve_subcategory_ids([name]).get(name)
+
+def category_id(name):
+  return resolve_category_ids([name]).get(name)
+
+def invalidate_categories():
+  cache.invalidate(CATEGORIES, CATEGORY_NAMES)
+
+def invalidate_subcategories():
+  cache.invalidate(SUBCATEGORIES, SUBCATEGORY_NAMES)
+
+def invalidate_warehouses():
+  cache.invalidate(WAREHOUSES)
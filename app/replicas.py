@@ -0,0 +1,152 @@
+"""Send read-only queries to a read replica, everything else to the primary.
+
+The replica is an extra Flask-SQLAlchemy bind ('replica'). RoutingSession
+picks it only for reads made while handling a GET/HEAD/OPTIONS request that
+has not written anything and is not sticky; writes, flushes, SELECT ... FOR
+UPDATE, non-GET requests, CLI commands and background jobs all stay on the
+primary, so read-then-write code paths never plan against stale rows.
+
+Read-your-writes: once a request writes, the rest of it reads the primary,
+and the response sets a short-lived cookie that keeps the same client on
+the primary for REPLICA_STICKY_SECONDS (so a redirect after a POST sees the
+change). Views that must never read stale data can use @read_from_primary.
+
+SQLiteReplicator is a stand-in for real replication when developing with
+two SQLite files: it copies the primary into the replica with the SQLite
+backup API every SQLITE_REPLICA_SYNC_INTERVAL seconds.
+"""
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import Select
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'read_primary_until'
+
+def is_write(clause, flushing=False):
+  if flushing or isinstance(clause, UpdateBase):
+    return True
+  if isinstance(clause, Select):
+    return clause._for_update_arg is not None
+  if isinstance(clause, TextClause):
+    return not clause.text.lstrip().upper().startswith('SELECT')
+  return False
+
+def read_from_primary(view):
+  """Route every query of this view to the primary."""
+  @wraps(view)
+  def wrapper(*args, **kwargs):
+    g.read_primary = True
+    return view(*args, **kwargs)
+  return wrapper
+
+def sticky_until():
+  try:
+    return float(request.cookies.get(STICKY_COOKIE, 0))
+  except ValueError:
+    return 0
+
+def replica_allowed(session):
+  if not has_request_context() or request.method not in SAFE_METHODS:
+    return False
+  if session.info.get('wrote') or g.get('read_primary'):
+    return False
+  return sticky_until() < time.time()
+
+class RoutingSession(Session):
+  def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+    engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+    if is_write(clause, self._flushing):
+      self.info['wrote'] = True
+      return engine
+    engines = self._db.engines
+    replica = engines.get(REPLICA_BIND)
+    # Only queries bound to the default database have a replica.
+    if replica is None or bind is not None or engine is not engines.get(None):
+      return engine
+    return replica if replica_allowed(self) else engine
+
+class SQLiteReplicator:
+  """Copy one SQLite file onto another on a timer (local stand-in for replication)."""
+
+  def __init__(self, primary_path, replica_path, interval):
+    self.primary_path = primary_path
+    self.replica_path = replica_path
+    self.interval = interval
+    self._stop = threading.Event()
+    self._thread = None
+
+  def sync(self):
+    source = sqlite3.connect(self.primary_path, timeout=30)
+    target = sqlite3.connect(self.replica_path, timeout=30)
+    try:
+      source.backup(target)
+    finally:
+      target.close()
+      source.close()
+
+  def _run(self):
+    while not self._stop.wait(self.interval):
+      try:
+        self.sync()
+      except sqlite3.Error:
+        # Busy or mid-migration: the next tick catches up.
+        continue
+
+  def start(self):
+    self.sync()
+    self._thread = threading.Thread(target=self._run, name='sqlite-replicator', daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join()
+
+class ReadReplicas:
+  """Registers the replica bind and the read-your-writes cookie.
+
+  Call init_app before db.init_app so the bind exists when engines are made.
+  """
+
+  def __init__(self, app=None, replica_uri=None):
+    self.replicator = None
+    if app is not None:
+      self.init_app(app, replica_uri)
+
+  def init_app(self, app, replica_uri=None):
+    replica_uri = replica_uri or app.config.get('SQLALCHEMY_REPLICA_URI')
+    app.extensions['replicas'] = self
+    if not replica_uri:
+      return
+    app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), REPLICA_BIND: replica_uri}
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @app.after_request
+    def stick_to_primary(response):
+      from app import db
+      if sticky_seconds and db.session.info.get('wrote'):
+        response.set_cookie(STICKY_COOKIE, str(time.time() + sticky_seconds),
+                            max_age=sticky_seconds, httponly=True, samesite='Lax')
+      return response
+
+    interval = app.config.get('SQLITE_REPLICA_SYNC_INTERVAL')
+    primary, replica = make_url(app.config['SQLALCHEMY_DATABASE_URI']), make_url(replica_uri)
+    if interval and primary.get_backend_name() == replica.get_backend_name() == 'sqlite':
+      self.replicator = SQLiteReplicator(self.sqlite_path(app, primary), self.sqlite_path(app, replica), interval).start()
+
+  @staticmethod
+  def sqlite_path(app, url):
+    # Flask-SQLAlchemy resolves relative SQLite paths against the instance folder.
+    path = url.database if os.path.isabs(url.database) else os.path.join(app.instance_path, url.database)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -1,17 +1,96 @@
-from flask import Blueprint, request, jsonify  # For routing, handling requests, and JSON responses
+import os
+from datetime import datetime
+from functools import partial
+import click
+from flask import Blueprint, current_app, request, jsonify, url_for  # For routing, handling requests, and JSON responses
+from sqlalchemy import and_, func, or_
+from app import jobs
 from app.models import db, Customer, Order     # Import db and models for database operations
-customers_bp = Blueprint('customers_bp', __name__)
+from common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.customer_import import DEFAULT_CHUNK_SIZE, DEFAULT_TIER_THRESHOLDS, existing_emails, import_customers_stream, recompute_tiers
+from app.filetype import upload_size, validate_upload
+customers_bp = Blueprint('customers_bp', __name__, cli_group='customers')
+
+# Order history is served newest-first from the (customer_id, order_date)
+# index. Cursors are "<order_date>,<id>" for the last row of a page; orders
+# without a date sort after every dated one.
+
+def encode_order_cursor(order):
+    return f"{order.order_date.isoformat() if order.order_date else ''},{order.id}"
+
+def decode_order_cursor(cursor):
+    order_date, _, order_id = cursor.rpartition(',')
+    return (datetime.fromisoformat(order_date) if order_date else None), int(order_id)
+
+def order_history_query(customer_id, after=None):
+    """A customer's orders after the `after` cursor position, in page order."""
+    query = db.session.query(Order.id, Order.status, Order.total_price, Order.order_date) \
+        .filter(Order.customer_id == customer_id)
+    if after is not None:
+        order_date, order_id = after
+        if order_date is None:
+            query = query.filter(Order.order_date.is_(None), Order.id < order_id)
+        else:
+            query = query.filter(or_(Order.order_date < order_date,
+                                     and_(Order.order_date == order_date, Order.id < order_id),
+                                     Order.order_date.is_(None)))
+    # Explicit NULLS LAST: SQLite puts NULLs last on DESC by default, PostgreSQL first.
+    return query.order_by(Order.order_date.desc().nulls_last(), Order.id.desc())
+
+def order_history_page(customer_id, limit, after=None):
+    """Return (orders, next_after) for one page of a customer's history."""
+    rows = order_history_query(customer_id, after).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_order_cursor(rows[-1])
+    return rows, None
 
 @customers_bp.route('/customers/<int:customer_id>', methods=['GET'])
 def view_customer(customer_id):
     customer = Customer.query.get_or_404(customer_id)
-    orders = Order.query.filter_by(customer_id=customer.id).all()
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        after = request.args.get('after')
+        after = decode_order_cursor(after) if after else None
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer and after a cursor from next_after'}), 400
+
+    orders, next_after = order_history_page(customer.id, limit, after)
     return jsonify({
         'name': customer.name,
         'email': customer.email,
         'phone': customer.phone,
         'membership_tier': customer.membership_tier,
-        'orders': [{'id': order.id, 'status': order.status, 'total_price': order.total_price} for order in orders]
+        'orders': [{'id': order.id, 'status': order.status, 'total_price': order.total_price,
+                    'order_date': order.order_date.isoformat() if order.order_date else None}
+                   for order in orders],
+        'next_after': next_after
+    })
+
+@customers_bp.route('/customers/<int:customer_id>/summary', methods=['GET'])
+def customer_summary(customer_id):
+    customer = Customer.query.get_or_404(customer_id)
+    rows = db.session.query(Order.status,
+                            func.count(Order.id),
+                            func.coalesce(func.sum(Order.quantity), 0),
+                            func.coalesce(func.sum(Order.total_price), 0),
+                            func.min(Order.order_date),
+                            func.max(Order.order_date)) \
+        .filter(Order.customer_id == customer.id) \
+        .group_by(Order.status).all()
+
+    dates = [date for row in rows for date in row[4:] if date is not None]
+    return jsonify({
+        'customer_id': customer.id,
+        'order_count': sum(row[1] for row in rows),
+        'total_quantity': sum(row[2] for row in rows),
+        'total_price': round(sum(row[3] for row in rows), 2),
+        'first_order_date': min(dates).isoformat() if dates else None,
+        'last_order_date': max(dates).isoformat() if dates else None,
+        'by_status': {status: {'count': count, 'quantity': quantity, 'total_price': round(total, 2)}
+                      for status, count, quantity, total, _, _ in rows}
     })
 
 
@@ -27,13 +106,97 @@ def update_membership_tier(customer_id):
 @customers_bp.route('/customers', methods=['POST'])
 def create_customer():
     data = request.get_json()
+    # Stored lower-cased, like imported customers, so duplicate checks can compare exactly.
+    email = str(data['email']).strip().lower()
+    if existing_emails([email]):
+        return jsonify({'error': f"Email '{email}' is already registered"}), 409
     new_customer = Customer(
         name=data['name'],
-        email=data['email'],
+        email=email,
         phone=data['phone'],
         address=data['address'],
         membership_tier=data.get('membership_tier', 'Standard')
     )
     db.session.add(new_customer)
     db.session.commit()
-    return jsonify({'message': 'Customer created successfully', 'customer_id': new_customer.id})
\ No newline at end of file
+    return jsonify({'message': 'Customer created successfully', 'customer_id': new_customer.id})
+
+# (extensions, declared MIME types, label) accepted by /customers/import per format.
+IMPORT_FILE_TYPES = {
+    'csv': ({'csv'}, {'text/csv'}, 'CSV'),
+    # No registered MIME type: browsers and curl send .ndjson as octet-stream.
+    'ndjson': ({'ndjson', 'jsonl'}, {'application/x-ndjson', 'application/jsonl', 'application/json',
+                                     'text/plain', 'application/octet-stream'}, 'NDJSON'),
+}
+
+def import_format(filename, requested=None):
+    if requested:
+        return requested
+    return 'ndjson' if os.path.splitext(filename or '')[1].lower() in ('.ndjson', '.jsonl') else 'csv'
+
+def tier_thresholds():
+    return current_app.config.get('MEMBERSHIP_TIER_THRESHOLDS', DEFAULT_TIER_THRESHOLDS)
+
+def run_tier_job(job_id, thresholds):
+    moved = recompute_tiers(thresholds)
+    db.session.commit()
+    jobs.store.update(job_id, rows=sum(moved.values()),
+                      message=', '.join(f"{tier}: {count}" for tier, count in sorted(moved.items())) or 'No changes')
+
+@customers_bp.route('/customers/import', methods=['POST'])
+def import_customers():
+    file = request.files.get('file')
+    if not file:
+        return jsonify({'error': 'No file provided'}), 400
+    fmt = import_format(file.filename, request.form.get('format'))
+    if fmt not in IMPORT_FILE_TYPES:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    max_size = current_app.config.get('STREAMING_CSV_MAX_SIZE')
+    if max_size and upload_size(file, max_size) > max_size:
+        return jsonify({'error': 'File is too large'}), 413
+    # Same extension, MIME type and virus scan checks as /products/bulk_upload.
+    extensions, mime_types, label = IMPORT_FILE_TYPES[fmt]
+    is_valid, message = validate_upload(file, extensions, mime_types, label=label)
+    if not is_valid:
+        return jsonify({'error': message}), 400
+
+    chunk_size = current_app.config.get('BULK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    job_id = jobs.submit_upload('customer_import', file,
+                                partial(import_customers_stream, fmt=fmt, chunk_size=chunk_size), suffix=f'.{fmt}')
+    return jsonify({'job_id': job_id,
+                    'status_url': url_for('customers_bp.customer_job_status', job_id=job_id)}), 202
+
+@customers_bp.route('/customers/recompute_tiers', methods=['POST'])
+def recompute_membership_tiers():
+    job_id = jobs.submit('recompute_tiers', run_tier_job, tier_thresholds())
+    return jsonify({'job_id': job_id,
+                    'status_url': url_for('customers_bp.customer_job_status', job_id=job_id)}), 202
+
+@customers_bp.route('/customers/jobs/<job_id>', methods=['GET'])
+def customer_job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@customers_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+def import_customers_command(path, fmt):
+    """Import customers from a CSV or NDJSON file."""
+    chunk_size = current_app.config.get('BULK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    def echo_progress(summary):
+        click.echo(f"{summary['rows']} rows, {summary['inserted']} inserted, {summary['invalid']} skipped")
+
+    with open(path, 'rb') as stream:
+        summary = import_customers_stream(stream, import_format(path, fmt), chunk_size, on_progress=echo_progress)
+    for error in summary["errors"][:20]:
+        click.echo(f"Row {error['row']}: {error['error']}", err=True)
+
+@customers_bp.cli.command('recompute-tiers')
+def recompute_tiers_command():
+    """Recompute every customer's membership tier from their order totals."""
+    moved = recompute_tiers(tier_thresholds())
+    db.session.commit()
+    click.echo(f"Updated {sum(moved.values())} customers.")
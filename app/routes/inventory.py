@@ -1,14 +1,30 @@
+import click
 from flask import Blueprint, redirect, render_template, request, jsonify, url_for
 from app import db
 from app.models import Category, Product, Inventory, Subcategory, Warehouse
+from app import reference_data
+from app.versions import bump_versions, conditional
+from app.stock import adjust_stock, clear_stock, rebuild_stock_summary, stock_report, stock_summary_drift, unknown_ids
+from common.pagination import keyset_page, parse_page_args, stream_ndjson, wants_ndjson
+from sqlalchemy.orm import joinedload
 
 inventory_bp = Blueprint('inventory', __name__)
 
+def inventory_query():
+  return Inventory.query.options(joinedload(Inventory.product), joinedload(Inventory.warehouse))
+
+def inventory_to_dict(item):
+  return {"id": item.id,
+          "product": item.product.name,
+          "warehouse": item.warehouse.location,
+          "quantity": item.quantity}
+
 @inventory_bp.route('/inventory', methods=['GET'])
+@conditional('inventory', 'products', 'warehouses')
 def get_inventory():
   all_inventory = Inventory.query.all()
   products = Product.query.all()
-  warehouses = Warehouse.query.all()
+  warehouses = reference_data.warehouses()
   inventory_data = []
   for item in all_inventory:
     inventory_data.append({"product": item.product.name,
@@ -17,31 +33,37 @@ def get_inventory():
   return render_template('inventory.html',products=products, warehouses=warehouses, inventory_data=inventory_data)
 
 @inventory_bp.route('/inventory/filter', methods=['GET'])
+@conditional('inventory', 'products', 'warehouses')
 def filter_inventory():
     product_id = request.args.get('product_id')
     warehouse_id = request.args.get('warehouse_id')
 
-    query = Inventory.query
+    query = inventory_query()
     if product_id:
         query = query.filter_by(product_id=product_id)
     if warehouse_id:
         query = query.filter_by(warehouse_id=warehouse_id)
-    
-    filtered_inventory = query.all()
-    filtered_data = []
-    for item in filtered_inventory:
-        filtered_data.append({
-            "product": item.product.name,
-            "warehouse": item.warehouse.location,
-            "quantity": item.quantity
-        })
-    
-    return jsonify({"inventory": filtered_data})
+
+    try:
+        limit, after = parse_page_args()
+    except ValueError:
+        return jsonify({"error": "limit and after must be integers"}), 400
+
+    if wants_ndjson():
+        return stream_ndjson(query, Inventory.id, inventory_to_dict, after)
+
+    if limit is None:
+        filtered_inventory = query.order_by(Inventory.id).all()
+        return jsonify({"inventory": [inventory_to_dict(item) for item in filtered_inventory]})
+
+    page, next_after = keyset_page(query, Inventory.id, limit, after)
+    return jsonify({"inventory": [inventory_to_dict(item) for item in page],
+                    "next_after": next_after})
 
 @inventory_bp.route('/inventory/add', methods=['GET'])
 def add_inventory_form():
   products = Product.query.all()  
-  warehouses = Warehouse.query.all()
+  warehouses = reference_data.warehouses()
 
   return render_template('add_inventory.html', products=products, warehouses=warehouses)
 
@@ -53,24 +75,41 @@ def add_inventory_entry():
   warehouse_id = data['warehouse_id']
   quantity = data['quantity']
 
-  product = Product.query.get(product_id)
-  warehouse = Warehouse.query.get(warehouse_id)
-  if not product or not warehouse:
+  try:
+    product_id, warehouse_id, quantity = int(product_id), int(warehouse_id), int(quantity)
+  except ValueError:
+    return jsonify({"error": "Product ID, warehouse ID and quantity must be integers"}), 400
+
+  missing_products, missing_warehouses = unknown_ids([(product_id, warehouse_id, quantity)])
+  if missing_products or missing_warehouses:
     return jsonify({"error": "Invalid product or warehouse ID"}), 400
-  
-  existing_inventory = Inventory.query.filter_by(product_id=product_id, warehouse_id=warehouse_id).first()
-  if existing_inventory:
-   quantity = int(data['quantity'])
-   existing_inventory.quantity += quantity
-   db.session.commit()
-   return redirect(url_for('inventory.get_inventory')) 
-  
-  new_inventory = Inventory(product_id=product_id, warehouse_id=warehouse_id, quantity=quantity)
-  db.session.add(new_inventory)
+
+  adjust_stock([(product_id, warehouse_id, quantity)])
   db.session.commit()
 
   return redirect(url_for('inventory.get_inventory')) 
 
+@inventory_bp.route('/inventory/adjust', methods=['POST'])
+def adjust_inventory_batch():
+  data = request.get_json(silent=True) or {}
+  try:
+    adjustments = [(int(a['product_id']), int(a['warehouse_id']), int(a['delta']))
+                   for a in data.get('adjustments', [])]
+  except (KeyError, TypeError, ValueError):
+    return jsonify({"error": "Each adjustment needs integer product_id, warehouse_id and delta"}), 400
+  if not adjustments:
+    return jsonify({"error": "No adjustments provided"}), 400
+
+  missing_products, missing_warehouses = unknown_ids(adjustments)
+  if missing_products or missing_warehouses:
+    return jsonify({"error": "Invalid product or warehouse ID",
+                    "product_ids": sorted(missing_products),
+                    "warehouse_ids": sorted(missing_warehouses)}), 400
+
+  rows = adjust_stock(adjustments)
+  db.session.commit()
+  return jsonify({"message": "Inventory adjusted successfully", "adjustments": len(adjustments), "rows": rows})
+
 """@inventory_bp.route('/inventory/<int:product_id>/<int:warehouse_id>/update', methods=['PUT'])
 def update_inventory(product_id, warehouse_id):
   data = request.form
@@ -90,14 +129,21 @@ def update_inventory(product_id, warehouse_id):
 
 @inventory_bp.route('/inventory/report', methods=['GET'])
 def generate_report():
-  category_report = db.session.query(Category.name, db.func.sum(Inventory.quantity).label('total_stock')).join(Subcategory).join(Product).join(Inventory).group_by(Category.name).all()
-  popular_products = db.session.query(Product.name, db.func.sum(Inventory.quantity).label('total_stock')).join(Inventory, Inventory.product_id == Product.id).group_by(Product.id).order_by(db.func.sum(Inventory.quantity).desc()).limit(5).all()
-
-  report = {"category_summary": [{"category": c.name, "total_stock": c.total_stock} for c in category_report],
-            "top_products": [{"product": p.name, "stock": p.total_stock} for p in popular_products]}
-  
+  report = stock_report(top_n=5)
   return render_template('report.html', report=report)
 
+@inventory_bp.cli.command('rebuild-stock-summary')
+@click.option('--check', is_flag=True, help='Only report totals that drifted from the inventory table.')
+def rebuild_stock_summary_command(check):
+  """Recompute the product and category stock summary tables."""
+  products, categories = stock_summary_drift()
+  click.echo(f"{len(products)} product and {len(categories)} category totals out of date.")
+  if check:
+    return
+  rebuild_stock_summary()
+  db.session.commit()
+  click.echo("Stock summary rebuilt.")
+
 @inventory_bp.route('/categories', methods=['GET'])
 def show_add_category_form():
     return render_template('add_category.html')
@@ -107,12 +153,14 @@ def add_category():
   data = request.form
   category = Category(name=data['name'])
   db.session.add(category)
+  bump_versions('categories')
   db.session.commit()
+  reference_data.invalidate_categories()
   return redirect(url_for('inventory.get_inventory'))
 
 @inventory_bp.route('/subcategories', methods=['GET'])
 def show_add_subcategory_form():
-    categories = Category.query.all() 
+    categories = reference_data.categories()
     return render_template('add_subcategory.html', categories=categories)
 
 @inventory_bp.route('/subcategories', methods=['POST'])
@@ -120,13 +168,15 @@ def add_subcategory():
   data = request.form
   category_name = data['category_name']
 
-  category = Category.query.filter_by(name=category_name).first()
-  if not category:
+  category_id = reference_data.category_id(category_name)
+  if not category_id:
       return jsonify({"error": "Category not found"}), 404
   
-  subcategory = Subcategory(name=data['name'], category_id=category.id)
+  subcategory = Subcategory(name=data['name'], category_id=category_id)
   db.session.add(subcategory)
+  bump_versions('categories')
   db.session.commit()
+  reference_data.invalidate_subcategories()
   return redirect(url_for('inventory.get_inventory'))
 
 @inventory_bp.route('/warehouses', methods=['GET'])
@@ -138,7 +188,9 @@ def create_warehouse():
     data = request.form
     warehouse = Warehouse(location=data['location'])
     db.session.add(warehouse)
+    bump_versions('warehouses')
     db.session.commit()
+    reference_data.invalidate_warehouses()
     return redirect(url_for('inventory.get_inventory'))
 
 @inventory_bp.route('/warehouses/<int:warehouse_id>', methods=['GET'])
@@ -148,22 +200,25 @@ def get_warehouse(warehouse_id):
 
 @inventory_bp.route('/warehouses', methods=['GET'])
 def get_all_warehouses():
-    warehouses = Warehouse.query.all()
-    warehouse_list = [{"id": w.id, "location": w.location} for w in warehouses]
-    return jsonify(warehouse_list)
+    return jsonify(reference_data.warehouses())
 
 @inventory_bp.route('/warehouses/<int:warehouse_id>', methods=['PUT'])
 def update_warehouse(warehouse_id):
     data = request.json
     warehouse = Warehouse.query.get_or_404(warehouse_id)
-    warehouse.name = data.get('location', warehouse.location)
+    warehouse.location = data.get('location', warehouse.location)
+    bump_versions('warehouses')
     db.session.commit()
+    reference_data.invalidate_warehouses()
     return jsonify({"message": "Warehouse updated successfully"})
 
 @inventory_bp.route('/warehouses/<int:warehouse_id>', methods=['DELETE'])
 def delete_warehouse(warehouse_id):
     warehouse = Warehouse.query.get_or_404(warehouse_id)
+    clear_stock(warehouse_id=warehouse.id)
     db.session.delete(warehouse)
+    bump_versions('warehouses')
     db.session.commit()
+    reference_data.invalidate_warehouses()
     return jsonify({"message": "Warehouse deleted successfully"})
 
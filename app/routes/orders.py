@@ -1,8 +1,13 @@
+from collections import defaultdict
 from flask import Blueprint, request, jsonify
-from app.models import db, Order, Customer  
+from app.models import db, Order, Customer, Product
+from app.stock import InsufficientStock, reserve_stock
 
 orders_bp = Blueprint('orders_bp', __name__)
 
+# Retries when a concurrent checkout takes the planned stock first.
+RESERVATION_ATTEMPTS = 3
+
 
 @orders_bp.route('/orders', methods=['POST'])
 def create_order():
@@ -18,6 +23,65 @@ def create_order():
     db.session.commit()
     return jsonify({'message': 'Order created successfully', 'order_id': new_order.id})
 
+@orders_bp.route('/orders/batch', methods=['POST'])
+def create_orders_batch():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict) or not isinstance(data.get('lines', []), list):
+        return jsonify({'error': 'Expected a JSON object with a list of lines'}), 400
+    default_customer = data.get('customer_id')
+    ship_to = data.get('ship_to')
+    if ship_to is not None and not isinstance(ship_to, str):
+        return jsonify({'error': 'ship_to must be a location name'}), 400
+    try:
+        lines = [(int(line.get('customer_id', default_customer)), int(line['product_id']), int(line['quantity']))
+                 for line in data.get('lines', [])]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Each line needs integer customer_id, product_id and quantity'}), 400
+    if not lines:
+        return jsonify({'error': 'No order lines provided'}), 400
+    if any(quantity <= 0 for _, _, quantity in lines):
+        return jsonify({'error': 'Quantities must be positive'}), 400
+
+    customer_ids = {customer_id for customer_id, _, _ in lines}
+    known_customers = {id for (id,) in db.session.query(Customer.id).filter(Customer.id.in_(customer_ids))}
+    if customer_ids - known_customers:
+        return jsonify({'error': 'Unknown customer', 'customer_ids': sorted(customer_ids - known_customers)}), 400
+
+    # Price every line from the catalog in one query; the client's totals are not trusted.
+    product_ids = {product_id for _, product_id, _ in lines}
+    prices = {id: price * (1 - (discount or 0) / 100)
+              for id, price, discount in db.session.query(Product.id, Product.price, Product.discount)
+                                                   .filter(Product.id.in_(product_ids))}
+    if product_ids - prices.keys():
+        return jsonify({'error': 'Unknown product', 'product_ids': sorted(product_ids - prices.keys())}), 400
+
+    demand = defaultdict(int)
+    for _, product_id, quantity in lines:
+        demand[product_id] += quantity
+
+    for attempt in range(RESERVATION_ATTEMPTS):
+        try:
+            plan = reserve_stock(demand, near=ship_to)
+            orders = [Order(customer_id=customer_id,
+                            product_id=product_id,
+                            status='pending',
+                            quantity=quantity,
+                            total_price=round(prices[product_id] * quantity, 2))
+                      for customer_id, product_id, quantity in lines]
+            db.session.add_all(orders)
+            db.session.commit()
+            break
+        except InsufficientStock as e:
+            db.session.rollback()
+            if not e.conflict or attempt == RESERVATION_ATTEMPTS - 1:
+                return jsonify({'error': 'Insufficient stock', 'product_ids': sorted(e.product_ids)}), 409
+
+    return jsonify({'message': 'Orders created successfully',
+                    'order_ids': [order.id for order in orders],
+                    'total_price': round(sum(order.total_price for order in orders), 2),
+                    'allocations': [{'product_id': product_id, 'warehouse_id': warehouse_id, 'quantity': take}
+                                    for product_id, warehouse_id, take in plan]}), 201
+
 @orders_bp.route('/orders/<int:order_id>/update_status', methods=['PUT'])
 def update_order_status(order_id):
     order = Order.query.get_or_404(order_id)
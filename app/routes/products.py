@@ -1,47 +1,61 @@
-import os
-from flask import Blueprint, flash, redirect, render_template, request, jsonify, url_for
-import pyclamd
-from app import db
+from functools import partial
+import click
+from flask import Blueprint, current_app, flash, redirect, render_template, request, jsonify, url_for
+from app import db, jobs, scanner
 from app.models import Category, Inventory, Product, Subcategory
+from common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, parse_page_args, stream_ndjson, wants_ndjson
+from app import reference_data
+from app.facets import FacetFilters, facet_counts, filtered_products
+from app.search import rebuild_search_index, search_product_ids
+from app.images import attach_image, queue_variants
+from app.versions import bump_versions, conditional
+from app.stock import clear_stock, move_category_stock
+from app.product_import import DEFAULT_CHUNK_SIZE, import_products, import_products_stream, missing_columns
 import pandas as pd
-import magic
-from werkzeug.utils import secure_filename, safe_join
+from app.filetype import sniff, upload_size, validate_upload
+from sqlalchemy.orm import joinedload
 
 products_bp = Blueprint('products', __name__)
 
+def product_query():
+  # Load subcategory and category in the same SELECT so building the
+  # product dicts never triggers per-row lazy loads.
+  return Product.query.options(joinedload(Product.subcategory).joinedload(Subcategory.category))
+
+def product_to_dict(product):
+  subcategory = product.subcategory
+  return {"id": product.id,
+          "name": product.name,
+          "description": product.description,
+          "price": product.price,
+          "category": subcategory.category.name if subcategory else None,
+          "subcategory": subcategory.name if subcategory else None,
+          "specifications": product.specifications,
+          "discount": product.discount,
+          "thumbnail_url": product.thumbnail_url}
+
 @products_bp.route('/products', methods=['GET'])
+@conditional('products', 'categories', per_session=True)
 def get_all_products():
-  products = Product.query.all()
-  categories = Category.query.all()
-  subcategories = Subcategory.query.all()
-  products_list = []
-  for product in products:
-    products_list.append({"id": product.id,
-                      "name": product.name,
-                      "description": product.description,
-                      "price": product.price,
-                      "category": product.subcategory.category.name,
-                      "subcategory": product.subcategory.name,
-                      "specifications": product.specifications,
-                      "discount": product.discount})
-    
+  products = product_query().order_by(Product.id).all()
+  categories = reference_data.categories()
+  subcategories = reference_data.subcategories()
+  products_list = [product_to_dict(product) for product in products]
+
   return render_template('products.html', products=products_list, categories=categories, subcategories=subcategories)
 
 @products_bp.route('/products/<int:id>', methods=['GET'])
+@conditional('products', 'categories')
 def get_product(id):
-  product = Product.query.get_or_404(id)
-  product_data = {"id": product.id,
-                  "name": product.name,
-                  "description": product.description,
-                  "price": product.price,
-                  "category": product.subcategory.category.name,
-                  "subcategory": product.subcategory.name,
-                  "specifications": product.specifications,
-                  "discount": product.discount}
+  product = product_query().filter(Product.id == id).first_or_404()
   return render_template('product_detail.html', product=product)
   
 IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 IMAGE_MIME_TYPES = {'image/png', 'image/jpeg', 'image/gif'}
+MAX_IMAGE_SIZE = 5*1024*1024
+
+def image_extension(filename):
+  return filename.rsplit('.',1)[1].lower()
 
 def validate_image(file):
   if not ('.' in file.filename and file.filename.rsplit('.',1)[1].lower() in IMAGE_EXTENSIONS):
@@ -50,33 +64,24 @@ def validate_image(file):
   if file.content_type not in IMAGE_MIME_TYPES:
     return False, "Invalid image MIME type."
   
-  mime = magic.Magic(mime=True)
-  #file_mime_type = mime.from_file(file)
-  file.seek(0)
-  file_mime_type = mime.from_buffer(file.read(1024))
-  if file_mime_type not in IMAGE_MIME_TYPES:
-    return False, "Image file type does not match signature."
-  
-  MAX_IMAGE_SIZE = 5*1024*1024
-  file.seek(0, os.SEEK_END)
-  if file.tell()>MAX_IMAGE_SIZE:
-    file.seek(0)
+  size = upload_size(file, MAX_IMAGE_SIZE)
+  if size>MAX_IMAGE_SIZE:
     return False, "Image file size exceeds limit."
-  file.seek(0)
 
-  """cd = pyclamd.ClamdNetworkSocket()
-  try:
-    result = cd.scan_file(file)
-    if result != None:
-      return False, "Virus detected."
-  except Exception as e:
-    return None, "Error scanning file: {e}"""
+  # The scan streams the upload to clamd while we check its signature.
+  scan = scanner.submit(file.stream, size)
+  file_mime_type = sniff(file)
+  is_clean, scan_message = scanner.verdict(scan)
+  if file_mime_type not in IMAGE_MIME_TYPES:
+    return False, "Image file type does not match signature."
+  if not is_clean:
+    return is_clean, scan_message
 
   return True, "Image is valid."
 
 @products_bp.route('/products/add', methods=['GET'])
 def add_product_form():
-    subcategories = Subcategory.query.all()  # Fetch subcategories for the dropdown
+    subcategories = reference_data.subcategories()  # Fetch subcategories for the dropdown
     return render_template('add_product.html', subcategories=subcategories)
 
 @products_bp.route('/products', methods=['POST'])
@@ -88,38 +93,31 @@ def add_product():
     isValid, message = validate_image(file)
     if not isValid or isValid == None:
       return jsonify({"error": message}), 400
-    
-    filename = secure_filename(file.filename)
-    upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-    #image_path = safe_join('E:/Fall2024/EECE503M/project/app/static/uploads', filename)
-    image_path = safe_join(os.path.join(upload_dir), filename)
-
-    if not os.path.exists(os.path.dirname(image_path)):
-            os.makedirs(os.path.dirname(image_path))
-
-    file.save(image_path)
-  else:
-    image_path = None
 
   subcategory_name = data.get('subcategory_name')
-  subcategory = Subcategory.query.filter_by(name=subcategory_name).first()
-  if not subcategory:
+  subcategory_id = reference_data.subcategory_id(subcategory_name) if subcategory_name else None
+  if not subcategory_id:
         return jsonify({"error": f"Subcategory '{subcategory_name}' not found"}), 400
     
   new_product = Product(name=data['name'],
                         description=data['description'],
                         price=data['price'], 
-                        subcategory_id=subcategory.id, 
-                        image_url=image_path, 
+                        subcategory_id=subcategory_id, 
                         specifications=data['specifications'])
+  needs_variants = False
+  if file:
+    needs_variants = not attach_image(new_product, file, image_extension(file.filename))
   db.session.add(new_product)
+  bump_versions('products')
   db.session.commit()
+  if needs_variants:
+    queue_variants(new_product)
   return redirect(url_for('products.get_all_products'))
 
 @products_bp.route('/products/<int:id>/edit', methods=['GET'])
 def edit_product(id):
     product = Product.query.get_or_404(id)
-    subcategories = Subcategory.query.all()
+    subcategories = reference_data.subcategories()
     return render_template('update_product.html', product=product, subcategories=subcategories)
 
 @products_bp.route('/products/<int:id>', methods=['POST'])
@@ -134,10 +132,11 @@ def update_product(id):
   discount = request.form.get('discount', product.discount)
 
   if subcategory_name:
-        subcategory = Subcategory.query.filter_by(name=subcategory_name).first()
-        if not subcategory:
+        subcategory_id = reference_data.subcategory_id(subcategory_name)
+        if not subcategory_id:
             return jsonify({"error": f"Subcategory '{subcategory_name}' not found"}), 400
-        product.subcategory_id = subcategory.id
+        move_category_stock(product.id, product.subcategory_id, subcategory_id)
+        product.subcategory_id = subcategory_id
 
   product.name = name
   product.description = description
@@ -145,6 +144,7 @@ def update_product(id):
   product.specifications = specifications
   product.discount = discount
 
+  needs_variants = False
   if 'image' in request.files:
       image = request.files['image']
       if image.filename != '':
@@ -152,17 +152,12 @@ def update_product(id):
           if not is_valid:
               return jsonify({"error": message}), 400
 
-          filename = secure_filename(image.filename)
-          upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-          image_path = safe_join(os.path.join(upload_dir), filename)
-
-          if not os.path.exists(os.path.dirname(image_path)):
-            os.makedirs(os.path.dirname(image_path))
-
-          image.save(image_path)
-          product.image_url = filename
+          needs_variants = not attach_image(product, image, image_extension(image.filename))
 
+  bump_versions('products')
   db.session.commit()
+  if needs_variants:
+    queue_variants(product)
 
   return redirect(url_for('products.get_all_products'))
 
@@ -170,48 +165,40 @@ def update_product(id):
 def delete_product(id):
     if request.form.get('_method') == 'DELETE':
         product = Product.query.get_or_404(id)
-        Inventory.query.filter_by(product_id=id).delete()
+        clear_stock(product_id=id)
         db.session.delete(product)
+        bump_versions('products')
         db.session.commit()
         return redirect(url_for('products.get_all_products')) 
     return jsonify({"error": "Invalid request method"}), 405
 
 CSV_EXTENSION = {'csv'}
 CSV_MIME_TYPE = {'text/csv'}
+MAX_CSV_SIZE = 10*1024*1024
 
-def validate_csv(file):
-  if not ('.' in file.filename and file.filename.rsplit('.',1)[1].lower() in CSV_EXTENSION):
-    return False, "Invalid CSV extension."
-  
-  if file.content_type not in CSV_MIME_TYPE:
-    return False, "Invalid CSV MIME type."
-  
-  MAX_CSV_SIZE = 10*1024*1024
-  file.seek(0, os.SEEK_END)
-  if file.tell()>MAX_CSV_SIZE:
-    file.seek(0)
-    return False, "CSV file size exceeds limit."
-  file.seek(0)
-
-  """""cd = pyclamd.ClamdNetworkSocket()
-  try:
-    result = cd.scan_file(file)
-    if result != None:
-      return False, "Virus detected."
-  except Exception as e:
-    return None, "Error scanning file: {e}"""""
-
-  return True, "CSV is valid."
+def validate_csv(file, max_size=MAX_CSV_SIZE):
+  return validate_upload(file, CSV_EXTENSION, CSV_MIME_TYPE, max_size, 'CSV')
 
 @products_bp.route('/products/bulk_upload', methods=['GET'])
 def bulk_upload_form():
     return render_template('bulk_upload.html')
 
+MAX_FLASHED_ERRORS = 20
+
+def flash_row_errors(errors):
+    for error in errors[:MAX_FLASHED_ERRORS]:
+        flash(f"Row {error['row']}: {error['error']}", "error")
+    if len(errors) > MAX_FLASHED_ERRORS:
+        flash(f"... and {len(errors) - MAX_FLASHED_ERRORS} more invalid rows", "error")
+
 @products_bp.route('/products/bulk_upload', methods=['POST'])
 def bulk_upload_products():
     file = request.files.get('file')
+    mode = request.form.get('mode')
+    streaming = mode in ('stream', 'background')
     if file:
-      isValid, message = validate_csv(file)
+      max_size = current_app.config.get('STREAMING_CSV_MAX_SIZE') if streaming else MAX_CSV_SIZE
+      isValid, message = validate_csv(file, max_size)
       if not isValid or isValid is None:
           flash(f"Error: {message}", "error")
           return redirect(url_for('products.bulk_upload_form'))
@@ -219,86 +206,176 @@ def bulk_upload_products():
       flash("Error: No CSV file provided.", "error")
       return redirect(url_for('products.bulk_upload_form'))
 
+    if mode == 'background':
+      return queue_bulk_upload(file)
+    if streaming:
+      return stream_bulk_upload(file)
+
     try:
       df = pd.read_csv(file)
-      required_columns = {'name', 'price', 'subcategory_name'}
-      if not required_columns.issubset(df.columns):
-          missing_columns = required_columns - set(df.columns)
-          flash(f"Error: Missing required columns: {', '.join(missing_columns)}", "error")
+      missing = missing_columns(df)
+      if missing:
+          flash(f"Error: Missing required columns: {', '.join(missing)}", "error")
           return redirect(url_for('products.bulk_upload_form'))
 
-      invalid_rows = []
-      for index, row in df.iterrows():
-        try:
-          if not row.get('name') or not row.get('subcategory_name'):
-            raise ValueError("Missing required data (name or subcategory_name)")
-          if pd.isna(row['name']) or not str(row['name']).strip():
-            raise ValueError("Product name cannot be empty")
-          price = row.get('price')
-          if pd.isnull(price) or not isinstance(price, (int, float)) or price < 0:
-            raise ValueError("Invalid price")
-          discount = row.get('discount', 0.0)
-          if not isinstance(discount, (int, float)) or discount < 0 or discount > 100:
-            raise ValueError("Invalid discount (should be between 0 and 100)")
-          subcategory_name = row['subcategory_name']
-          subcategory = Subcategory.query.filter_by(name=subcategory_name).first()
-          if not subcategory:
-            raise ValueError(f"Subcategory '{subcategory_name}' does not exist")
-          name = row['name']
-          new_product = Product(
-                name=row['name'],
-                description=row.get('description', ''),
-                price=price,
-                subcategory_id=subcategory.id,
-                specifications=row.get('specifications', ''),
-                discount=discount
-            )
-          db.session.add(new_product)
-        except ValueError as e:
-          invalid_rows.append(f"Row {index + 1}: {str(e)}")
-          if invalid_rows:
-            for error in invalid_rows:
-              flash(error, "error")
-            return redirect(url_for('products.bulk_upload_form'))
-
+      chunk_size = current_app.config.get('BULK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
       try:
+        inserted, invalid_rows = import_products(df, chunk_size)
         db.session.commit()
       except Exception as e:
         db.session.rollback()
         flash(f"Database error: {e}", 'error')
         return redirect(url_for('products.bulk_upload_form'))
-      
+
+      if invalid_rows:
+        flash(f"Imported {inserted} products; {len(invalid_rows)} rows were skipped.", "error")
+        flash_row_errors(invalid_rows)
+        return redirect(url_for('products.bulk_upload_form'))
+
       return redirect(url_for('products.get_all_products'))
 
     except Exception as e:
         flash(f"Error processing file: {str(e)}", "error")
         return redirect(url_for('products.bulk_upload_form'))
 
+def stream_bulk_upload(file):
+    chunk_size = current_app.config.get('BULK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    def log_progress(summary):
+      current_app.logger.info("Bulk upload %s: %d rows processed, %d inserted, %d invalid",
+                              file.filename, summary["rows"], summary["inserted"], summary["invalid"])
+
+    try:
+      summary = import_products_stream(file, chunk_size, on_progress=log_progress)
+    except ValueError as e:
+      flash(f"Error: {e}", "error")
+      return redirect(url_for('products.bulk_upload_form'))
+    except Exception as e:
+      flash(f"Error processing file: {str(e)}", "error")
+      return redirect(url_for('products.bulk_upload_form'))
+
+    if summary["invalid"]:
+      flash(f"Imported {summary['inserted']} of {summary['rows']} rows; {summary['invalid']} rows were skipped.", "error")
+      flash_row_errors(summary["errors"])
+      return redirect(url_for('products.bulk_upload_form'))
+
+    return redirect(url_for('products.get_all_products'))
+
+def queue_bulk_upload(file):
+    chunk_size = current_app.config.get('BULK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    job_id = jobs.submit_upload('bulk_upload', file, partial(import_products_stream, chunk_size=chunk_size),
+                                suffix='.csv')
+    return jsonify({"job_id": job_id,
+                    "status_url": url_for('products.bulk_upload_status', job_id=job_id)}), 202
+
+@products_bp.route('/products/bulk_upload/<job_id>', methods=['GET'])
+def bulk_upload_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+      return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+def int_list(name):
+    values = []
+    for raw in request.args.getlist(name):
+        values += [int(value) for value in raw.split(',') if value]
+    return values
+
+def optional_float(name):
+    value = request.args.get(name)
+    return float(value) if value not in (None, '') else None
+
+BOOLEAN_ARGS = {'1': True, 'true': True, '0': False, 'false': False}
+
+def optional_bool(name):
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    if value not in BOOLEAN_ARGS:
+        raise ValueError(f"{name} must be one of {', '.join(BOOLEAN_ARGS)}")
+    return BOOLEAN_ARGS[value]
+
+@products_bp.route('/products/facets', methods=['GET'])
+@conditional('products', 'categories')
+def faceted_products():
+    try:
+        filters = FacetFilters(category_ids=int_list('category_id'),
+                               subcategory_ids=int_list('subcategory_id'),
+                               min_price=optional_float('min_price'),
+                               max_price=optional_float('max_price'),
+                               discounted=optional_bool('discounted'))
+        limit, after = parse_page_args()
+    except ValueError:
+        return jsonify({"error": "Invalid filter value"}), 400
+
+    query = filtered_products(product_query(), filters)
+    page, next_after = keyset_page(query, Product.id, limit or DEFAULT_PAGE_SIZE, after)
+    return jsonify({"products": [product_to_dict(product) for product in page],
+                    "next_after": next_after,
+                    "facets": facet_counts(filters)})
+
+@products_bp.route('/products/search', methods=['GET'])
+@conditional('products', 'categories')
+def search_products():
+    query = request.args.get('q', '').strip()
+    try:
+        # Search pages by offset; `after` belongs to the keyset endpoints.
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    if not query:
+        return jsonify({"error": "A search query (q) is required"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if offset < 0:
+        return jsonify({"error": "offset must not be negative"}), 400
+
+    # Fetch one extra hit to know whether another page exists.
+    hits = search_product_ids(query, limit + 1, offset)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    products = {p.id: p for p in product_query().filter(Product.id.in_([id for id, _ in hits]))}
+    results = []
+    for id, score in hits:
+        if id in products:
+            results.append(dict(product_to_dict(products[id]), score=score))
+    return jsonify({"products": results,
+                    "next_offset": offset + limit if has_more else None})
+
+@products_bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Repopulate the product full-text index from the product table."""
+    rebuild_search_index()
+    db.session.commit()
+    click.echo("Search index rebuilt.")
+
 @products_bp.route('/products/filter', methods=['GET'])
+@conditional('products', 'categories')
 def filter_products():
     category_id = request.args.get('category_id')
     subcategory_id = request.args.get('subcategory_id')
 
-    query = Product.query
+    query = product_query()
     if category_id:
-        query = query.join(Subcategory).filter(Subcategory.category_id == category_id)
+        query = query.filter(Product.subcategory.has(Subcategory.category_id == category_id))
     if subcategory_id:
-        query = Product.query.filter_by(subcategory_id=subcategory_id)
-
-    filtered_products = query.all()
-
-    filtered_data = []
-    for product in filtered_products:
-        filtered_data.append({
-            "id": product.id,
-            "name": product.name,
-            "description": product.description,
-            "price": product.price,
-            "category": product.subcategory.category.name,
-            "subcategory": product.subcategory.name,
-            "specifications": product.specifications,
-            "discount": product.discount
-        })
-
-    return jsonify({"products": filtered_data})
+        query = query.filter(Product.subcategory_id == subcategory_id)
+
+    try:
+        limit, after = parse_page_args()
+    except ValueError:
+        return jsonify({"error": "limit and after must be integers"}), 400
+
+    if wants_ndjson():
+        return stream_ndjson(query, Product.id, product_to_dict, after)
+
+    if limit is None:
+        filtered_products = query.order_by(Product.id).all()
+        filtered_data = [product_to_dict(product) for product in filtered_products]
+        return jsonify({"products": filtered_data})
+
+    page, next_after = keyset_page(query, Product.id, limit, after)
+    return jsonify({"products": [product_to_dict(product) for product in page],
+                    "next_after": next_after})
 
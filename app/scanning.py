@@ -0,0 +1,289 @@
+import io
+import os
+import queue
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+
+ScanResult = namedtuple('ScanResult', 'status detail')
+CLEAN, INFECTED, ERROR, SKIPPED = 'clean', 'infected', 'error', 'skipped'
+# What to do with uploads larger than clamd's StreamMaxLength.
+SEGMENTS, REJECT = 'segments', 'reject'
+
+class ScannerError(Exception):
+  pass
+
+class PendingScan:
+  """A scan running on the clamd pool.
+
+  The scan reads the caller's upload stream, so it must not outlive it:
+  result() cancels a scan that overruns its timeout, shuts down its clamd
+  connection and waits until the worker has stopped reading.
+  """
+
+  def __init__(self, executor, scan, stream, size, timeout):
+    self.timeout = timeout
+    self.cancelled = threading.Event()
+    self.conn = None
+    self.lock = threading.Lock()
+    self.future = executor.submit(scan, stream, size, self)
+
+  def attach(self, conn):
+    """Track the worker's connection so cancel() can interrupt it."""
+    with self.lock:
+      if self.cancelled.is_set():
+        raise ScannerError("scan cancelled")
+      self.conn = conn
+
+  def detach(self):
+    """Stop tracking the connection; False if it was cancelled meanwhile."""
+    with self.lock:
+      self.conn = None
+      return not self.cancelled.is_set()
+
+  def check(self):
+    if self.cancelled.is_set():
+      raise ScannerError("scan cancelled")
+
+  def cancel(self):
+    with self.lock:
+      self.cancelled.set()
+      if self.conn is not None:
+        try:
+          # Unblocks a worker waiting in sendall/recv; it then closes the socket.
+          self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+          pass
+    self.future.cancel()
+
+  def result(self):
+    try:
+      return self.future.result(timeout=self.timeout)
+    except TimeoutError:
+      self.cancel()
+      wait([self.future])
+      return ScanResult(ERROR, "scan timed out")
+
+def read_chunks(stream, chunk_size, start=0, end=None):
+  """Yield the stream's content from start to end without moving its position.
+
+  Positional reads let the scan run while another thread sniffs the same upload.
+  """
+  if isinstance(stream, tempfile.SpooledTemporaryFile):
+    stream = stream._file
+  if isinstance(stream, io.BytesIO):
+    with stream.getbuffer() as view:
+      end = len(view) if end is None else min(end, len(view))
+      for offset in range(start, end, chunk_size):
+        yield bytes(view[offset:min(offset + chunk_size, end)])
+    return
+  fd, offset = stream.fileno(), start
+  while end is None or offset < end:
+    chunk = os.pread(fd, chunk_size if end is None else min(chunk_size, end - offset), offset)
+    if not chunk:
+      return
+    offset += len(chunk)
+    yield chunk
+
+class CircuitBreaker:
+  """Stop calling clamd for reset_after seconds after `threshold` consecutive failures."""
+
+  def __init__(self, threshold, reset_after):
+    self.threshold = threshold
+    self.reset_after = reset_after
+    self.failures = 0
+    self.opened_at = None
+    self.lock = threading.Lock()
+
+  def allow(self):
+    with self.lock:
+      if self.opened_at is None:
+        return True
+      if time.monotonic() - self.opened_at >= self.reset_after:
+        # Half-open: let this call through as a probe.
+        self.opened_at = time.monotonic()
+        return True
+      return False
+
+  def record(self, ok):
+    with self.lock:
+      if ok:
+        self.failures = 0
+        self.opened_at = None
+      else:
+        self.failures += 1
+        if self.failures >= self.threshold:
+          self.opened_at = time.monotonic()
+
+class ClamdScanner:
+  """INSTREAM scans over a pool of persistent clamd IDSESSION connections.
+
+  clamd refuses streams over its StreamMaxLength (max_stream here). With the
+  'segments' oversize policy larger uploads are sent as overlapping windows
+  of max_stream bytes, one INSTREAM each, so a signature up to
+  segment_overlap bytes long is always seen whole; 'reject' skips them.
+  """
+
+  def __init__(self, address, pool_size=4, timeout=10.0, max_stream=25*1024*1024, oversize=SEGMENTS,
+               segment_overlap=1024*1024, chunk_size=64*1024, failure_threshold=5, reset_after=30.0):
+    if oversize not in (SEGMENTS, REJECT):
+      raise ValueError(f"Unknown oversize policy {oversize!r}; use {SEGMENTS!r} or {REJECT!r}")
+    self.address = address
+    self.timeout = timeout
+    self.max_stream = max_stream
+    self.oversize = oversize
+    self.segment_overlap = min(segment_overlap, max_stream // 2)
+    self.chunk_size = chunk_size
+    self.idle = queue.LifoQueue()
+    self.breaker = CircuitBreaker(failure_threshold, reset_after)
+    self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='clamd')
+
+  def _connect(self, pending):
+    if isinstance(self.address, str):
+      conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+      conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    conn.settimeout(self.timeout)
+    try:
+      pending.attach(conn)
+      conn.connect(self.address)
+      conn.sendall(b'zIDSESSION\0')
+    except (OSError, ScannerError):
+      conn.close()
+      raise
+    return conn
+
+  def _reply(self, conn):
+    data = b''
+    while not data.endswith(b'\0'):
+      chunk = conn.recv(4096)
+      if not chunk:
+        raise ScannerError("clamd closed the connection")
+      data += chunk
+    # Session replies are prefixed with the request id: "<id>: stream: OK".
+    return data[:-1].decode(errors='replace').split(': ', 1)[-1]
+
+  def _instream(self, conn, stream, pending, start, end):
+    conn.sendall(b'zINSTREAM\0')
+    for chunk in read_chunks(stream, self.chunk_size, start, end):
+      pending.check()
+      conn.sendall(struct.pack('!L', len(chunk)) + chunk)
+    conn.sendall(struct.pack('!L', 0))
+    return self._reply(conn)
+
+  def _scan_once(self, stream, pending, start, end):
+    try:
+      conn, reused = self.idle.get_nowait(), True
+      pending.attach(conn)
+    except queue.Empty:
+      conn, reused = self._connect(pending), False
+    except ScannerError:
+      conn.close()
+      raise
+    try:
+      reply = self._instream(conn, stream, pending, start, end)
+    except (OSError, ScannerError):
+      conn.close()
+      if not reused or pending.cancelled.is_set():
+        raise
+      # clamd drops idle sessions; retry once on a fresh connection.
+      conn = self._connect(pending)
+      try:
+        reply = self._instream(conn, stream, pending, start, end)
+      except BaseException:
+        conn.close()
+        raise
+    except BaseException:
+      conn.close()
+      raise
+    if pending.detach():
+      self.idle.put(conn)
+    else:
+      conn.close()
+    return reply
+
+  def segments(self, size):
+    """(start, end) byte ranges of the INSTREAM calls that cover an upload of size bytes."""
+    if size <= self.max_stream:
+      return [(0, size)]
+    step = self.max_stream - self.segment_overlap
+    return [(start, min(start + self.max_stream, size)) for start in range(0, size - self.segment_overlap, step)]
+
+  def scan(self, stream, size, pending):
+    if size > self.max_stream and self.oversize == REJECT:
+      return ScanResult(SKIPPED, f"larger than {self.max_stream} bytes")
+    if not self.breaker.allow():
+      return ScanResult(ERROR, "scanner unavailable")
+    try:
+      for start, end in self.segments(size):
+        reply = self._scan_once(stream, pending, start, end)
+        if not reply.endswith('OK'):
+          break
+    except (OSError, ScannerError) as e:
+      self.breaker.record(False)
+      return ScanResult(ERROR, str(e))
+    self.breaker.record(True)
+    if reply.endswith('FOUND'):
+      return ScanResult(INFECTED, reply[len('stream: '):-len(' FOUND')])
+    if reply.endswith('OK'):
+      return ScanResult(CLEAN, None)
+    return ScanResult(ERROR, reply)
+
+  def submit(self, stream, size):
+    timeout = self.timeout * 2 * len(self.segments(size))
+    return PendingScan(self.executor, self.scan, stream, size, timeout=timeout)
+
+class Scanner:
+  """Flask extension around ClamdScanner; scanning is off unless CLAMD_ADDRESS is set.
+
+  CLAMD_ADDRESS is 'host:port' or the path of clamd's unix socket.
+  """
+
+  def __init__(self, app=None):
+    self.clamd = None
+    self.fail_open = False
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    address = app.config.get('CLAMD_ADDRESS')
+    if address and not address.startswith('/'):
+      host, port = address.rsplit(':', 1)
+      address = (host, int(port))
+    self.clamd = None
+    if address:
+      self.clamd = ClamdScanner(address,
+                                pool_size=app.config.get('CLAMD_POOL_SIZE', 4),
+                                timeout=app.config.get('CLAMD_TIMEOUT', 10.0),
+                                max_stream=app.config.get('CLAMD_MAX_STREAM', 25*1024*1024),
+                                oversize=app.config.get('CLAMD_OVERSIZE', SEGMENTS))
+    self.fail_open = app.config.get('CLAMD_FAIL_OPEN', False)
+    app.extensions['scanner'] = self
+
+  def submit(self, stream, size):
+    """Start scanning in the background; returns a PendingScan, or None if scanning is off."""
+    if self.clamd is None:
+      return None
+    return self.clamd.submit(stream, size)
+
+  def verdict(self, scan):
+    """Turn a PendingScan into the (valid, message) pair the validators return."""
+    if scan is None:
+      return True, None
+    try:
+      result = scan.result()
+    except Exception as e:
+      result = ScanResult(ERROR, str(e))
+    if result.status == INFECTED:
+      return False, "Virus detected."
+    # Unscanned is not clean. Oversize uploads are skipped only under the
+    # 'reject' policy, which is not an outage, so failing open does not apply.
+    if result.status == SKIPPED:
+      return False, f"File is too large to scan ({result.detail})."
+    if result.status == ERROR and not self.fail_open:
+      return None, f"Error scanning file: {result.detail}"
+    return True, None
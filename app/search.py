@@ -0,0 +1,65 @@
+import re
+from sqlalchemy import DDL, event, text
+from app import db
+from app.models import Product
+
+# External-content FTS5 index over product text. The triggers keep it in step
+# with every write to product, including the bulk importer's Core inserts.
+FTS_DDL = [
+  """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+       name, description, specifications,
+       content='product', content_rowid='id',
+       tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+  """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+       INSERT INTO product_fts(rowid, name, description, specifications)
+       VALUES (new.id, new.name, new.description, new.specifications);
+     END""",
+  """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+       INSERT INTO product_fts(product_fts, rowid, name, description, specifications)
+       VALUES ('delete', old.id, old.name, old.description, old.specifications);
+     END""",
+  """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description, specifications ON product BEGIN
+       INSERT INTO product_fts(product_fts, rowid, name, description, specifications)
+       VALUES ('delete', old.id, old.name, old.description, old.specifications);
+       INSERT INTO product_fts(rowid, name, description, specifications)
+       VALUES (new.id, new.name, new.description, new.specifications);
+     END""",
+]
+# bm25 column weights for name, description and specifications.
+RANKING = "bm25(product_fts, 10.0, 2.0, 1.0)"
+
+for statement in FTS_DDL:
+  event.listen(Product.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+def match_expression(query):
+  """Turn free text into an FTS5 query: every word must match, each as a prefix."""
+  terms = re.findall(r'\w+', query)
+  return ' AND '.join('"%s"*' % term for term in terms)
+
+def like_pattern(value):
+  """Match `value` literally anywhere: LIKE wildcards in user input are escaped."""
+  escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+  return f"%{escaped}%"
+
+def scan_product_ids(query, limit, offset=0):
+  rows = db.session.query(Product.id).filter(Product.name.ilike(like_pattern(query), escape='\\')) \
+    .order_by(Product.id).limit(limit).offset(offset).all()
+  return [(id, None) for (id,) in rows]
+
+def search_product_ids(query, limit, offset=0):
+  """Return [(product_id, score)] best match first; lower bm25 scores rank higher."""
+  expression = match_expression(query)
+  if not expression:
+    return []
+  if db.session.get_bind(mapper=Product.__mapper__).dialect.name != 'sqlite':
+    # No FTS5 outside SQLite; keep the endpoint usable with a plain scan.
+    return scan_product_ids(query, limit, offset)
+  rows = db.session.execute(text(
+    f"SELECT rowid, {RANKING} AS score FROM product_fts WHERE product_fts MATCH :expression "
+    # rowid breaks ties so equal scores page in a stable order.
+    f"ORDER BY score, rowid LIMIT :limit OFFSET :offset"),
+    {"expression": expression, "limit": limit, "offset": offset})
+  return [(row.rowid, row.score) for row in rows]
+
+def rebuild_search_index():
+  db.session.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
@@ -0,0 +1,18 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+DIALECT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def dialect_insert(model):
+  """insert() for model's table from the dialect module, so ON CONFLICT is available."""
+  dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+  if dialect not in DIALECT_INSERTS:
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
+  return DIALECT_INSERTS[dialect](model.__table__)
+
+def increment_statement(model, key_columns, column):
+  """INSERT ... ON CONFLICT (key_columns) DO UPDATE SET column = column + excluded.column."""
+  table = model.__table__
+  stmt = dialect_insert(model)
+  return stmt.on_conflict_do_update(index_elements=[table.c[key] for key in key_columns],
+                                    set_={column: table.c[column] + stmt.excluded[column]})
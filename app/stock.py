@@ -0,0 +1,192 @@
+from collections import defaultdict
+from sqlalchemy import bindparam
+from app import db
+from app.allocation import StockIndex
+from app.models import Category, CategoryStock, Inventory, Product, ProductStock, Subcategory, Warehouse
+from app.sql import increment_statement
+from app.versions import bump_versions
+
+def upsert_statement():
+  return increment_statement(Inventory, ['product_id', 'warehouse_id'], 'quantity')
+
+def merge_adjustments(adjustments):
+  # One row per (product, warehouse): Postgres refuses to touch the same
+  # row twice in a single upsert, and it saves work on SQLite as well.
+  totals = defaultdict(int)
+  for product_id, warehouse_id, delta in adjustments:
+    totals[(product_id, warehouse_id)] += delta
+  return [{"product_id": product_id, "warehouse_id": warehouse_id, "quantity": delta}
+          for (product_id, warehouse_id), delta in totals.items()]
+
+def unknown_ids(adjustments):
+  """Return (product_ids, warehouse_ids) referenced by adjustments that do not exist."""
+  product_ids = {product_id for product_id, _, _ in adjustments}
+  warehouse_ids = {warehouse_id for _, warehouse_id, _ in adjustments}
+  known_products = {id for (id,) in db.session.query(Product.id).filter(Product.id.in_(product_ids))}
+  known_warehouses = {id for (id,) in db.session.query(Warehouse.id).filter(Warehouse.id.in_(warehouse_ids))}
+  return product_ids - known_products, warehouse_ids - known_warehouses
+
+def product_categories(product_ids):
+  rows = db.session.query(Product.id, Subcategory.category_id) \
+    .join(Subcategory, Product.subcategory_id == Subcategory.id) \
+    .filter(Product.id.in_(product_ids)).all()
+  return dict(rows)
+
+def apply_summary_deltas(product_deltas):
+  """Add {product_id: delta} to the product and category stock totals."""
+  product_deltas = {product_id: delta for product_id, delta in product_deltas.items() if delta}
+  if not product_deltas:
+    return
+  db.session.execute(increment_statement(ProductStock, ['product_id'], 'total_stock'),
+                     [{"product_id": product_id, "total_stock": delta} for product_id, delta in product_deltas.items()])
+
+  category_deltas = defaultdict(int)
+  for product_id, category_id in product_categories(list(product_deltas)).items():
+    category_deltas[category_id] += product_deltas[product_id]
+  category_deltas = {category_id: delta for category_id, delta in category_deltas.items() if delta}
+  if category_deltas:
+    db.session.execute(increment_statement(CategoryStock, ['category_id'], 'total_stock'),
+                       [{"category_id": category_id, "total_stock": delta} for category_id, delta in category_deltas.items()])
+
+def adjust_stock(adjustments):
+  """Apply (product_id, warehouse_id, delta) adjustments atomically in the current transaction.
+
+  Missing inventory rows are created with quantity = delta and the stock
+  summaries are updated alongside. The caller commits.
+  """
+  rows = merge_adjustments(adjustments)
+  if rows:
+    db.session.execute(upsert_statement(), rows)
+    bump_versions('inventory')
+    product_deltas = defaultdict(int)
+    for row in rows:
+      product_deltas[row["product_id"]] += row["quantity"]
+    apply_summary_deltas(product_deltas)
+  return len(rows)
+
+class InsufficientStock(Exception):
+  """Raised when stock cannot cover a reservation.
+
+  `conflict` is True when the plan was valid but a concurrent writer took the
+  stock first, so retrying in a fresh transaction may succeed.
+  """
+
+  def __init__(self, product_ids, conflict=False):
+    super().__init__(f"Insufficient stock for products {sorted(product_ids)}")
+    self.product_ids = product_ids
+    self.conflict = conflict
+
+def plan_reservations(demand, near=None):
+  """Split {product_id: quantity} across warehouses with the allocator.
+
+  Returns [(product_id, warehouse_id, take)]; raises InsufficientStock naming
+  every product that cannot be covered.
+  """
+  allocation = StockIndex.load(demand).plan(demand, near)
+  if allocation.short:
+    raise InsufficientStock(allocation.short)
+  return allocation.picks
+
+def reserve_stock(demand, near=None):
+  """Take {product_id: quantity} out of inventory in the current transaction.
+
+  Every decrement is conditional on the row still holding enough stock, so
+  concurrent reservations can never drive a quantity below zero; if any of
+  them loses that race the whole reservation raises InsufficientStock and
+  the caller must roll back. Returns the executed plan.
+  """
+  plan = plan_reservations(demand, near)
+  if not plan:
+    return plan
+  table = Inventory.__table__
+  decrement = table.update() \
+    .where(table.c.product_id == bindparam('p_id'), table.c.warehouse_id == bindparam('w_id'),
+           table.c.quantity >= bindparam('take')) \
+    .values(quantity=table.c.quantity - bindparam('take'))
+  rows = [{"p_id": product_id, "w_id": warehouse_id, "take": take} for product_id, warehouse_id, take in plan]
+  if db.session.get_bind(mapper=Inventory.__mapper__, clause=decrement).dialect.supports_sane_multi_rowcount:
+    updated = db.session.execute(decrement, rows).rowcount
+  else:
+    # The driver cannot total an executemany's rowcount (psycopg2, for one),
+    # so decrement row by row where each rowcount is exact.
+    updated = sum(db.session.execute(decrement, row).rowcount for row in rows)
+  if updated != len(plan):
+    raise InsufficientStock(set(demand), conflict=True)
+  apply_summary_deltas({product_id: -quantity for product_id, quantity in demand.items()})
+  bump_versions('inventory')
+  return plan
+
+def clear_stock(product_id=None, warehouse_id=None):
+  """Delete the matching inventory rows and take their quantities off the summaries."""
+  query = Inventory.query
+  if product_id is not None:
+    query = query.filter(Inventory.product_id == product_id)
+  if warehouse_id is not None:
+    query = query.filter(Inventory.warehouse_id == warehouse_id)
+  removed = dict(query.with_entities(Inventory.product_id, db.func.sum(Inventory.quantity))
+                 .group_by(Inventory.product_id).all())
+  apply_summary_deltas({id: -quantity for id, quantity in removed.items()})
+  query.delete(synchronize_session=False)
+  bump_versions('inventory')
+  if product_id is not None and warehouse_id is None:
+    ProductStock.query.filter_by(product_id=product_id).delete()
+
+def move_category_stock(product_id, old_subcategory_id, new_subcategory_id):
+  """Shift a product's stock between category totals when its subcategory changes."""
+  if old_subcategory_id == new_subcategory_id:
+    return
+  stock = db.session.query(ProductStock.total_stock).filter_by(product_id=product_id).scalar()
+  if not stock:
+    return
+  categories = dict(db.session.query(Subcategory.id, Subcategory.category_id)
+                    .filter(Subcategory.id.in_([old_subcategory_id, new_subcategory_id])).all())
+  old_category, new_category = categories.get(old_subcategory_id), categories.get(new_subcategory_id)
+  if old_category == new_category:
+    return
+  deltas = []
+  if old_category is not None:
+    deltas.append({"category_id": old_category, "total_stock": -stock})
+  if new_category is not None:
+    deltas.append({"category_id": new_category, "total_stock": stock})
+  db.session.execute(increment_statement(CategoryStock, ['category_id'], 'total_stock'), deltas)
+
+def rebuild_stock_summary():
+  """Recompute both summary tables from Inventory in the current transaction."""
+  ProductStock.query.delete()
+  CategoryStock.query.delete()
+  db.session.execute(ProductStock.__table__.insert().from_select(
+    ['product_id', 'total_stock'],
+    db.select(Inventory.product_id, db.func.sum(Inventory.quantity)).group_by(Inventory.product_id)))
+  db.session.execute(CategoryStock.__table__.insert().from_select(
+    ['category_id', 'total_stock'],
+    db.select(Subcategory.category_id, db.func.sum(Inventory.quantity))
+      .select_from(Inventory)
+      .join(Product, Inventory.product_id == Product.id)
+      .join(Subcategory, Product.subcategory_id == Subcategory.id)
+      .group_by(Subcategory.category_id)))
+
+def stock_summary_drift():
+  """Return (product_ids, category_ids) whose stored totals disagree with Inventory."""
+  actual_products = dict(db.session.query(Inventory.product_id, db.func.sum(Inventory.quantity))
+                         .group_by(Inventory.product_id).all())
+  stored_products = dict(db.session.query(ProductStock.product_id, ProductStock.total_stock).all())
+  actual_categories = dict(db.session.query(Subcategory.category_id, db.func.sum(Inventory.quantity))
+                           .select_from(Inventory)
+                           .join(Product, Inventory.product_id == Product.id)
+                           .join(Subcategory, Product.subcategory_id == Subcategory.id)
+                           .group_by(Subcategory.category_id).all())
+  stored_categories = dict(db.session.query(CategoryStock.category_id, CategoryStock.total_stock).all())
+
+  def differing(actual, stored):
+    return sorted(key for key in actual.keys() | stored.keys() if actual.get(key, 0) != stored.get(key, 0))
+
+  return differing(actual_products, stored_products), differing(actual_categories, stored_categories)
+
+def stock_report(top_n=5):
+  category_summary = db.session.query(Category.name, CategoryStock.total_stock) \
+    .join(CategoryStock, CategoryStock.category_id == Category.id).all()
+  top_products = db.session.query(Product.name, ProductStock.total_stock) \
+    .join(ProductStock, ProductStock.product_id == Product.id) \
+    .order_by(ProductStock.total_stock.desc()).limit(top_n).all()
+  return {"category_summary": [{"category": name, "total_stock": total} for name, total in category_summary],
+          "top_products": [{"product": name, "stock": total} for name, total in top_products]}
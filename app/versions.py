@@ -0,0 +1,111 @@
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, make_response, request, session
+from sqlalchemy import event
+from app import db
+from app.models import ResourceVersion
+from app.replicas import RoutingSession
+from app.sql import dialect_insert
+
+# Resource names bumped by the write paths:
+#   products    - product rows (add, update, delete, bulk upload)
+#   inventory   - inventory quantities (app.stock)
+#   categories  - categories and subcategories
+#   warehouses  - warehouse rows
+
+def bump_versions(*resources):
+  """Bump the version of each resource once the current transaction commits.
+
+  The bump runs afterwards in its own short transaction, so writers do not
+  hold the shared resource_version rows (and queue behind each other on
+  them) for the length of their own transaction. In the moment between the
+  two commits a client may still revalidate its old copy; nobody can cache
+  a new version number against old data.
+  """
+  db.session.info.setdefault('bump_versions', set()).update(resources)
+
+def write_versions(engine, resources):
+  table = ResourceVersion.__table__
+  stmt = dialect_insert(ResourceVersion)
+  stmt = stmt.on_conflict_do_update(index_elements=[table.c.name],
+                                    set_={'version': table.c.version + 1,
+                                          'updated_at': stmt.excluded.updated_at})
+  now = datetime.utcnow()
+  with engine.begin() as conn:
+    conn.execute(stmt, [{"name": name, "version": 1, "updated_at": now} for name in sorted(resources)])
+
+@event.listens_for(RoutingSession, 'after_commit')
+def bump_committed_versions(session):
+  resources = session.info.pop('bump_versions', None)
+  if not resources:
+    return
+  try:
+    write_versions(session._db.engine, resources)
+  except Exception:
+    # The data is committed; a missed bump only delays revalidation until
+    # the next write to the same resource.
+    current_app.logger.exception("Could not bump versions of %s", ', '.join(sorted(resources)))
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def discard_versions(session):
+  session.info.pop('bump_versions', None)
+
+def current_versions(resources):
+  rows = db.session.query(ResourceVersion).filter(ResourceVersion.name.in_(resources)).all()
+  return {row.name: (row.version, row.updated_at) for row in rows}
+
+def whole_second_last_modified(updated_at):
+  """Last-Modified for updated_at, or None while its second is still running.
+
+  HTTP dates have whole-second resolution, so a write later in the same
+  second would carry the same Last-Modified and If-Modified-Since would
+  revalidate the stale copy. Until the second is over only the ETag counts.
+  """
+  second = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+  if second + timedelta(seconds=1) > datetime.now(timezone.utc):
+    return None
+  return second
+
+def conditional(*resources, per_session=False):
+  """Answer If-None-Match / If-Modified-Since with 304 before running the view.
+
+  The strong ETag covers the endpoint, its query string and the versions of
+  resources. Pages that embed a CSRF token pass per_session=True so one
+  session's cached page is never revalidated for another.
+  """
+  def decorator(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+      versions = current_versions(resources)
+      parts = [request.endpoint, request.full_path]
+      parts += [f"{name}:{versions.get(name, (0, None))[0]}" for name in resources]
+      if per_session:
+        # The embedded token expires after WTF_CSRF_TIME_LIMIT, so the page
+        # must not be revalidated past that window either.
+        time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+        parts.append(str(session.get('csrf_token')))
+        parts.append(str(int(time.time() // time_limit)) if time_limit else '')
+      etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+      timestamps = [updated_at for _, updated_at in versions.values()]
+      last_modified = whole_second_last_modified(max(timestamps)) if timestamps else None
+
+      if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+      else:
+        not_modified = (last_modified is not None and request.if_modified_since is not None
+                        and last_modified <= request.if_modified_since)
+      if not_modified:
+        response = current_app.response_class(status=304)
+      else:
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+          return response
+      response.set_etag(etag)
+      if last_modified is not None:
+        response.last_modified = last_modified
+      response.cache_control.no_cache = True
+      return response
+    return wrapper
+  return decorator
@@ -0,0 +1,61 @@
+"""Time batch warehouse allocation against an in-memory stock index.
+
+Builds a synthetic index (50 warehouses, 20k products by default), then
+allocates 100k random orders with greedy min-splits and again nearest-first
+from a random ship-to location, reporting throughput, fill rate and how many
+warehouses an average order ships from. No database is involved: this is
+the cost of the decision itself, which is what runs at checkout.
+
+    python -m benchmarks.bench_allocation --orders 100000 --warehouses 50
+"""
+import argparse
+import random
+import time
+
+from app.allocation import StockIndex
+
+def build_index(rng, args):
+    locations = {w: f"City {w % args.cities}" for w in range(1, args.warehouses + 1)}
+    stock = {}
+    for p in range(1, args.products + 1):
+        # Most products sit in a handful of warehouses, like real assortments.
+        holders = rng.sample(range(1, args.warehouses + 1), rng.randint(1, min(args.warehouses, 10)))
+        stock[p] = {w: rng.randint(1, args.max_stock) for w in holders}
+    return stock, locations
+
+def make_orders(rng, args):
+    return [{rng.randint(1, args.products): rng.randint(1, 3) for _ in range(rng.randint(1, args.max_lines))}
+            for _ in range(args.orders)]
+
+def run(label, stock, locations, orders, ship_to):
+    index = StockIndex(stock, locations)
+    started = time.perf_counter()
+    results = index.allocate_batch(orders, ship_to)
+    elapsed = time.perf_counter() - started
+    filled = [result for result in results if not result.short]
+    shipments = [len({warehouse_id for _, warehouse_id, _ in result.picks}) for result in filled]
+    print(f"{label:<16}{elapsed:>10.2f}{len(orders) / elapsed:>14,.0f}{elapsed / len(orders) * 1e6:>12.1f}"
+          f"{len(filled) / len(orders):>9.1%}{sum(shipments) / max(len(shipments), 1):>12.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--warehouses', type=int, default=50)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--cities', type=int, default=20)
+    parser.add_argument('--max-lines', type=int, default=4)
+    parser.add_argument('--max-stock', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=503)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stock, locations = build_index(rng, args)
+    orders = make_orders(rng, args)
+    ship_to = [f"City {rng.randrange(args.cities)}" for _ in orders]
+
+    print(f"{'strategy':<16}{'seconds':>10}{'orders/s':>14}{'us/order':>12}{'filled':>9}{'warehouses':>12}")
+    run("min-splits", stock, locations, orders, None)
+    run("nearest-first", stock, locations, orders, ship_to)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Time the hot filter queries with and without the model indexes.
+
+Seeds a throwaway SQLite database (1M inventory rows by default), runs each
+query against the bare tables, creates the indexes declared in app/models.py
+and runs them again.
+
+    python -m benchmarks.bench_indexes --products 20000 --warehouses 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from app import db
+from app import models  # noqa: F401  (registers the tables on db.metadata)
+
+QUERIES = {
+    "inventory by product": ("SELECT id, quantity FROM inventory WHERE product_id = :product_id", "product_id"),
+    "inventory by product+warehouse": ("SELECT id, quantity FROM inventory WHERE product_id = :product_id AND warehouse_id = :warehouse_id", "pair"),
+    "inventory count by warehouse": ("SELECT COUNT(*) FROM inventory WHERE warehouse_id = :warehouse_id", "warehouse_id"),
+    "products by subcategory": ("SELECT id FROM product WHERE subcategory_id = :subcategory_id", "subcategory_id"),
+    "subcategory by name": ("SELECT id FROM subcategory WHERE name = :name", "name"),
+    "orders by customer": ("SELECT id, status, total_price FROM orders WHERE customer_id = :customer_id", "customer_id"),
+    "orders count by status": ("SELECT COUNT(*) FROM orders WHERE status = :status", "status"),
+}
+STATUSES = ['pending', 'shipped', 'delivered', 'returned', 'cancelled']
+
+def seed(engine, args):
+    rng = random.Random(args.seed)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO category (id, name) VALUES (1, 'Instruments')"))
+        conn.execute(text("INSERT INTO subcategory (id, name, category_id) VALUES (:id, :name, 1)"),
+                     [{"id": i, "name": f"Subcategory {i}"} for i in range(1, args.subcategories + 1)])
+        conn.execute(text("INSERT INTO warehouse (id, location) VALUES (:id, :location)"),
+                     [{"id": i, "location": f"Warehouse {i}"} for i in range(1, args.warehouses + 1)])
+        conn.execute(text("INSERT INTO product (id, name, price, subcategory_id, discount) VALUES (:id, :name, :price, :subcategory_id, 0)"),
+                     [{"id": i, "name": f"Product {i}", "price": rng.uniform(5, 5000),
+                       "subcategory_id": rng.randint(1, args.subcategories)} for i in range(1, args.products + 1)])
+        conn.execute(text("INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (:p, :w, :q)"),
+                     [{"p": p, "w": w, "q": rng.randint(0, 500)}
+                      for p in range(1, args.products + 1) for w in range(1, args.warehouses + 1)])
+        conn.execute(text("INSERT INTO customers (id, name, email, membership_tier) VALUES (:id, :name, :email, 'Standard')"),
+                     [{"id": i, "name": f"Customer {i}", "email": f"c{i}@example.com"} for i in range(1, args.customers + 1)])
+        conn.execute(text("INSERT INTO orders (customer_id, product_id, status, quantity, total_price) VALUES (:c, :p, :s, 1, 10.0)"),
+                     [{"c": rng.randint(1, args.customers), "p": rng.randint(1, args.products), "s": rng.choice(STATUSES)}
+                      for _ in range(args.orders)])
+
+def params_for(kind, rng, args):
+    if kind == "pair":
+        return {"product_id": rng.randint(1, args.products), "warehouse_id": rng.randint(1, args.warehouses)}
+    if kind == "product_id":
+        return {"product_id": rng.randint(1, args.products)}
+    if kind == "warehouse_id":
+        return {"warehouse_id": rng.randint(1, args.warehouses)}
+    if kind == "subcategory_id":
+        return {"subcategory_id": rng.randint(1, args.subcategories)}
+    if kind == "name":
+        return {"name": f"Subcategory {rng.randint(1, args.subcategories)}"}
+    if kind == "customer_id":
+        return {"customer_id": rng.randint(1, args.customers)}
+    return {"status": rng.choice(STATUSES)}
+
+def run_queries(engine, args):
+    rng = random.Random(args.seed)
+    timings = {}
+    with engine.connect() as conn:
+        for label, (sql, kind) in QUERIES.items():
+            statement = text(sql)
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                conn.execute(statement, params_for(kind, rng, args)).all()
+            timings[label] = (time.perf_counter() - started) / args.repeat * 1000
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--warehouses', type=int, default=50)
+    parser.add_argument('--subcategories', type=int, default=200)
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=503)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{path}')
+    try:
+        tables = db.metadata.sorted_tables
+        indexes = [index for table in tables for index in table.indexes]
+        db.metadata.create_all(engine)
+        for index in indexes:
+            index.drop(engine)
+
+        print(f"Seeding {args.products * args.warehouses:,} inventory rows ...")
+        seed(engine, args)
+        before = run_queries(engine, args)
+        for index in indexes:
+            index.create(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        after = run_queries(engine, args)
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+    print(f"{'query':<34}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for label in QUERIES:
+        print(f"{label:<34}{before[label]:>12.3f}{after[label]:>12.3f}{before[label] / after[label]:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
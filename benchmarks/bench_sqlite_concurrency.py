@@ -0,0 +1,124 @@
+"""Mixed read/write throughput under each SQLite profile.
+
+For every profile in common/sqlite_tuning.py this seeds a fresh database, then
+runs N reader threads (GET /inventory/filter, GET /customers/<id>/summary)
+and M writer threads (POST /inventory/adjust, POST /orders/batch) against
+the app through the Flask test client for a fixed time, and reports
+requests per second, p95 latency and failed requests per side.
+
+    python -m benchmarks.bench_sqlite_concurrency --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.models import Category, Customer, Inventory, Order, Product, Subcategory, Warehouse
+from common.sqlite_tuning import PROFILES
+from config import Config
+
+def make_config(profile, directory):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, f'{profile}.db')}"
+        SQLITE_PROFILE = profile
+        JOB_DATABASE_PATH = os.path.join(directory, f'{profile}-jobs.db')
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+    return BenchConfig
+
+def seed(app, args):
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Category), [{"id": 1, "name": "Instruments"}])
+        db.session.execute(insert(Subcategory), [{"id": 1, "name": "Guitars", "category_id": 1}])
+        db.session.execute(insert(Warehouse), [{"id": w, "location": f"Warehouse {w}"} for w in range(1, args.warehouses + 1)])
+        db.session.execute(insert(Product), [{"id": p, "name": f"Product {p}", "price": rng.uniform(5, 500),
+                                              "subcategory_id": 1, "discount": 0} for p in range(1, args.products + 1)])
+        db.session.execute(insert(Inventory), [{"product_id": p, "warehouse_id": w, "quantity": 10 ** 6}
+                                               for p in range(1, args.products + 1) for w in range(1, args.warehouses + 1)])
+        db.session.execute(insert(Customer), [{"id": c, "name": f"Customer {c}", "email": f"c{c}@example.com"}
+                                              for c in range(1, args.customers + 1)])
+        db.session.execute(insert(Order), [{"customer_id": rng.randint(1, args.customers), "product_id": rng.randint(1, args.products),
+                                            "status": "delivered", "quantity": 1, "total_price": 10.0} for _ in range(args.orders)])
+        db.session.commit()
+
+def read_request(client, rng, args):
+    if rng.random() < 0.5:
+        return client.get(f"/inventory/filter?product_id={rng.randint(1, args.products)}&limit=50")
+    return client.get(f"/customers/{rng.randint(1, args.customers)}/summary")
+
+def write_request(client, rng, args):
+    if rng.random() < 0.5:
+        return client.post('/inventory/adjust', json={"adjustments": [
+            {"product_id": rng.randint(1, args.products), "warehouse_id": rng.randint(1, args.warehouses), "delta": rng.randint(1, 5)}]})
+    return client.post('/orders/batch', json={"customer_id": rng.randint(1, args.customers), "lines": [
+        {"product_id": rng.randint(1, args.products), "quantity": 1}]})
+
+def worker(app, request, args, seed, deadline, results):
+    rng = random.Random(seed)
+    client = app.test_client()
+    latencies, failures = [], 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            failed = request(client, rng, args).status_code >= 500
+        except Exception:
+            failed = True
+        latencies.append(time.perf_counter() - started)
+        failures += failed
+    results.append((latencies, failures))
+
+def run(profile, directory, args):
+    app = create_app(make_config(profile, directory))
+    seed(app, args)
+    reads, writes = [], []
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=worker, args=(app, read_request, args, i, deadline, reads)) for i in range(args.readers)]
+    threads += [threading.Thread(target=worker, args=(app, write_request, args, 1000 + i, deadline, writes)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        db.engine.dispose()
+    return summarize(reads, args.seconds), summarize(writes, args.seconds)
+
+def summarize(results, seconds):
+    latencies = sorted(latency for thread_latencies, _ in results for latency in thread_latencies)
+    failures = sum(failed for _, failed in results)
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float('nan')
+    return len(latencies) / seconds, p95, failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--warehouses', type=int, default=10)
+    parser.add_argument('--customers', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=503)
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        rows = [(profile, *run(profile, directory, args)) for profile in args.profiles]
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    print(f"{'profile':<12}{'reads/s':>10}{'read p95 ms':>13}{'read fails':>12}{'writes/s':>10}{'write p95 ms':>14}{'write fails':>13}")
+    for profile, (read_rate, read_p95, read_fails), (write_rate, write_p95, write_fails) in rows:
+        print(f"{profile:<12}{read_rate:>10.0f}{read_p95:>13.1f}{read_fails:>12}{write_rate:>10.0f}{write_p95:>14.1f}{write_fails:>13}")
+
+if __name__ == '__main__':
+    main()
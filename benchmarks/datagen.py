@@ -0,0 +1,107 @@
+"""Deterministic synthetic data for the load tests.
+
+Rows are generated lazily and written with executemany INSERTs in chunks,
+one transaction per chunk, so even the 'full' scale (1M products, 10M
+inventory rows) never holds more than one chunk in memory. The same seed
+always produces the same database.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+SCALES = {
+    'small': {'categories': 5, 'subcategories': 25, 'products': 2000, 'warehouses': 10,
+              'inventory': 10000, 'customers': 1000, 'orders': 20000, 'service_orders': 20000},
+    'medium': {'categories': 10, 'subcategories': 100, 'products': 100000, 'warehouses': 50,
+               'inventory': 1000000, 'customers': 20000, 'orders': 500000, 'service_orders': 500000},
+    'full': {'categories': 20, 'subcategories': 400, 'products': 1000000, 'warehouses': 50,
+             'inventory': 10000000, 'customers': 100000, 'orders': 2000000, 'service_orders': 2000000},
+}
+CHUNK_SIZE = 50000
+NOUNS = ['Guitar', 'Bass', 'Drum Kit', 'Piano', 'Violin', 'Synthesizer', 'Amplifier', 'Cello', 'Flute', 'Saxophone',
+         'Trumpet', 'Ukulele', 'Mandolin', 'Banjo', 'Clarinet', 'Harmonica', 'Keyboard', 'Microphone', 'Pedal', 'Mixer']
+ADJECTIVES = ['Vintage', 'Electric', 'Acoustic', 'Studio', 'Travel', 'Classic', 'Custom', 'Deluxe', 'Student', 'Pro']
+STATUSES = ['pending', 'shipped', 'delivered', 'returned', 'cancelled']
+SERVICE_STATUSES = ['Pending', 'Shipped', 'Completed', 'Closed']
+TIERS = ['Standard', 'Silver', 'Gold', 'Platinum']
+EPOCH = datetime(2024, 1, 1)
+
+def chunked(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def bulk_insert(engine, table, rows, label=None):
+    started, count = time.perf_counter(), 0
+    for chunk in chunked(rows):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), chunk)
+        count += len(chunk)
+    if label:
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<16}{count:>12,} rows {elapsed:>8.1f}s {count / max(elapsed, 1e-9):>12,.0f} rows/s")
+    return count
+
+def product_name(rng, product_id):
+    return f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}"
+
+def inventory_rows(rng, volumes):
+    # Each product sits in `per_product` distinct warehouses, spread by a
+    # fixed stride so (product_id, warehouse_id) stays unique.
+    warehouses = volumes['warehouses']
+    per_product = max(1, min(warehouses, volumes['inventory'] // volumes['products']))
+    stride = max(1, warehouses // per_product)
+    for product_id in range(1, volumes['products'] + 1):
+        for k in range(per_product):
+            yield {'product_id': product_id, 'warehouse_id': (product_id + k * stride) % warehouses + 1,
+                   'quantity': rng.randint(0, 500)}
+
+def order_date(rng):
+    return EPOCH + timedelta(seconds=rng.randrange(730 * 24 * 3600))
+
+def seed_catalog(engine, volumes, seed=503):
+    """Fill the main app's tables (already created) with `volumes` rows."""
+    from app.models import Category, Customer, Inventory, Order, Product, Subcategory, Warehouse
+    rng = random.Random(seed)
+    v = volumes
+    bulk_insert(engine, Category.__table__,
+                ({'id': i, 'name': f"Category {i}"} for i in range(1, v['categories'] + 1)), 'categories')
+    bulk_insert(engine, Subcategory.__table__,
+                ({'id': i, 'name': f"Subcategory {i}", 'category_id': (i - 1) % v['categories'] + 1}
+                 for i in range(1, v['subcategories'] + 1)), 'subcategories')
+    bulk_insert(engine, Warehouse.__table__,
+                ({'id': i, 'location': f"City {i}"} for i in range(1, v['warehouses'] + 1)), 'warehouses')
+    bulk_insert(engine, Product.__table__,
+                ({'id': i, 'name': product_name(rng, i), 'description': f"Synthetic product {i}",
+                  'price': round(rng.uniform(5, 5000), 2), 'subcategory_id': rng.randint(1, v['subcategories']),
+                  'specifications': '', 'discount': rng.choice([0, 0, 0, 5, 10, 25])}
+                 for i in range(1, v['products'] + 1)), 'products')
+    bulk_insert(engine, Inventory.__table__, inventory_rows(rng, v), 'inventory')
+    bulk_insert(engine, Customer.__table__,
+                ({'id': i, 'name': f"Customer {i}", 'email': f"customer{i}@example.com",
+                  'membership_tier': rng.choice(TIERS)} for i in range(1, v['customers'] + 1)), 'customers')
+    bulk_insert(engine, Order.__table__,
+                ({'customer_id': rng.randint(1, v['customers']), 'product_id': rng.randint(1, v['products']),
+                  'status': rng.choice(STATUSES), 'quantity': rng.randint(1, 5),
+                  'total_price': round(rng.uniform(5, 5000), 2), 'order_date': order_date(rng)}
+                 for _ in range(v['orders'])), 'orders')
+
+def seed_service_orders(engine, table, volumes, seed=503):
+    """Fill the orders service's `orders` table."""
+    rng = random.Random(seed + 1)
+    bulk_insert(engine, table,
+                ({'product_id': rng.randint(1, volumes['products']), 'status': rng.choice(SERVICE_STATUSES),
+                  'total_price': round(rng.uniform(5, 5000), 2), 'order_date': order_date(rng)}
+                 for _ in range(volumes['service_orders'])), 'service orders')
+
+def analyze(engine):
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
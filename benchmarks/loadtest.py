@@ -0,0 +1,314 @@
+"""Seed a synthetic dataset, replay scripted workloads and report latency.
+
+    python -m benchmarks.loadtest seed --scale small --data-dir /tmp/loadtest
+    python -m benchmarks.loadtest run --data-dir /tmp/loadtest --requests 200 --out client.json
+    python -m benchmarks.loadtest run --data-dir /tmp/loadtest --driver http --serve \\
+        --processes 4 --duration 30 --out http.json
+    python -m benchmarks.loadtest compare baseline.json client.json --threshold 10
+
+`seed` builds catalog.db (main app) and orders.db (orders service) in the
+data directory at one of the datagen.SCALES volumes. `run` replays the
+workloads in benchmarks/workloads.py either in-process through the Flask
+test client (one workload at a time, fixed request count) or over HTTP from
+several processes (weighted mix for a fixed duration), against servers it
+starts itself with --serve or ones already listening at --app-url and
+--orders-url. Results are p50/p95/p99 latency and throughput per workload,
+written as JSON; `compare` diffs two result files and exits non-zero when
+any workload's p95 regressed by more than --threshold percent.
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from benchmarks import datagen, workloads
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def app_config(data_dir):
+    from config import Config
+
+    class LoadTestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(data_dir, 'catalog.db')}"
+        JOB_DATABASE_PATH = os.path.join(data_dir, 'jobs.db')
+        WTF_CSRF_ENABLED = False
+        # Every statement is slow at 'full' scale; do not flood the output.
+        SLOW_QUERY_SECONDS = 60
+    return LoadTestConfig
+
+def build_app(data_dir):
+    from app import create_app
+    return create_app(app_config(data_dir))
+
+def load_orders_service(data_dir):
+    # orders/app.py is a standalone script whose module name clashes with the
+    # app package, so load it from its path under another name. It reads its
+    # database from the environment at import; put the caller's value back.
+    previous = os.environ.get('ORDERS_DATABASE_URI')
+    os.environ['ORDERS_DATABASE_URI'] = f"sqlite:///{os.path.join(data_dir, 'orders.db')}"
+    try:
+        spec = importlib.util.spec_from_file_location('orders_service', os.path.join(REPO, 'orders', 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            del os.environ['ORDERS_DATABASE_URI']
+        else:
+            os.environ['ORDERS_DATABASE_URI'] = previous
+    return module
+
+def read_meta(data_dir):
+    with open(os.path.join(data_dir, 'meta.json')) as f:
+        return json.load(f)
+
+def seed(args):
+    from app import db
+    from app.stock import rebuild_stock_summary
+
+    volumes = dict(datagen.SCALES[args.scale])
+    for name in volumes:
+        if getattr(args, name, None) is not None:
+            volumes[name] = getattr(args, name)
+    os.makedirs(args.data_dir, exist_ok=True)
+    for name in ('catalog.db', 'orders.db', 'jobs.db'):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(os.path.join(args.data_dir, name + suffix)):
+                os.remove(os.path.join(args.data_dir, name + suffix))
+
+    started = time.perf_counter()
+    print(f"Seeding {args.scale} scale into {args.data_dir}")
+    app = build_app(args.data_dir)
+    with app.app_context():
+        db.create_all()
+        datagen.seed_catalog(db.engine, volumes, args.seed)
+        rebuild_stock_summary()
+        db.session.commit()
+        datagen.analyze(db.engine)
+    service = load_orders_service(args.data_dir)
+    with service.app.app_context():
+        service.create_tables()
+        datagen.seed_service_orders(service.db.engine, service.Order.__table__, volumes, args.seed)
+        datagen.analyze(service.db.engine)
+
+    with open(os.path.join(args.data_dir, 'meta.json'), 'w') as f:
+        json.dump({'scale': args.scale, 'seed': args.seed, 'volumes': volumes}, f, indent=2)
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {'requests': len(ordered), 'errors': errors,
+            'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else None,
+            'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else None,
+            'p50_ms': ms(percentile(ordered, 50)), 'p95_ms': ms(percentile(ordered, 95)),
+            'p99_ms': ms(percentile(ordered, 99)), 'max_ms': ms(ordered[-1] if ordered else None)}
+
+def run_client(args, selected, volumes):
+    clients = {'app': build_app(args.data_dir).test_client()}
+    if any(workload.service == 'orders' for workload in selected):
+        clients['orders'] = load_orders_service(args.data_dir).app.test_client()
+    results = {}
+    for index, workload in enumerate(selected):
+        rng = random.Random(args.seed + index)
+        client = clients[workload.service]
+        for _ in range(args.warmup):
+            method, path, body = workload.make(rng, volumes)
+            client.open(path, method=method, json=body)
+        latencies, errors = [], 0
+        for _ in range(args.requests):
+            method, path, body = workload.make(rng, volumes)
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            response.get_data()
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 500
+        results[workload.name] = summarize(latencies, errors, sum(latencies))
+        print(f"  {workload.name:<20}{results[workload.name]['p50_ms']:>10.2f}{results[workload.name]['p95_ms']:>10.2f}"
+              f"{results[workload.name]['p99_ms']:>10.2f}{results[workload.name]['throughput_rps']:>10.1f}")
+    return results
+
+def serve(service, data_dir, port):
+    from werkzeug.serving import make_server
+    # Per-request access logs would dominate the driver's output.
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app = build_app(data_dir) if service == 'app' else load_orders_service(data_dir).app
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+def wait_for(url, timeout=60):
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = HTTPConnection(parts.hostname, parts.port, timeout=5)
+            conn.request('GET', '/metrics')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+def http_worker(job):
+    worker, urls, selected_names, volumes, seed, duration = job
+    selected = workloads.select(selected_names)
+    rng = random.Random(seed * 1000 + worker)
+    weights = [workload.weight for workload in selected]
+    connections = {service: HTTPConnection(urlsplit(url).hostname, urlsplit(url).port, timeout=60)
+                   for service, url in urls.items()}
+    latencies = {workload.name: [] for workload in selected}
+    errors = {workload.name: 0 for workload in selected}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        workload = rng.choices(selected, weights)[0]
+        method, path, body = workload.make(rng, volumes)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        conn = connections[workload.service]
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            failed = response.status >= 500
+        except OSError:
+            conn.close()
+            failed = True
+        latencies[workload.name].append(time.perf_counter() - started)
+        errors[workload.name] += failed
+    return latencies, errors
+
+def run_http(args, selected, volumes):
+    urls = {'app': args.app_url, 'orders': args.orders_url}
+    servers = []
+    if args.serve:
+        spawn = multiprocessing.get_context('spawn')
+        for service, url in urls.items():
+            process = spawn.Process(target=serve, args=(service, args.data_dir, urlsplit(url).port), daemon=True)
+            process.start()
+            servers.append(process)
+    try:
+        for url in urls.values():
+            wait_for(url)
+        jobs = [(worker, urls, [workload.name for workload in selected], volumes, args.seed, args.duration)
+                for worker in range(args.processes)]
+        with multiprocessing.get_context('spawn').Pool(args.processes) as pool:
+            outcomes = pool.map(http_worker, jobs)
+    finally:
+        for process in servers:
+            process.terminate()
+            process.join()
+
+    results = {}
+    for workload in selected:
+        latencies = [value for worker_latencies, _ in outcomes for value in worker_latencies[workload.name]]
+        errors = sum(worker_errors[workload.name] for _, worker_errors in outcomes)
+        results[workload.name] = summarize(latencies, errors, args.duration)
+    everything = [value for worker_latencies, _ in outcomes for values in worker_latencies.values() for value in values]
+    results['total'] = summarize(everything, sum(result['errors'] for result in results.values()), args.duration)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    meta = read_meta(args.data_dir)
+    selected = workloads.select(args.workloads)
+    print(f"Running {len(selected)} workloads with the {args.driver} driver against {meta['scale']} scale")
+    if args.driver == 'client':
+        print(f"  {'workload':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+        results = run_client(args, selected, meta['volumes'])
+    else:
+        results = run_http(args, selected, meta['volumes'])
+    report = {'meta': {'driver': args.driver, 'scale': meta['scale'], 'volumes': meta['volumes'], 'seed': args.seed,
+                       'requests': args.requests if args.driver == 'client' else None,
+                       'duration': args.duration if args.driver == 'http' else None,
+                       'processes': args.processes if args.driver == 'http' else 1,
+                       'git_revision': git_revision(), 'python': platform.python_version(),
+                       'platform': platform.platform(), 'started_at': datetime.utcnow().isoformat()},
+              'workloads': results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.driver == 'http':
+        print(f"  {'workload':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}")
+        for name, result in results.items():
+            if result['requests']:
+                print(f"  {name:<20}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                      f"{result['throughput_rps']:>10.1f}{result['errors']:>8}")
+    print(f"Wrote {args.out}")
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['workloads']
+    with open(args.current) as f:
+        current = json.load(f)['workloads']
+    regressed = []
+    print(f"{'workload':<20}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'p95 change':>12}")
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name], current[name]
+        if not before['p95_ms'] or after['p95_ms'] is None:
+            continue
+        change = (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        columns = ''.join(f"{before[key]:>8.2f} -> {after[key]:<6.2f}" for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f"{name:<20}{columns}{change:>+11.1f}%")
+        if change > args.threshold:
+            regressed.append(name)
+    if regressed:
+        print(f"p95 regressed by more than {args.threshold:g}%: {', '.join(regressed)}")
+        sys.exit(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='generate the synthetic databases')
+    seed_parser.add_argument('--scale', choices=list(datagen.SCALES), default='small')
+    seed_parser.add_argument('--data-dir', required=True)
+    seed_parser.add_argument('--seed', type=int, default=503)
+    for name in datagen.SCALES['small']:
+        seed_parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, help=f"override the scale's {name}")
+    seed_parser.set_defaults(func=seed)
+
+    run_parser = commands.add_parser('run', help='replay workloads and write a JSON report')
+    run_parser.add_argument('--data-dir', required=True)
+    run_parser.add_argument('--driver', choices=['client', 'http'], default='client')
+    run_parser.add_argument('--workloads', nargs='+', help='default: all')
+    run_parser.add_argument('--requests', type=int, default=200, help='per workload (client driver)')
+    run_parser.add_argument('--warmup', type=int, default=10, help='per workload (client driver)')
+    run_parser.add_argument('--duration', type=float, default=30, help='seconds (http driver)')
+    run_parser.add_argument('--processes', type=int, default=4, help='client processes (http driver)')
+    run_parser.add_argument('--serve', action='store_true', help='start both services locally (http driver)')
+    run_parser.add_argument('--app-url', default='http://127.0.0.1:5055')
+    run_parser.add_argument('--orders-url', default='http://127.0.0.1:5056')
+    run_parser.add_argument('--seed', type=int, default=503)
+    run_parser.add_argument('--out', default='loadtest-results.json')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='diff two reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10, help='allowed p95 regression in percent')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
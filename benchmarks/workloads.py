@@ -0,0 +1,73 @@
+"""Scripted requests for the load tests.
+
+A workload is a named request generator bound to one service ('app' for the
+main Flask app, 'orders' for the orders service in orders/app.py). Given a
+seeded Random and the data volumes it returns (method, path, json_body), so
+the test-client and HTTP drivers replay exactly the same traffic.
+"""
+from collections import namedtuple
+
+from benchmarks.datagen import NOUNS, SERVICE_STATUSES
+
+Workload = namedtuple('Workload', 'name service weight make')
+
+def product_filter(rng, v):
+    return 'GET', f"/products/filter?subcategory_id={rng.randint(1, v['subcategories'])}&limit=50", None
+
+def product_search(rng, v):
+    return 'GET', f"/products/search?q={rng.choice(NOUNS).split()[0].lower()}&limit=20", None
+
+def product_facets(rng, v):
+    return 'GET', f"/products/facets?category_id={rng.randint(1, v['categories'])}", None
+
+def product_detail(rng, v):
+    return 'GET', f"/products/{rng.randint(1, v['products'])}", None
+
+def inventory_filter(rng, v):
+    return 'GET', f"/inventory/filter?product_id={rng.randint(1, v['products'])}&limit=50", None
+
+def inventory_report(rng, v):
+    return 'GET', "/inventory/report", None
+
+def inventory_adjust(rng, v):
+    return 'POST', "/inventory/adjust", {"adjustments": [
+        {"product_id": rng.randint(1, v['products']), "warehouse_id": rng.randint(1, v['warehouses']), "delta": rng.randint(1, 10)}]}
+
+def order_batch(rng, v):
+    return 'POST', "/orders/batch", {"customer_id": rng.randint(1, v['customers']), "lines": [
+        {"product_id": rng.randint(1, v['products']), "quantity": 1} for _ in range(rng.randint(1, 3))]}
+
+def customer_history(rng, v):
+    return 'GET', f"/customers/{rng.randint(1, v['customers'])}?limit=20", None
+
+def customer_summary(rng, v):
+    return 'GET', f"/customers/{rng.randint(1, v['customers'])}/summary", None
+
+def service_list(rng, v):
+    return 'GET', f"/api/orders?status={rng.choice(SERVICE_STATUSES)}&limit=100", None
+
+def service_get(rng, v):
+    return 'GET', f"/api/orders/{rng.randint(1, v['service_orders'])}", None
+
+WORKLOADS = [
+    Workload('products.filter', 'app', 10, product_filter),
+    Workload('products.search', 'app', 10, product_search),
+    Workload('products.facets', 'app', 5, product_facets),
+    Workload('products.detail', 'app', 10, product_detail),
+    Workload('inventory.filter', 'app', 10, inventory_filter),
+    Workload('inventory.report', 'app', 2, inventory_report),
+    Workload('inventory.adjust', 'app', 5, inventory_adjust),
+    Workload('orders.batch', 'app', 5, order_batch),
+    Workload('customers.history', 'app', 8, customer_history),
+    Workload('customers.summary', 'app', 5, customer_summary),
+    Workload('service.list', 'orders', 8, service_list),
+    Workload('service.get', 'orders', 8, service_get),
+]
+
+def select(names=None):
+    if not names:
+        return WORKLOADS
+    unknown = set(names) - {workload.name for workload in WORKLOADS}
+    if unknown:
+        raise ValueError(f"Unknown workloads: {', '.join(sorted(unknown))}")
+    return [workload for workload in WORKLOADS if workload.name in names]
@@ -0,0 +1,171 @@
+"""Request and SQL metrics, exposed in the Prometheus text format.
+
+Per request this records latency by blueprint/endpoint/method, the number
+of SQL statements run and the time spent in the database (from cursor
+events on every engine of `db`), and logs any statement slower than
+SLOW_QUERY_SECONDS with its parameters redacted. GET /metrics (METRICS_PATH)
+renders everything collected by this process; with several worker
+processes each one reports its own numbers. Used by both the main app and
+the orders service.
+"""
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+REQUEST_LABELS = ('blueprint', 'endpoint', 'method')
+
+def escape(value):
+  return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def label_text(names, values, extra=()):
+  pairs = [f'{name}="{escape(value)}"' for name, value in (*zip(names, values), *extra)]
+  return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+  kind = 'counter'
+
+  def __init__(self, name, help, labels=()):
+    self.name, self.help, self.labels = name, help, labels
+    self.values = {}
+
+  def inc(self, labels=(), amount=1):
+    self.values[labels] = self.values.get(labels, 0) + amount
+
+  def samples(self):
+    for labels, value in sorted(self.values.items()):
+      yield f"{self.name}{label_text(self.labels, labels)} {value}"
+
+class Histogram:
+  kind = 'histogram'
+
+  def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+    self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+    self.values = {}
+
+  def observe(self, labels, value):
+    # One slot per bucket plus a final +Inf slot; made cumulative on render.
+    counts, total = self.values.get(labels) or ([0] * (len(self.buckets) + 1), 0)
+    index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+    counts[index] += 1
+    self.values[labels] = (counts, total + value)
+
+  def samples(self):
+    for labels, (counts, total) in sorted(self.values.items()):
+      cumulative = 0
+      for bound, count in zip((*self.buckets, '+Inf'), counts):
+        cumulative += count
+        yield f"{self.name}_bucket{label_text(self.labels, labels, [('le', bound)])} {cumulative}"
+      yield f"{self.name}_sum{label_text(self.labels, labels)} {total}"
+      yield f"{self.name}_count{label_text(self.labels, labels)} {cumulative}"
+
+class Registry:
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.metrics = []
+
+  def add(self, metric):
+    self.metrics.append(metric)
+    return metric
+
+  def render(self):
+    lines = []
+    with self.lock:
+      for metric in self.metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+def redacted_parameters(parameters, executemany):
+  if not parameters:
+    return "no parameters"
+  if executemany:
+    return f"{len(parameters)} parameter sets redacted"
+  return f"{len(parameters)} parameters redacted"
+
+class Instrumentation:
+  def __init__(self, app=None, db=None):
+    self.registry = Registry()
+    self.requests = self.registry.add(Counter(
+      'http_requests_total', 'Requests handled, by endpoint and status.', (*REQUEST_LABELS, 'status')))
+    self.latency = self.registry.add(Histogram(
+      'http_request_duration_seconds', 'Request latency, including streamed bodies.', REQUEST_LABELS))
+    self.queries = self.registry.add(Histogram(
+      'db_queries_per_request', 'SQL statements executed per request.', REQUEST_LABELS, QUERY_COUNT_BUCKETS))
+    self.db_time = self.registry.add(Histogram(
+      'db_time_per_request_seconds', 'Time spent in SQL statements per request.', REQUEST_LABELS))
+    self.slow_queries = self.registry.add(Counter(
+      'db_slow_queries_total', 'Statements slower than SLOW_QUERY_SECONDS.', ('bind',)))
+    if app is not None:
+      self.init_app(app, db)
+
+  def init_app(self, app, db):
+    self.app = app
+    self.slow_query_seconds = app.config.get('SLOW_QUERY_SECONDS', 0.5)
+    with app.app_context():
+      for bind, engine in db.engines.items():
+        self.watch_engine(engine, bind or 'default')
+    app.before_request(self.start_request)
+    app.after_request(self.record_status)
+    app.teardown_request(self.finish_request)
+    app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.metrics_view)
+    app.extensions['instrumentation'] = self
+
+  def watch_engine(self, engine, bind):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+      conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+      # A statement that fails in the driver never reaches after_cursor_execute;
+      # drop its start time so later statements on this pooled connection are
+      # not paired with it. Errors outside a statement's execution (commit,
+      # fetch, parameter processing) come without one and were never pushed.
+      conn = exception_context.connection
+      if conn is None or exception_context.statement is None or exception_context.execution_context is None:
+        return
+      started = conn.info.get('query_started')
+      if started:
+        started.pop()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+      elapsed = time.perf_counter() - conn.info['query_started'].pop()
+      if has_request_context() and 'metrics_started' in g:
+        g.metrics_queries += 1
+        g.metrics_db_time += elapsed
+      if elapsed >= self.slow_query_seconds:
+        with self.registry.lock:
+          self.slow_queries.inc((bind,))
+        self.app.logger.warning("Slow query on %s (%.3fs, %s): %s", bind, elapsed,
+                                redacted_parameters(parameters, executemany), ' '.join(statement.split()))
+
+  def start_request(self):
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_time = 0.0
+
+  def record_status(self, response):
+    g.metrics_status = response.status_code
+    return response
+
+  def finish_request(self, exc):
+    # Teardown runs after a streamed body is exhausted, so this covers it too.
+    started = g.pop('metrics_started', None)
+    if started is None:
+      return
+    # Unrouted requests share one label so 404 probes cannot blow up cardinality.
+    labels = (request.blueprint or '', request.endpoint or '<unmatched>', request.method)
+    status = 500 if exc is not None else g.get('metrics_status', 500)
+    with self.registry.lock:
+      self.requests.inc((*labels, status))
+      self.latency.observe(labels, time.perf_counter() - started)
+      self.queries.observe(labels, g.metrics_queries)
+      self.db_time.observe(labels, g.metrics_db_time)
+
+  def metrics_view(self):
+    return Response(self.registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,62 @@
+"""Keyset pagination and NDJSON streaming shared by the main app and the orders service."""
+import json
+from flask import Response, request, stream_with_context
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+def parse_page_args():
+  """Read the keyset `limit`/`after` query parameters.
+
+  Returns (limit, after); limit is None when the caller did not ask for
+  pagination. Raises ValueError on malformed values.
+  """
+  limit = request.args.get('limit')
+  after = request.args.get('after')
+  if limit is not None:
+    limit = int(limit)
+    if limit < 1:
+      raise ValueError("limit must be a positive integer")
+    limit = min(limit, MAX_PAGE_SIZE)
+  if after is not None and after != '':
+    after = int(after)
+  else:
+    after = None
+  return limit, after
+
+def trim_page(rows, limit, key):
+  """Cut rows fetched with LIMIT limit + 1 down to a page; returns (rows, next_after)."""
+  if len(rows) > limit:
+    rows = rows[:limit]
+    return rows, key(rows[-1])
+  return rows, None
+
+def keyset_page(query, id_column, limit, after=None):
+  """Return (rows, next_after) for one page ordered by id_column."""
+  if after is not None:
+    query = query.filter(id_column > after)
+  rows = query.order_by(id_column).limit(limit + 1).all()
+  return trim_page(rows, limit, lambda row: row.id)
+
+def ndjson_response(rows, serialize):
+  """Stream rows as newline-delimited JSON.
+
+  rows is only iterated once the response body is read, so a query or
+  generator passed here runs inside the streaming request context.
+  """
+  def generate():
+    for row in rows:
+      yield json.dumps(serialize(row)) + '\n'
+
+  return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def stream_ndjson(query, id_column, serialize, after=None):
+  """Stream query results as newline-delimited JSON from a server-side cursor."""
+  if after is not None:
+    query = query.filter(id_column > after)
+  query = query.order_by(id_column).execution_options(stream_results=True).yield_per(STREAM_BATCH_SIZE)
+  return ndjson_response(query, serialize)
+
+def wants_ndjson():
+  return request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
@@ -0,0 +1,70 @@
+"""Database connection tuning shared by the main app and the orders service."""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# PRAGMAs run on every new DB-API connection. 'default' leaves SQLite alone
+# (rollback journal, FULL sync); 'production' switches to WAL so readers no
+# longer wait behind a writer and commits skip the per-transaction fsync.
+PROFILES = {
+  'default': {},
+  'production': {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative means KiB: 64 MiB per connection
+    'temp_store': 'MEMORY',
+  },
+}
+
+def profile_pragmas(config):
+  """Resolve SQLITE_PROFILE plus any SQLITE_PRAGMAS overrides from the config."""
+  name = config.get('SQLITE_PROFILE', 'default')
+  if name not in PROFILES:
+    raise ValueError(f"Unknown SQLITE_PROFILE '{name}' (expected one of {', '.join(PROFILES)})")
+  return {**PROFILES[name], **config.get('SQLITE_PRAGMAS', {})}
+
+def pool_options(uri, options):
+  """`options` (pool_size, max_overflow, pool_timeout) if `uri` gets a QueuePool.
+
+  In-memory SQLite gets a single-connection pool whose constructor rejects
+  these arguments, so it gets none of them.
+  """
+  url = make_url(uri)
+  if url.get_backend_name() == 'sqlite' and (url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'):
+    return {}
+  return dict(options)
+
+def apply_pragmas(dbapi_connection, pragmas):
+  cursor = dbapi_connection.cursor()
+  try:
+    for name, value in pragmas.items():
+      cursor.execute(f"PRAGMA {name} = {value}")
+  finally:
+    cursor.close()
+
+def install_pragmas(engine, pragmas):
+  if engine.dialect.name != 'sqlite' or not pragmas:
+    return
+
+  @event.listens_for(engine, 'connect')
+  def on_connect(dbapi_connection, connection_record):
+    apply_pragmas(dbapi_connection, pragmas)
+
+class SQLiteTuning:
+  """Applies the configured SQLite PRAGMA profile to every engine of `db`.
+
+  Pool sizing is SQLALCHEMY_POOL_OPTIONS (see config.py and pool_options);
+  this only handles what SQLAlchemy cannot set through create_engine.
+  """
+
+  def __init__(self, app=None, db=None):
+    if app is not None:
+      self.init_app(app, db)
+
+  def init_app(self, app, db):
+    self.pragmas = profile_pragmas(app.config)
+    with app.app_context():
+      for engine in db.engines.values():
+        install_pragmas(engine, self.pragmas)
+    app.extensions['sqlite_tuning'] = self
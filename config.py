@@ -3,4 +3,31 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_secret_key'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///musical_instruments.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 'production' turns on WAL and friends, see common/sqlite_tuning.py.
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+    # One pooled connection per request thread plus the job workers; WAL lets
+    # them read concurrently, writers still take turns behind busy_timeout.
+    # create_app passes these to the engine unless the URI is in-memory SQLite.
+    SQLALCHEMY_POOL_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    # Optional read replica, see app/replicas.py.
+    SQLALCHEMY_REPLICA_URI = os.environ.get('SQLALCHEMY_REPLICA_URI')
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    SQLITE_REPLICA_SYNC_INTERVAL = float(os.environ.get('SQLITE_REPLICA_SYNC_INTERVAL', 0))
+    # Statements slower than this are logged (parameters redacted), see common/instrumentation.py.
+    SLOW_QUERY_SECONDS = float(os.environ.get('SLOW_QUERY_SECONDS', 0.5))
+    BULK_UPLOAD_CHUNK_SIZE = int(os.environ.get('BULK_UPLOAD_CHUNK_SIZE', 5000))
+    STREAMING_CSV_MAX_SIZE = int(os.environ.get('STREAMING_CSV_MAX_SIZE', 1024*1024*1024))
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'lru')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    CLAMD_ADDRESS = os.environ.get('CLAMD_ADDRESS')
+    CLAMD_FAIL_OPEN = os.environ.get('CLAMD_FAIL_OPEN') == '1'
+    # Keep in step with clamd's StreamMaxLength. Larger uploads are scanned in
+    # overlapping windows of this size ('segments') or rejected ('reject').
+    CLAMD_MAX_STREAM = int(os.environ.get('CLAMD_MAX_STREAM', 25*1024*1024))
+    CLAMD_OVERSIZE = os.environ.get('CLAMD_OVERSIZE', 'segments')
\ No newline at end of file
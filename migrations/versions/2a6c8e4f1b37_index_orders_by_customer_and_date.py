@@ -0,0 +1,28 @@
+"""index orders by customer and date
+
+Revision ID: 2a6c8e4f1b37
+Revises: 9d3c5a7b1e62
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a6c8e4f1b37'
+down_revision = '9d3c5a7b1e62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The composite index has customer_id as its prefix, so it replaces the
+    # single-column one.
+    op.create_index('ix_orders_customer_id_order_date', 'orders', ['customer_id', 'order_date'], unique=False)
+    op.drop_index(op.f('ix_orders_customer_id'), table_name='orders')
+
+
+def downgrade():
+    op.create_index(op.f('ix_orders_customer_id'), 'orders', ['customer_id'], unique=False)
+    op.drop_index('ix_orders_customer_id_order_date', table_name='orders')
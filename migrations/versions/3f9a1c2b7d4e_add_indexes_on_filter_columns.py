@@ -0,0 +1,48 @@
+"""add indexes on filter columns
+
+Revision ID: 3f9a1c2b7d4e
+Revises: 
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d4e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold duplicate (product, warehouse) rows into one before enforcing
+    # uniqueness; add_inventory_entry always meant to keep a single row.
+    op.execute("""
+        UPDATE inventory SET quantity = (
+            SELECT SUM(dup.quantity) FROM inventory AS dup
+            WHERE dup.product_id = inventory.product_id
+              AND dup.warehouse_id = inventory.warehouse_id)
+        WHERE id IN (SELECT MIN(id) FROM inventory GROUP BY product_id, warehouse_id HAVING COUNT(*) > 1)
+    """)
+    op.execute("""
+        DELETE FROM inventory WHERE id NOT IN (
+            SELECT MIN(id) FROM inventory GROUP BY product_id, warehouse_id)
+    """)
+
+    op.create_index('uq_inventory_product_warehouse', 'inventory', ['product_id', 'warehouse_id'], unique=True)
+    op.create_index(op.f('ix_inventory_warehouse_id'), 'inventory', ['warehouse_id'], unique=False)
+    op.create_index(op.f('ix_product_subcategory_id'), 'product', ['subcategory_id'], unique=False)
+    op.create_index(op.f('ix_subcategory_name'), 'subcategory', ['name'], unique=False)
+    op.create_index(op.f('ix_orders_customer_id'), 'orders', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_orders_status'), 'orders', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_orders_status'), table_name='orders')
+    op.drop_index(op.f('ix_orders_customer_id'), table_name='orders')
+    op.drop_index(op.f('ix_subcategory_name'), table_name='subcategory')
+    op.drop_index(op.f('ix_product_subcategory_id'), table_name='product')
+    op.drop_index(op.f('ix_inventory_warehouse_id'), table_name='inventory')
+    op.drop_index('uq_inventory_product_warehouse', table_name='inventory')
@@ -0,0 +1,32 @@
+"""add product image variants
+
+Revision ID: 5e7f20b9c3a8
+Revises: c41d7e9a2f05
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7f20b9c3a8'
+down_revision = 'c41d7e9a2f05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('thumbnail_url', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('webp_url', sa.String(length=200), nullable=True))
+        batch_op.create_index(batch_op.f('ix_product_image_hash'), ['image_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_image_hash'))
+        batch_op.drop_column('webp_url')
+        batch_op.drop_column('thumbnail_url')
+        batch_op.drop_column('image_hash')
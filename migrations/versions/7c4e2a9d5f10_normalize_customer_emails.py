@@ -0,0 +1,34 @@
+"""normalize customer emails
+
+Revision ID: 7c4e2a9d5f10
+Revises: 2a6c8e4f1b37
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e2a9d5f10'
+down_revision = '2a6c8e4f1b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lower-case stored emails, except where two spellings of the same address
+    # already exist: those would collide on the unique index and need merging
+    # by hand. The expression index keeps case-insensitive lookups matching them.
+    op.execute("""
+        UPDATE customers SET email = lower(trim(email))
+        WHERE email != lower(trim(email))
+          AND lower(trim(email)) IN (SELECT lower(trim(email)) FROM customers
+                                     GROUP BY lower(trim(email)) HAVING count(*) = 1)
+    """)
+    op.create_index('ix_customers_email_lower', 'customers', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    # The original spellings are not kept, so only the index is undone.
+    op.drop_index('ix_customers_email_lower', table_name='customers')
@@ -0,0 +1,51 @@
+"""add stock summary tables
+
+Revision ID: 8b2e6d0f4a91
+Revises: 3f9a1c2b7d4e
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e6d0f4a91'
+down_revision = '3f9a1c2b7d4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_stock',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('total_stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], name='fk6', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(op.f('ix_product_stock_total_stock'), 'product_stock', ['total_stock'], unique=False)
+    op.create_table('category_stock',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('total_stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], name='fk7', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('category_id')
+    )
+
+    op.execute("""
+        INSERT INTO product_stock (product_id, total_stock)
+        SELECT product_id, SUM(quantity) FROM inventory GROUP BY product_id
+    """)
+    op.execute("""
+        INSERT INTO category_stock (category_id, total_stock)
+        SELECT subcategory.category_id, SUM(inventory.quantity)
+        FROM inventory
+        JOIN product ON inventory.product_id = product.id
+        JOIN subcategory ON product.subcategory_id = subcategory.id
+        GROUP BY subcategory.category_id
+    """)
+
+
+def downgrade():
+    op.drop_table('category_stock')
+    op.drop_index(op.f('ix_product_stock_total_stock'), table_name='product_stock')
+    op.drop_table('product_stock')
@@ -0,0 +1,57 @@
+"""add product full-text index
+
+Revision ID: 9d3c5a7b1e62
+Revises: 5e7f20b9c3a8
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3c5a7b1e62'
+down_revision = '5e7f20b9c3a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+            name, description, specifications,
+            content='product', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3')
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+            INSERT INTO product_fts(rowid, name, description, specifications)
+            VALUES (new.id, new.name, new.description, new.specifications);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, name, description, specifications)
+            VALUES ('delete', old.id, old.name, old.description, old.specifications);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description, specifications ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, name, description, specifications)
+            VALUES ('delete', old.id, old.name, old.description, old.specifications);
+            INSERT INTO product_fts(rowid, name, description, specifications)
+            VALUES (new.id, new.name, new.description, new.specifications);
+        END
+    """)
+    op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS product_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS product_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS product_fts_ai")
+    op.execute("DROP TABLE IF EXISTS product_fts")
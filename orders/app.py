@@ -1,25 +1,48 @@
+import os
 from flask import Flask, jsonify, request, render_template
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from flask_migrate import Migrate
 from sqlalchemy.sql import text
 
+# Shared with the main app; run the service from the repository root
+# (python -m orders.app) so the common package is importable.
+from common.instrumentation import Instrumentation
+from common.pagination import DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, ndjson_response, parse_page_args, trim_page, wants_ndjson
+from common.sqlite_tuning import install_pragmas, pool_options, profile_pragmas
+
 
 app = Flask(__name__,template_folder='frontend')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///ecommerce.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('ORDERS_DATABASE_URI', 'sqlite:///ecommerce.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = pool_options(app.config['SQLALCHEMY_DATABASE_URI'], {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+})
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+# Same PRAGMA profile as the main app; nothing is run on other databases.
+# Set SQLITE_PROFILE=default to keep SQLite's stock settings.
+with app.app_context():
+    install_pragmas(db.engine, profile_pragmas({'SQLITE_PROFILE': os.environ.get('SQLITE_PROFILE', 'production')}))
+
+# Request/SQL metrics in the Prometheus text format, served at /metrics.
+app.config['SLOW_QUERY_SECONDS'] = float(os.environ.get('SLOW_QUERY_SECONDS', 0.5))
+instrumentation = Instrumentation(app, db)
+
 # Define Order Model
 class Order(db.Model):
     __tablename__ = 'orders'
     order_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    product_id = db.Column(db.Integer, nullable=False)  
-    status = db.Column(db.String(50), nullable=False, default='Pending')
+    # SQLite appends the rowid (order_id) to every index, so the status and
+    # product_id indexes also serve the keyset order of GET /api/orders.
+    product_id = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(50), nullable=False, default='Pending', index=True)
     total_price = db.Column(db.Float, nullable=False)
-    order_date = db.Column(db.DateTime, default=datetime.utcnow)
+    order_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 # Define Return Model
 class Return(db.Model):
@@ -43,6 +66,9 @@ def insert_example_orders():
 # Create tables
 def create_tables():
     db.create_all()
+    # create_all skips tables that already exist, so add any missing indexes.
+    for index in Order.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
 
 # Sample Route: Create an Order
 @app.route('/api/orders', methods=['POST'])
@@ -78,16 +104,69 @@ def create_order():
         db.session.rollback()
         return jsonify({"error": "Database error", "details": str(e)}), 500
     
+def order_to_dict(row):
+    return {"order_id": row.order_id, "product_id": row.product_id, "status": row.status, "total_price": row.total_price, "order_date": row.order_date}
+
+def order_filters(args):
+    """Build the WHERE clause and bind parameters for GET /api/orders.
+
+    start_date/end_date are inclusive YYYY-MM-DD dates. They are compared as
+    date-prefix strings because order_date holds both 'YYYY-MM-DD HH:MM:SS'
+    (ORM inserts) and 'YYYY-MM-DDTHH:MM:SS' (raw inserts). Raises ValueError
+    on malformed values. The keyset `after` is handled by get_orders.
+    """
+    clauses, params = [], {}
+    if args.get('status'):
+        clauses.append("status = :status")
+        params['status'] = args['status']
+    if args.get('product_id'):
+        clauses.append("product_id = :product_id")
+        params['product_id'] = int(args['product_id'])
+    if args.get('start_date'):
+        clauses.append("order_date >= :start_date")
+        params['start_date'] = date.fromisoformat(args['start_date']).isoformat()
+    if args.get('end_date'):
+        clauses.append("order_date < :before_date")
+        params['before_date'] = (date.fromisoformat(args['end_date']) + timedelta(days=1)).isoformat()
+    return clauses, params
+
 # Sample Route: Get All Orders
 @app.route('/api/orders', methods=['GET'])
 def get_orders():
+    """List orders by order_id, one keyset page at a time or streamed as NDJSON.
+
+    Filters: status, product_id, start_date, end_date. Pages: limit (default
+    100, max 1000) and after=<next_after from the previous page>.
+    format=ndjson streams every matching order instead.
+    """
     try:
-        rawQueryString = f"SELECT * FROM 'orders'"
-        query = text(rawQueryString)
-        result = db.session.execute(query)
-        rows = result.fetchall()
-        result_list = [{"order_id": row.order_id, "product_id": row.product_id, "status": row.status, "total_price": row.total_price, "order_date": row.order_date} for row in rows]
-        return jsonify(result_list)
+        clauses, params = order_filters(request.args)
+        limit, after = parse_page_args()
+    except ValueError:
+        return jsonify({"error": "Invalid filter: product_id, after and limit must be integers, dates YYYY-MM-DD"}), 400
+    if after is not None:
+        clauses.append("order_id > :after")
+        params['after'] = after
+
+    rawQueryString = "SELECT order_id, product_id, status, total_price, order_date FROM 'orders'"
+    if clauses:
+        rawQueryString += " WHERE " + " AND ".join(clauses)
+    rawQueryString += " ORDER BY order_id"
+
+    if wants_ndjson():
+        query = text(rawQueryString).bindparams(**params)
+
+        def stream_rows():
+            # yield_per keeps only one batch of rows in memory at a time.
+            yield from db.session.execute(query, execution_options={"yield_per": STREAM_BATCH_SIZE})
+
+        return ndjson_response(stream_rows(), order_to_dict)
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    try:
+        query = text(rawQueryString + " LIMIT :limit").bindparams(limit=limit + 1, **params)
+        rows, next_after = trim_page(db.session.execute(query).fetchall(), limit, lambda row: row.order_id)
+        return jsonify({"orders": [order_to_dict(row) for row in rows], "next_after": next_after})
     except SQLAlchemyError as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
 
@@ -191,6 +270,6 @@ def index():
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()  # Create tables in the database
+        create_tables()  # Create tables and indexes in the database
         insert_example_orders()
     app.run(debug=True, port=4000)
\ No newline at end of file
@@ -0,0 +1,209 @@
+import importlib.util
+import os
+import socketserver
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db, jobs
+from app.models import Category, Product, Subcategory
+from app.replicas import REPLICA_BIND
+from config import Config
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark', action='store_true', help="Also run tests marked as benchmarks.")
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "benchmark: timing test, skipped unless --benchmark is given")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmark'):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark")
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+@pytest.fixture
+def config_overrides():
+    """Config attributes for the `app` fixture; override in a test module to change them."""
+    return {}
+
+@pytest.fixture
+def app(tmp_path, config_overrides):
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_path, 'test.db')}"
+        JOB_DATABASE_PATH = os.path.join(tmp_path, 'jobs.db')
+        CLAMD_ADDRESS = None
+
+    for name, value in config_overrides.items():
+        setattr(TestConfig, name, value)
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # db is shared by every test app; drop a replica bind's metadata so
+    # create_all in apps without a replica does not look for it.
+    db.metadatas.pop(REPLICA_BIND, None)
+
+@pytest.fixture
+def orders_service(monkeypatch):
+    """A fresh load of orders/app.py on in-memory SQLite, with its tables created.
+
+    orders/app.py configures itself at import, so it is executed anew under
+    a module name that does not clash with the app package.
+    """
+    monkeypatch.setenv('ORDERS_DATABASE_URI', 'sqlite://')
+    spec = importlib.util.spec_from_file_location('orders_service', os.path.join(REPO, 'orders', 'app.py'))
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    with service.app.app_context():
+        service.create_tables()
+    return service
+
+@pytest.fixture
+def catalog(app):
+    """Two categories, four subcategories and twenty products."""
+    for c in range(1, 3):
+        db.session.add(Category(id=c, name=f"Category {c}"))
+        for s in range(1, 3):
+            db.session.add(Subcategory(id=(c - 1) * 2 + s, name=f"Subcategory {c}.{s}", category_id=c))
+    for p in range(1, 21):
+        db.session.add(Product(id=p, name=f"Product {p}", description='', price=10.0 * p,
+                               subcategory_id=(p - 1) % 4 + 1, specifications=''))
+    db.session.commit()
+
+@pytest.fixture
+def wait_for_job(app):
+    """Poll a background job until it leaves queued/running; returns the job."""
+    def wait(job_id, timeout=10):
+        deadline = time.monotonic() + timeout
+        while jobs.get(job_id)['status'] in ('queued', 'running'):
+            assert time.monotonic() < deadline, f"job {job_id} did not finish"
+            time.sleep(0.01)
+        return jobs.get(job_id)
+
+    return wait
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements run on `engine` inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def queries(app):
+    return lambda: count_queries(db.engine)
+
+EICAR = b'EICAR-STANDARD-ANTIVIRUS-TEST-FILE'
+
+class ClamdHandler(socketserver.BaseRequestHandler):
+    def read_exact(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client went away")
+            data += chunk
+        return data
+
+    def read_command(self):
+        data = b''
+        while not data.endswith(b'\0'):
+            chunk = self.request.recv(1)
+            if not chunk:
+                return None
+            data += chunk
+        return data[1:-1].decode()
+
+    def instream(self):
+        payload = b''
+        while True:
+            (length,) = struct.unpack('!L', self.read_exact(4))
+            if length == 0:
+                break
+            payload += self.read_exact(length)
+        self.server.scanned += 1
+        if self.server.max_stream and len(payload) > self.server.max_stream:
+            return 'INSTREAM size limit exceeded. ERROR'
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if EICAR in payload:
+            return 'stream: Eicar-Test-Signature FOUND'
+        return 'stream: OK'
+
+    def handle(self):
+        session, request_id = False, 0
+        try:
+            while True:
+                command = self.read_command()
+                if command is None or command == 'END':
+                    return
+                if command == 'IDSESSION':
+                    session = True
+                    continue
+                request_id += 1
+                if command == 'PING':
+                    reply = 'PONG'
+                elif command == 'INSTREAM':
+                    reply = self.instream()
+                else:
+                    reply = 'UNKNOWN COMMAND'
+                prefix = f'{request_id}: ' if session else ''
+                self.request.sendall(f'{prefix}{reply}\0'.encode())
+                if not session:
+                    return
+        except ConnectionError:
+            return
+
+class FakeClamd(socketserver.ThreadingTCPServer):
+    """Minimal clamd stand-in speaking the PING / IDSESSION / INSTREAM protocol.
+
+    Any stream containing the EICAR test string is reported as infected.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    EICAR = EICAR
+
+    def __init__(self, delay=0.0, max_stream=None):
+        super().__init__(('127.0.0.1', 0), ClamdHandler)
+        self.delay = delay
+        self.max_stream = max_stream
+        self.scanned = 0
+        host, port = self.server_address
+        self.address = f'{host}:{port}'
+
+@pytest.fixture
+def fake_clamd():
+    """Start a FakeClamd(**options) serving from a daemon thread; its .address is for CLAMD_ADDRESS."""
+    servers = []
+
+    def start(**options):
+        server = FakeClamd(**options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,55 @@
+from collections import Counter
+
+from app import db
+from app.allocation import StockIndex, allocate_batch
+from app.models import Inventory, Warehouse
+
+LOCATIONS = {1: 'Beirut', 2: 'Tripoli', 3: 'Tripoli'}
+
+def test_one_warehouse_is_preferred_when_it_covers_the_line():
+    index = StockIndex({1: {1: 6, 2: 10, 3: 4}}, LOCATIONS)
+    assert index.plan({1: 10}).picks == [(1, 2, 10)]
+
+def test_multi_line_order_ships_from_the_fewest_warehouses():
+    index = StockIndex({1: {1: 5, 3: 5}, 2: {2: 5, 3: 5}}, LOCATIONS)
+    assert sorted(index.plan({1: 5, 2: 5}).picks) == [(1, 3, 5), (2, 3, 5)]
+
+def test_line_is_split_greedily_by_coverage():
+    index = StockIndex({1: {1: 6, 2: 5, 3: 3}}, LOCATIONS)
+    assert index.plan({1: 10}).picks == [(1, 1, 6), (1, 2, 4)]
+
+def test_ship_to_location_goes_nearest_first():
+    index = StockIndex({1: {1: 10, 2: 3, 3: 2}}, LOCATIONS)
+    assert index.plan({1: 4}).picks == [(1, 1, 4)]
+    # Both Tripoli warehouses are nearer than the one that could ship it whole.
+    assert index.plan({1: 4}, near=' tripoli ').picks == [(1, 2, 3), (1, 3, 1)]
+
+def test_short_orders_take_nothing():
+    index = StockIndex({1: {1: 5}, 2: {2: 1}}, LOCATIONS)
+    allocation = index.allocate({1: 3, 2: 2})
+    assert allocation == ([], {2})
+    assert index.available(1) == 5 and index.available(2) == 1
+
+def test_batch_never_allocates_more_than_is_in_stock():
+    stock = {1: {1: 10, 2: 5}, 2: {2: 4}}
+    index = StockIndex(stock, LOCATIONS)
+    results = index.allocate_batch([{1: 8}, [(1, 4), (1, 4)], {1: 2, 2: 4}, {2: 1}])
+    assert [result.short for result in results] == [set(), {1}, set(), {2}]
+    assert results[0].picks == [(1, 1, 8)]
+    assert sorted(results[2].picks) == [(1, 2, 2), (2, 2, 4)]
+    taken = Counter()
+    for result in results:
+        for product_id, warehouse_id, quantity in result.picks:
+            taken[product_id, warehouse_id] += quantity
+    assert all(quantity <= stock[product_id][warehouse_id] for (product_id, warehouse_id), quantity in taken.items())
+    assert index.available(1) == 5 and index.available(2) == 0
+
+def test_allocate_batch_plans_against_inventory_without_changing_it(catalog):
+    db.session.add_all([Warehouse(id=id, location=location) for id, location in LOCATIONS.items()])
+    db.session.add_all([Inventory(product_id=1, warehouse_id=1, quantity=3),
+                        Inventory(product_id=1, warehouse_id=2, quantity=4)])
+    db.session.commit()
+    results = allocate_batch([{1: 3}, {1: 3}, {1: 3}], locations=['Beirut', 'Tripoli', 'Tripoli'])
+    assert [result.picks for result in results] == [[(1, 1, 3)], [(1, 2, 3)], []]
+    assert results[2].short == {1}
+    assert sorted(row.quantity for row in Inventory.query) == [3, 4]
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.models import Customer, Order
+from app.routes.customers import order_history_query
+
+@pytest.fixture
+def history(app):
+    db.session.add(Customer(id=1, name='Customer', email='customer@example.com'))
+    dates = [datetime(2024, 1, 3), None, datetime(2024, 1, 1), datetime(2024, 1, 3), None, datetime(2024, 1, 2)]
+    for id, order_date in enumerate(dates, start=1):
+        db.session.add(Order(id=id, customer_id=1, product_id=1, quantity=1, total_price=1.0, order_date=order_date))
+    db.session.commit()
+    # Rows without a date keep NULL (the column default only fills omitted values).
+    Order.query.filter(Order.id.in_([2, 5])).update({'order_date': None})
+    db.session.commit()
+
+def test_history_pages_newest_first_with_undated_orders_last(client, history):
+    seen, after = [], None
+    while True:
+        query = '?limit=2' + (f'&after={after}' if after else '')
+        page = client.get(f'/customers/1{query}').get_json()
+        seen += [order['id'] for order in page['orders']]
+        after = page['next_after']
+        if after is None:
+            break
+    assert seen == [4, 1, 6, 3, 5, 2]
+
+def test_history_orders_nulls_last_on_every_dialect(app):
+    for after in (None, (datetime(2024, 1, 2), 6), (None, 5)):
+        sql = str(order_history_query(1, after).statement.compile(dialect=postgresql.dialect()))
+        assert 'ORDER BY orders.order_date DESC NULLS LAST, orders.id DESC' in sql
@@ -0,0 +1,73 @@
+import io
+import json
+
+from app import db, scanner
+from app.customer_import import import_customers_stream
+from app.models import Customer
+
+def ndjson(*lines):
+    return io.BytesIO('\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode())
+
+def emails():
+    return sorted(email for (email,) in db.session.query(Customer.email))
+
+def test_malformed_ndjson_lines_are_row_errors(app):
+    summary = import_customers_stream(ndjson({'name': 'A', 'email': 'a@x.com'}, '{"name": "B", "email":',
+                                             '[1, 2]', {'name': 'C', 'email': 'c@x.com'}), 'ndjson')
+    assert summary['inserted'] == 2
+    assert [(error['row'], error['error'].split(':')[0]) for error in summary['errors']] == \
+        [(2, 'Invalid JSON'), (3, 'Invalid JSON')]
+    assert emails() == ['a@x.com', 'c@x.com']
+
+def test_import_matches_existing_emails_case_insensitively(app):
+    db.session.add(Customer(name='Legacy', email='Foo.Bar@X.com'))
+    db.session.commit()
+    summary = import_customers_stream(ndjson({'name': 'New', 'email': 'foo.bar@x.com'},
+                                             {'name': 'Other', 'email': 'FOO.BAR@x.COM'}), 'ndjson')
+    assert summary['inserted'] == 0
+    assert emails() == ['Foo.Bar@X.com']
+
+def test_created_customers_are_stored_lower_cased(client):
+    body = {'name': 'A', 'email': ' Ann@Example.COM ', 'phone': None, 'address': None}
+    assert client.post('/customers', json=body).status_code == 200
+    assert client.post('/customers', json={**body, 'email': 'ann@example.com'}).status_code == 409
+    assert emails() == ['ann@example.com']
+
+def test_import_upload_gets_the_bulk_upload_checks(app, client, fake_clamd):
+    response = client.post('/customers/import', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(b'name,email\n'), 'customers.exe', 'text/csv')})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Invalid CSV extension."
+
+    clamd = fake_clamd()
+    app.config['CLAMD_ADDRESS'] = clamd.address
+    scanner.init_app(app)
+    try:
+        response = client.post('/customers/import', content_type='multipart/form-data',
+                               data={'file': (io.BytesIO(b'name,email\nX,' + clamd.EICAR + b'\n'), 'customers.csv', 'text/csv')})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == "Virus detected."
+    finally:
+        app.config['CLAMD_ADDRESS'] = None
+        scanner.init_app(app)
+
+def test_duplicates_across_chunks_are_caught_by_the_committed_rows(app):
+    summary = import_customers_stream(ndjson({'name': 'A', 'email': 'a@x.com'}, {'name': 'B', 'email': 'b@x.com'},
+                                             {'name': 'A2', 'email': 'A@x.com'}, {'name': 'C', 'email': 'c@x.com'},
+                                             {'name': 'D', 'email': 'd@x.com'}, {'name': 'D2', 'email': 'D@x.com'}),
+                                      'ndjson', chunk_size=2)
+    assert summary['inserted'] == 4
+    assert [(error['row'], error['error']) for error in summary['errors']] == [
+        (3, "Email 'a@x.com' is already registered"), (6, "Email 'd@x.com' appears more than once in the file")]
+    assert emails() == ['a@x.com', 'b@x.com', 'c@x.com', 'd@x.com']
+
+def test_import_upload_runs_as_a_job_with_progress(client, wait_for_job):
+    body = b'name,email\nA,a@x.com\nB,not-an-email\nC,c@x.com\n'
+    response = client.post('/customers/import', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(body), 'customers.csv', 'text/csv')})
+    assert response.status_code == 202
+    job = wait_for_job(response.get_json()['job_id'])
+    assert (job['status'], job['kind'], job['filename']) == ('finished', 'customer_import', 'customers.csv')
+    assert (job['rows'], job['inserted'], job['invalid']) == (3, 2, 1)
+    assert job['errors'] == [{'row': 2, 'error': 'Invalid email'}]
+    assert client.get(response.get_json()['status_url']).get_json()['id'] == job['id']
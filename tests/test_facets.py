@@ -0,0 +1,44 @@
+import pytest
+
+from app import db
+from app.models import Product
+
+@pytest.fixture
+def discounts(catalog):
+    # Products 1-5 are on sale; prices run 10, 20, ... 200 across the catalog.
+    for product in Product.query.filter(Product.id <= 5):
+        product.discount = 10
+    db.session.commit()
+
+def facets(client, **query_string):
+    response = client.get('/products/facets', query_string=query_string)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_facet_counts_without_filters(client, discounts):
+    body = facets(client)
+    assert body['facets'] == {
+        'category': {'1': 10, '2': 10},
+        'subcategory': {'1': 5, '2': 5, '3': 5, '4': 5},
+        'price': {'0-100': 9, '100-500': 11},
+        'discount': {'discounted': 5, 'full_price': 15},
+    }
+    assert len(body['products']) == 20
+
+def test_each_facet_ignores_its_own_selection(client, discounts):
+    body = facets(client, category_id=1, discounted='true')
+    # Products 1-5 in category 1 (subcategories 1 and 2): 1, 2 and 5.
+    assert [product['id'] for product in body['products']] == [1, 2, 5]
+    assert body['facets']['category'] == {'1': 3, '2': 2}
+    assert body['facets']['discount'] == {'discounted': 3, 'full_price': 7}
+    assert body['facets']['subcategory'] == {'1': 2, '2': 1}
+
+@pytest.mark.parametrize('value, ids', [('1', [1, 2, 3, 4, 5]), ('false', list(range(6, 21))), ('', list(range(1, 21)))])
+def test_discounted_accepts_boolean_spellings(client, discounts, value, ids):
+    assert [product['id'] for product in facets(client, discounted=value)['products']] == ids
+
+@pytest.mark.parametrize('query_string', [{'discounted': 'yes'}, {'discounted': 'ture'}, {'category_id': 'one'},
+                                          {'min_price': 'cheap'}])
+def test_invalid_filter_values_are_rejected(client, discounts, query_string):
+    response = client.get('/products/facets', query_string=query_string)
+    assert response.status_code == 400
@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+def test_metrics_count_requests_and_queries(client, catalog):
+    client.get('/products/filter')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{blueprint="products",endpoint="products.filter_products",method="GET",status="200"} 1' in body
+    assert 'db_queries_per_request_count{blueprint="products",endpoint="products.filter_products",method="GET"} 1' in body
+
+def test_failed_statements_do_not_leave_timings_behind(app):
+    with db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+            conn.rollback()
+        assert conn.execute(text('SELECT 1')).scalar() == 1
+        assert conn.info.get('query_started') == []
+
+def test_orders_service_uses_the_shared_instrumentation(orders_service):
+    client = orders_service.app.test_client()
+    assert client.get('/api/orders').status_code == 200
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{blueprint="",endpoint="get_orders",method="GET",status="200"} 1' in body
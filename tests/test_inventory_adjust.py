@@ -0,0 +1,44 @@
+import pytest
+
+from app import db
+from app.models import Inventory, Warehouse
+
+@pytest.fixture
+def warehouses(catalog):
+    db.session.add_all([Warehouse(id=1, location='Beirut'), Warehouse(id=2, location='Tripoli')])
+    db.session.add(Inventory(product_id=1, warehouse_id=1, quantity=10))
+    db.session.commit()
+
+def quantities():
+    db.session.expire_all()
+    return {(row.product_id, row.warehouse_id): row.quantity for row in Inventory.query}
+
+def test_new_and_existing_rows_are_upserted_in_one_request(client, warehouses):
+    response = client.post('/inventory/adjust', json={'adjustments': [
+        {'product_id': 1, 'warehouse_id': 1, 'delta': -4},
+        {'product_id': 1, 'warehouse_id': 2, 'delta': 6},
+        {'product_id': 1, 'warehouse_id': 1, 'delta': 1},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['rows'] == 2
+    assert quantities() == {(1, 1): 7, (1, 2): 6}
+
+def test_unknown_ids_are_rejected_without_changes(client, warehouses):
+    response = client.post('/inventory/adjust', json={'adjustments': [
+        {'product_id': 1, 'warehouse_id': 1, 'delta': 5},
+        {'product_id': 99, 'warehouse_id': 1, 'delta': 1},
+        {'product_id': 2, 'warehouse_id': 7, 'delta': 1},
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()['product_ids'] == [99]
+    assert response.get_json()['warehouse_ids'] == [7]
+    assert quantities() == {(1, 1): 10}
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'adjustments': []},
+    {'adjustments': [{'product_id': 1, 'warehouse_id': 1}]},
+    {'adjustments': [{'product_id': 1, 'warehouse_id': 1, 'delta': 'many'}]},
+])
+def test_malformed_adjustments_are_rejected(client, warehouses, body):
+    assert client.post('/inventory/adjust', json=body).status_code == 400
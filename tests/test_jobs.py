@@ -0,0 +1,28 @@
+import subprocess
+
+from app import jobs
+from app.jobs import JobStore
+
+def test_jobs_of_exited_processes_are_failed_on_startup(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    orphan, alive = store.create('bulk_upload'), store.create('bulk_upload')
+    exited = subprocess.Popen(['true'])
+    exited.wait()
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET status = 'running', pid = ? WHERE id = ?", (exited.pid, orphan))
+        conn.execute("UPDATE jobs SET pid = 1 WHERE id = ?", (alive,))
+
+    assert store.fail_orphaned() == [orphan]
+    assert store.get(orphan)['status'] == 'failed'
+    assert store.get(alive)['status'] == 'queued'
+
+def test_reinitialising_keeps_own_jobs_and_executor(app):
+    store = jobs.store
+    running = store.create('bulk_upload')
+    store.update(running, status='running')
+    executor = jobs.executor
+
+    jobs.init_app(app)
+
+    assert jobs.store.get(running)['status'] == 'running'
+    assert jobs.executor is executor
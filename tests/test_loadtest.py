@@ -0,0 +1,44 @@
+import json
+import os
+
+import pytest
+
+from benchmarks import loadtest
+
+def report(path, **p95s):
+    workloads = {name: {'p50_ms': p95 / 2, 'p95_ms': p95, 'p99_ms': p95 * 2} for name, p95 in p95s.items()}
+    path.write_text(json.dumps({'meta': {}, 'workloads': workloads}))
+    return str(path)
+
+def test_compare_passes_within_threshold(tmp_path, capsys):
+    baseline = report(tmp_path / 'a.json', **{'products.filter': 10.0, 'service.get': 2.0})
+    current = report(tmp_path / 'b.json', **{'products.filter': 10.9, 'service.get': 1.0})
+    loadtest.main(['compare', baseline, current, '--threshold', '10'])
+    assert 'regressed' not in capsys.readouterr().out
+
+def test_compare_exits_non_zero_on_p95_regression(tmp_path, capsys):
+    baseline = report(tmp_path / 'a.json', **{'products.filter': 10.0, 'service.get': 2.0})
+    current = report(tmp_path / 'b.json', **{'products.filter': 11.5, 'service.get': 2.0})
+    with pytest.raises(SystemExit) as exit:
+        loadtest.main(['compare', baseline, current, '--threshold', '10'])
+    assert exit.value.code == 1
+    assert 'products.filter' in capsys.readouterr().out.splitlines()[-1]
+
+def test_summarize_uses_nearest_rank_percentiles():
+    summary = loadtest.summarize([i / 1000 for i in range(100, 0, -1)], errors=2, elapsed=2.0)
+    assert (summary['p50_ms'], summary['p95_ms'], summary['p99_ms']) == (50, 95, 99)
+    assert summary['requests'] == 100 and summary['errors'] == 2 and summary['throughput_rps'] == 50
+
+def test_seed_and_client_run_end_to_end(tmp_path, monkeypatch):
+    monkeypatch.setenv('ORDERS_DATABASE_URI', 'sqlite://')
+    data_dir, out = str(tmp_path / 'data'), str(tmp_path / 'run.json')
+    volumes = {'categories': 2, 'subcategories': 4, 'products': 50, 'warehouses': 3, 'inventory': 100,
+               'customers': 20, 'orders': 100, 'service-orders': 100}
+    loadtest.main(['seed', '--data-dir', data_dir, *[arg for name, value in volumes.items()
+                                                     for arg in (f'--{name}', str(value))]])
+    loadtest.main(['run', '--data-dir', data_dir, '--requests', '3', '--warmup', '0', '--out', out])
+    with open(out) as f:
+        results = json.load(f)
+    assert results['meta']['volumes']['products'] == 50
+    assert all(result['requests'] == 3 and result['errors'] == 0 for result in results['workloads'].values())
+    assert os.environ['ORDERS_DATABASE_URI'] == 'sqlite://'
@@ -0,0 +1,60 @@
+import pytest
+
+from app import db
+from app.models import Customer, Inventory, Warehouse
+
+@pytest.fixture
+def stock(catalog):
+    db.session.add(Customer(id=1, name='Customer', email='customer@example.com'))
+    db.session.add_all([Warehouse(id=1, location='Beirut'), Warehouse(id=2, location='Tripoli')])
+    db.session.add_all([Inventory(product_id=1, warehouse_id=1, quantity=3),
+                        Inventory(product_id=1, warehouse_id=2, quantity=4),
+                        Inventory(product_id=2, warehouse_id=2, quantity=5)])
+    db.session.commit()
+
+def quantities():
+    return {(row.product_id, row.warehouse_id): row.quantity for row in Inventory.query}
+
+@pytest.mark.parametrize('body', [
+    [{'product_id': 1, 'quantity': 1}],
+    {'customer_id': 1, 'lines': 'product 1'},
+    {'customer_id': 1, 'lines': ['product 1']},
+    {'customer_id': 1, 'lines': [7]},
+    {'customer_id': 1, 'lines': [{'product_id': 1}]},
+    {'customer_id': 1, 'lines': [{'product_id': 1, 'quantity': 1}], 'ship_to': ['Beirut']},
+])
+def test_malformed_bodies_are_rejected(client, stock, body):
+    assert client.post('/orders/batch', json=body).status_code == 400
+
+@pytest.mark.parametrize('line, field, ids', [
+    ({'customer_id': 9, 'product_id': 1, 'quantity': 1}, 'customer_ids', [9]),
+    ({'product_id': 99, 'quantity': 1}, 'product_ids', [99]),
+])
+def test_unknown_ids_in_the_body_are_bad_requests(client, stock, line, field, ids):
+    response = client.post('/orders/batch', json={'customer_id': 1, 'lines': [
+        {'product_id': 2, 'quantity': 1}, line]})
+    assert response.status_code == 400
+    assert response.get_json()[field] == ids
+    assert quantities() == {(1, 1): 3, (1, 2): 4, (2, 2): 5}
+
+def test_batch_reserves_stock_across_warehouses(client, stock):
+    response = client.post('/orders/batch', json={'customer_id': 1, 'lines': [
+        {'product_id': 1, 'quantity': 5}, {'product_id': 2, 'quantity': 1}]})
+    assert response.status_code == 201
+    assert response.get_json()['total_price'] == 70.0
+    assert sum(q for (product_id, _), q in quantities().items() if product_id == 1) == 2
+    assert quantities()[(2, 2)] == 4
+
+def test_insufficient_stock_is_a_conflict_and_takes_nothing(client, stock):
+    response = client.post('/orders/batch', json={'customer_id': 1, 'lines': [
+        {'product_id': 1, 'quantity': 1}, {'product_id': 2, 'quantity': 6}]})
+    assert response.status_code == 409
+    assert response.get_json()['product_ids'] == [2]
+    assert quantities() == {(1, 1): 3, (1, 2): 4, (2, 2): 5}
+
+def test_reservation_without_reliable_executemany_rowcount(client, stock, monkeypatch):
+    monkeypatch.setattr(db.engine.dialect, 'supports_sane_multi_rowcount', False)
+    response = client.post('/orders/batch', json={'customer_id': 1, 'lines': [
+        {'product_id': 1, 'quantity': 7}, {'product_id': 2, 'quantity': 5}]})
+    assert response.status_code == 201
+    assert set(quantities().values()) == {0}
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+@pytest.fixture
+def orders(orders_service):
+    with orders_service.app.app_context():
+        for order_id in range(1, 8):
+            orders_service.db.session.add(orders_service.Order(
+                order_id=order_id, product_id=order_id % 2, status='Pending', total_price=10.0 * order_id))
+        orders_service.db.session.commit()
+    return orders_service.app.test_client()
+
+def order_ids(response):
+    return [order['order_id'] for order in response.get_json()['orders']]
+
+def test_keyset_pages_walk_every_order_once(orders):
+    first = orders.get('/api/orders', query_string={'limit': 3})
+    assert order_ids(first) == [1, 2, 3] and first.get_json()['next_after'] == 3
+    last = orders.get('/api/orders', query_string={'limit': 4, 'after': 3})
+    assert order_ids(last) == [4, 5, 6, 7] and last.get_json()['next_after'] is None
+
+def test_after_combines_with_filters(orders):
+    response = orders.get('/api/orders', query_string={'product_id': 1, 'after': 3})
+    assert order_ids(response) == [5, 7]
+
+def test_ndjson_streams_every_matching_order(orders):
+    response = orders.get('/api/orders', query_string={'format': 'ndjson', 'product_id': 0})
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['order_id'] for row in rows] == [2, 4, 6]
+
+@pytest.mark.parametrize('args', [{'after': 'x'}, {'limit': 'x'}, {'limit': 0}])
+def test_bad_page_args_are_rejected(orders, args):
+    assert orders.get('/api/orders', query_string=args).status_code == 400
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from common.pagination import MAX_PAGE_SIZE
+
+def page_ids(response):
+    return [product['id'] for product in response.get_json()['products']]
+
+def test_keyset_pages_walk_the_catalog_without_gaps_or_repeats(client, catalog):
+    seen, after = [], None
+    while True:
+        response = client.get('/products/filter', query_string={'limit': 6, 'after': after or ''})
+        seen += page_ids(response)
+        after = response.get_json()['next_after']
+        if after is None:
+            break
+        assert after == seen[-1]
+    assert seen == list(range(1, 21))
+
+@pytest.mark.parametrize('limit, after, ids, next_after', [
+    (5, None, [1, 2, 3, 4, 5], 5),
+    (5, 15, [16, 17, 18, 19, 20], None),
+    (19, None, list(range(1, 20)), 19),
+    (20, None, list(range(1, 21)), None),
+    (5, 20, [], None),
+])
+def test_next_after_is_set_only_when_another_row_exists(client, catalog, limit, after, ids, next_after):
+    response = client.get('/products/filter', query_string={'limit': limit, 'after': after or ''})
+    assert page_ids(response) == ids
+    assert response.get_json()['next_after'] == next_after
+
+def test_limit_is_capped(client, catalog, monkeypatch):
+    monkeypatch.setattr('common.pagination.MAX_PAGE_SIZE', 3)
+    response = client.get('/products/filter', query_string={'limit': MAX_PAGE_SIZE})
+    assert page_ids(response) == [1, 2, 3]
+    assert response.get_json()['next_after'] == 3
+
+@pytest.mark.parametrize('query_string', [{'limit': 0}, {'limit': 'ten'}, {'limit': 5, 'after': 'x'}])
+def test_malformed_page_args_are_rejected(client, catalog, query_string):
+    assert client.get('/products/filter', query_string=query_string).status_code == 400
+
+def test_without_limit_the_whole_filter_is_returned_unpaged(client, catalog):
+    body = client.get('/products/filter', query_string={'category_id': 2}).get_json()
+    assert [product['id'] for product in body['products']] == [3, 4, 7, 8, 11, 12, 15, 16, 19, 20]
+    assert 'next_after' not in body
+
+@pytest.mark.parametrize('query_string, headers', [
+    ({'format': 'ndjson'}, {}),
+    ({}, {'Accept': 'application/x-ndjson'}),
+])
+def test_ndjson_streams_one_product_per_line(client, catalog, query_string, headers):
+    response = client.get('/products/filter', query_string=dict(query_string, subcategory_id=2, after=6),
+                          headers=headers)
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    products = [json.loads(line) for line in lines]
+    assert [product['id'] for product in products] == [10, 14, 18]
+    assert products[0]['subcategory'] == 'Subcategory 1.2'
+    assert products[0]['category'] == 'Category 1'
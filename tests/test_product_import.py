@@ -0,0 +1,51 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.models import Product
+from app.product_import import import_products_stream, validate_products
+
+SUBCATEGORIES = {'Guitars': 1, 'Drums': 2}
+
+def validate(rows):
+    df = pd.DataFrame(rows, columns=['name', 'price', 'subcategory_name', 'discount'])
+    return validate_products(df, SUBCATEGORIES)
+
+def test_valid_rows_become_insert_mappings():
+    mappings, errors = validate([['Strat', '999.5', 'Guitars', None], ['Kit', 400, 'Drums', '15']])
+    assert errors == []
+    assert mappings == [
+        {'name': 'Strat', 'description': '', 'price': 999.5, 'subcategory_id': 1, 'specifications': '', 'discount': 0.0},
+        {'name': 'Kit', 'description': '', 'price': 400.0, 'subcategory_id': 2, 'specifications': '', 'discount': 15.0},
+    ]
+
+@pytest.mark.parametrize('row, message', [
+    ([None, 'abc', 'Nope', 500], "Missing required data (name or subcategory_name)"),
+    (['Strat', 10, None, None], "Missing required data (name or subcategory_name)"),
+    (['  ', -1, 'Nope', 500], "Product name cannot be empty"),
+    (['Strat', 'abc', 'Nope', 500], "Invalid price"),
+    (['Strat', -1, 'Guitars', None], "Invalid price"),
+    (['Strat', 10, 'Nope', 101], "Invalid discount (should be between 0 and 100)"),
+    (['Strat', 10, 'Guitars', 'half'], "Invalid discount (should be between 0 and 100)"),
+    (['Strat', 10, 'Nope', 5], "Subcategory 'Nope' does not exist"),
+])
+def test_first_failing_check_wins(row, message):
+    mappings, errors = validate([['Kit', 400, 'Drums', None], row])
+    assert [mapping['name'] for mapping in mappings] == ['Kit']
+    assert errors == [{'row': 2, 'error': message}]
+
+def test_streamed_import_reports_file_row_numbers_across_chunks(app, catalog):
+    lines = ["name,price,subcategory_name"]
+    lines += [f"Upload {i},{'bad' if i in (3, 8) else 5},Subcategory 1.1" for i in range(1, 11)]
+    progress = []
+    summary = import_products_stream(io.StringIO('\n'.join(lines)), chunk_size=4,
+                                     on_progress=lambda s: progress.append(s['rows']))
+    assert progress == [4, 8, 10]
+    assert (summary['rows'], summary['inserted'], summary['invalid']) == (10, 8, 2)
+    assert summary['errors'] == [{'row': 3, 'error': "Invalid price"}, {'row': 8, 'error': "Invalid price"}]
+    assert Product.query.filter(Product.name.like('Upload %')).count() == 8
+
+def test_streamed_import_rejects_missing_columns(app):
+    with pytest.raises(ValueError, match='subcategory_name'):
+        import_products_stream(io.StringIO("name,price\nStrat,10\n"))
@@ -0,0 +1,28 @@
+"""Product listings must not issue per-row lazy loads (N+1 queries)."""
+import pytest
+
+from app import db
+from app.models import Product
+
+# Generous enough for the ETag version lookups and reference data, far below
+# one query per product.
+MAX_QUERIES = 5
+
+@pytest.mark.parametrize('path', ['/products', '/products/filter', '/products/filter?category_id=1',
+                                  '/products/filter?subcategory_id=2&limit=5', '/products/3'])
+def test_product_reads_use_a_bounded_number_of_queries(client, catalog, queries, path):
+    with queries() as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    assert len(statements) <= MAX_QUERIES, statements
+
+def test_query_count_does_not_grow_with_the_catalog(client, catalog, queries):
+    with queries() as before:
+        client.get('/products/filter')
+    for p in range(21, 61):
+        db.session.add(Product(id=p, name=f"Product {p}", price=1.0, subcategory_id=(p - 1) % 4 + 1))
+    db.session.commit()
+    with queries() as after:
+        response = client.get('/products/filter')
+    assert len(response.get_json()['products']) == 60
+    assert len(after) <= len(before)
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+from app import db
+from app import reference_data
+
+def test_lookup_miss_refreshes_the_cached_list_with_the_index(catalog):
+    assert len(reference_data.subcategories()) == 4
+    assert reference_data.subcategory_id('Subcategory 1.1') == 1
+    # Another process adds a row without invalidating this process's cache.
+    db.session.execute(text("INSERT INTO subcategory (id, name, category_id) VALUES (5, 'Pedals', 1)"))
+    db.session.commit()
+    assert len(reference_data.subcategories()) == 4
+
+    assert reference_data.resolve_subcategory_ids([' pedals ', 'Subcategory 2.1', 'Nope']) == \
+        {' pedals ': 5, 'Subcategory 2.1': 3}
+    assert [row['name'] for row in reference_data.subcategories()][-1] == 'Pedals'
+    assert reference_data.subcategory_id('Pedals') == 5
@@ -0,0 +1,77 @@
+import os
+from collections import Counter
+
+import pytest
+from flask import g
+from sqlalchemy import event, select, text
+
+from app import db
+from app.models import Inventory, Warehouse
+from app.replicas import REPLICA_BIND, STICKY_COOKIE, SQLiteReplicator, is_write, read_from_primary
+
+@pytest.fixture
+def config_overrides(tmp_path):
+    return {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp_path, 'primary.db')}",
+            'SQLALCHEMY_REPLICA_URI': f"sqlite:///{os.path.join(tmp_path, 'replica.db')}"}
+
+@pytest.fixture
+def replicated(app, catalog, tmp_path):
+    db.session.add(Warehouse(id=1, location='Beirut'))
+    db.session.add(Inventory(product_id=1, warehouse_id=1, quantity=5))
+    db.session.commit()
+    SQLiteReplicator(str(tmp_path / 'primary.db'), str(tmp_path / 'replica.db'), 0).sync()
+    db.session.remove()
+
+@pytest.fixture
+def used(app):
+    """Counts statements per engine: 'primary' or 'replica'."""
+    counts = Counter()
+    for key, engine in db.engines.items():
+        name = 'replica' if key == REPLICA_BIND else 'primary'
+        event.listen(engine, 'before_cursor_execute', lambda *args, name=name: counts.update([name]))
+    return counts
+
+def quantity(client):
+    # Requests share the fixture's app context and so its session; give each
+    # one a fresh session as it would get when served.
+    db.session.remove()
+    return client.get('/inventory/filter?product_id=1').get_json()['inventory'][0]['quantity']
+
+def test_get_requests_read_from_the_replica(client, replicated, used):
+    assert quantity(client) == 5
+    assert used['replica'] and not used['primary']
+
+def test_writes_go_to_the_primary_and_make_the_client_sticky(app, client, replicated, used):
+    response = client.post('/inventory/adjust', json={'adjustments': [{'product_id': 1, 'warehouse_id': 1, 'delta': 2}]})
+    assert response.status_code == 200
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+    assert used['primary'] and not used['replica']
+
+    used.clear()
+    assert quantity(client) == 7
+    assert used['primary'] and not used['replica']
+
+    # Another client is not sticky and reads the (not yet synced) replica.
+    used.clear()
+    assert quantity(app.test_client()) == 5
+    assert used['replica'] and not used['primary']
+
+def test_read_from_primary_pins_a_view(app, replicated, used):
+    @read_from_primary
+    def view():
+        return db.session.execute(select(Inventory.quantity)).scalar()
+
+    with app.test_request_context('/'):
+        assert view() == 5
+        assert g.read_primary
+    assert used['primary'] and not used['replica']
+
+@pytest.mark.parametrize('clause, expected', [
+    (select(Inventory), False),
+    (select(Inventory).with_for_update(), True),
+    (Inventory.__table__.update().values(quantity=0), True),
+    (text('SELECT 1'), False),
+    (text('  update inventory set quantity = 0'), True),
+])
+def test_is_write(clause, expected):
+    assert is_write(clause) is expected
@@ -0,0 +1,118 @@
+import io
+import socket
+import time
+
+import pytest
+from flask import Flask
+
+from app import scanner
+from app.models import Product
+from app.scanning import PendingScan, Scanner
+
+@pytest.fixture
+def clamd(fake_clamd):
+    return fake_clamd(max_stream=1024)
+
+@pytest.fixture
+def clamd_address(clamd):
+    return clamd.address
+
+def closed_port_address():
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    host, port = probe.getsockname()
+    probe.close()
+    return f'{host}:{port}'
+
+def make_scanner(address, fail_open=False, max_stream=1024, oversize='segments'):
+    app = Flask(__name__)
+    app.config.update(CLAMD_ADDRESS=address, CLAMD_FAIL_OPEN=fail_open, CLAMD_MAX_STREAM=max_stream,
+                      CLAMD_OVERSIZE=oversize,
+                      CLAMD_TIMEOUT=2.0, CLAMD_POOL_SIZE=1)
+    return Scanner(app)
+
+def scan(scanner, data):
+    return scanner.verdict(scanner.submit(io.BytesIO(data), len(data)))
+
+def test_clean_upload_passes(clamd_address):
+    assert scan(make_scanner(clamd_address), b'name,price\nGuitar,10\n') == (True, None)
+
+def test_eicar_is_rejected(clamd):
+    assert scan(make_scanner(clamd.address), b'x' + clamd.EICAR + b'x') == (False, "Virus detected.")
+
+def test_oversize_upload_is_scanned_in_overlapping_segments(clamd):
+    assert scan(make_scanner(clamd.address), b'x' * 2048) == (True, None)
+    assert clamd.scanned == 3
+    # The signature straddles the first segment boundary.
+    infected = b'x' * 1000 + clamd.EICAR + b'x' * 1000
+    assert scan(make_scanner(clamd.address), infected) == (False, "Virus detected.")
+
+def test_segments_cover_the_upload_within_the_stream_limit(clamd_address):
+    clamd = make_scanner(clamd_address).clamd
+    assert clamd.segments(1000) == [(0, 1000)]
+    assert clamd.segments(1025) == [(0, 1024), (512, 1025)]
+    assert clamd.segments(2048) == [(0, 1024), (512, 1536), (1024, 2048)]
+
+def test_oversize_upload_is_rejected_under_the_reject_policy_even_failing_open(clamd_address):
+    for fail_open in (False, True):
+        valid, message = scan(make_scanner(clamd_address, fail_open=fail_open, oversize='reject'), b'x' * 2048)
+        assert valid is False
+        assert 'too large to scan' in message
+
+def test_unreachable_clamd_fails_closed_unless_failing_open():
+    valid, message = scan(make_scanner(closed_port_address()), b'data')
+    assert valid is None
+    assert message.startswith("Error scanning file")
+    assert scan(make_scanner(closed_port_address(), fail_open=True), b'data') == (True, None)
+
+def test_timed_out_scan_is_cancelled_before_the_stream_is_released(fake_clamd):
+    clamd = fake_clamd(delay=1.0)
+    scanner = make_scanner(clamd.address)
+    stream = io.BytesIO(b'data')
+    started = time.monotonic()
+    # Every socket operation is within CLAMD_TIMEOUT, the scan as a whole is not.
+    pending = PendingScan(scanner.clamd.executor, scanner.clamd.scan, stream, 4, timeout=0.1)
+    assert scanner.verdict(pending) == (None, "Error scanning file: scan timed out")
+    assert time.monotonic() - started < 1.0
+    # The worker has let go of the stream and its clamd session is closed.
+    assert pending.future.done()
+    assert scanner.clamd.idle.empty()
+    stream.close()
+
+    # The single pool thread is free again for the next upload.
+    clamd.delay = 0
+    assert scan(scanner, b'data') == (True, None)
+
+def bulk_upload(client, mode, rows=100):
+    lines = ''.join(f"Upload {i},10.0,Subcategory 1.1\n" for i in range(rows))
+    body = ("name,price,subcategory_name\n" + lines).encode()
+    return client.post('/products/bulk_upload', content_type='multipart/form-data',
+                       data={'mode': mode, 'file': (io.BytesIO(body), 'products.csv', 'text/csv')})
+
+@pytest.mark.parametrize('mode', ['stream', 'background'])
+def test_oversize_bulk_uploads_are_scanned_and_imported(app, client, catalog, clamd_address, wait_for_job, mode):
+    app.config.update(CLAMD_ADDRESS=clamd_address, CLAMD_MAX_STREAM=1024)
+    scanner.init_app(app)
+    try:
+        response = bulk_upload(client, mode)
+        if mode == 'background':
+            assert response.status_code == 202
+            assert wait_for_job(response.get_json()['job_id'])['status'] == 'finished'
+        else:
+            assert response.status_code == 302
+        assert Product.query.filter(Product.name.like('Upload %')).count() == 100
+    finally:
+        app.config['CLAMD_ADDRESS'] = None
+        scanner.init_app(app)
+
+def test_oversize_bulk_upload_is_not_imported_under_the_reject_policy(app, client, catalog, clamd_address):
+    app.config.update(CLAMD_ADDRESS=clamd_address, CLAMD_MAX_STREAM=1024, CLAMD_OVERSIZE='reject')
+    scanner.init_app(app)
+    try:
+        response = bulk_upload(client, 'stream')
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/products/bulk_upload')
+        assert Product.query.filter(Product.name.like('Upload %')).count() == 0
+    finally:
+        app.config['CLAMD_ADDRESS'] = None
+        scanner.init_app(app)
@@ -0,0 +1,32 @@
+import pytest
+
+from app import db
+from app.models import Product
+from app.search import scan_product_ids, search_product_ids
+
+@pytest.fixture
+def products(catalog):
+    for id, name in [(101, '100% Maple Neck'), (102, '1000 Maple Picks'), (103, 'Jack_Cable'), (104, 'JackXCable')]:
+        db.session.add(Product(id=id, name=name, price=1.0, subcategory_id=1))
+    db.session.commit()
+
+@pytest.mark.parametrize('query, expected', [('100%', [101]), ('k_C', [103]), ('maple', [101, 102])])
+def test_name_scan_treats_like_wildcards_literally(products, query, expected):
+    assert [id for id, _ in scan_product_ids(query, 10)] == expected
+
+def test_full_text_search_matches_word_prefixes(products):
+    assert {id for id, _ in search_product_ids('map nec', 10)} == {101}
+
+def test_search_ignores_keyset_after_and_pages_by_offset(client, products):
+    response = client.get('/products/search', query_string={'q': 'product', 'after': 'x', 'limit': 5})
+    assert response.status_code == 200
+    assert response.get_json()['next_offset'] == 5
+    assert client.get('/products/search', query_string={'q': 'product', 'limit': 0}).status_code == 400
+
+def test_equal_scores_page_in_rowid_order(client, products):
+    # Every catalog product matches "product" equally well.
+    ids = []
+    for offset in range(0, 20, 6):
+        body = client.get('/products/search', query_string={'q': 'product', 'limit': 6, 'offset': offset}).get_json()
+        ids += [product['id'] for product in body['products']]
+    assert ids == list(range(1, 21))
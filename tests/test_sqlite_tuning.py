@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import QueuePool
+
+from app import create_app, db
+from common.sqlite_tuning import install_pragmas, pool_options
+from config import Config
+
+POOL = {'pool_size': 3, 'max_overflow': 1, 'pool_timeout': 5}
+
+@pytest.mark.parametrize('uri, expected', [
+    ('sqlite://', {}),
+    ('sqlite:///:memory:', {}),
+    ('sqlite:///file:shared?mode=memory&uri=true', {}),
+    ('sqlite:///catalog.db', POOL),
+    ('postgresql://localhost/catalog', POOL),
+])
+def test_pool_options_only_for_pooled_databases(uri, expected):
+    assert pool_options(uri, POOL) == expected
+
+def test_app_starts_on_in_memory_sqlite(tmp_path):
+    class MemoryConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        JOB_DATABASE_PATH = str(tmp_path / 'jobs.db')
+
+    app = create_app(MemoryConfig)
+    with app.app_context():
+        assert db.session.execute(text('SELECT 1')).scalar() == 1
+
+def test_file_database_gets_pool_and_production_pragmas(app):
+    assert isinstance(db.engine.pool, QueuePool)
+    assert db.engine.pool.size() == Config.SQLALCHEMY_POOL_OPTIONS['pool_size']
+    assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+
+def test_pragmas_are_not_installed_on_other_dialects():
+    class Engine:
+        dialect = postgresql.dialect()
+
+    # Would raise if it tried to register a connect listener on the stand-in.
+    install_pragmas(Engine(), {'journal_mode': 'WAL'})
+
+def test_orders_service_starts_on_in_memory_sqlite(orders_service):
+    with orders_service.app.app_context():
+        assert orders_service.db.session.execute(text('SELECT 1')).scalar() == 1
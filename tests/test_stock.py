@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models import ProductStock, Warehouse
+from app.stock import (InsufficientStock, adjust_stock, clear_stock, move_category_stock, rebuild_stock_summary,
+                       reserve_stock, stock_summary_drift)
+
+@pytest.fixture
+def stock(catalog):
+    db.session.add_all([Warehouse(id=1, location='Beirut'), Warehouse(id=2, location='Tripoli')])
+    adjust_stock([(1, 1, 3), (1, 2, 4), (2, 2, 5), (3, 1, 6)])
+    db.session.commit()
+
+def nonzero(rows):
+    return {key: total for key, total in rows if total}
+
+def assert_summaries_match_inventory():
+    db.session.expire_all()
+    products = db.session.execute(text(
+        "SELECT product_id, SUM(quantity) FROM inventory GROUP BY product_id"))
+    categories = db.session.execute(text(
+        "SELECT s.category_id, SUM(i.quantity) FROM inventory i"
+        " JOIN product p ON p.id = i.product_id JOIN subcategory s ON s.id = p.subcategory_id"
+        " GROUP BY s.category_id"))
+    assert nonzero(db.session.execute(text("SELECT product_id, total_stock FROM product_stock"))) == nonzero(products)
+    assert nonzero(db.session.execute(text("SELECT category_id, total_stock FROM category_stock"))) == nonzero(categories)
+    assert stock_summary_drift() == ([], [])
+
+def test_adjustments_keep_summaries_in_step(stock):
+    assert_summaries_match_inventory()
+    adjust_stock([(1, 1, -2), (4, 2, 9), (4, 2, 1)])
+    db.session.commit()
+    assert_summaries_match_inventory()
+
+@pytest.mark.parametrize('sane_multi_rowcount', [True, False])
+def test_reservations_keep_summaries_in_step(stock, monkeypatch, sane_multi_rowcount):
+    monkeypatch.setattr(db.engine.dialect, 'supports_sane_multi_rowcount', sane_multi_rowcount)
+    reserve_stock({1: 6, 2: 1})
+    db.session.commit()
+    assert_summaries_match_inventory()
+    assert db.session.get(ProductStock, 1).total_stock == 1
+
+@pytest.mark.parametrize('sane_multi_rowcount', [True, False])
+def test_lost_race_is_reported_as_a_conflict(stock, monkeypatch, sane_multi_rowcount):
+    monkeypatch.setattr(db.engine.dialect, 'supports_sane_multi_rowcount', sane_multi_rowcount)
+    # Plan against the current stock, then let another writer take it first.
+    monkeypatch.setattr('app.stock.plan_reservations', lambda demand, near=None: [(1, 1, 3), (1, 2, 4)])
+    db.session.execute(text("UPDATE inventory SET quantity = 1 WHERE product_id = 1 AND warehouse_id = 2"))
+    with pytest.raises(InsufficientStock) as error:
+        reserve_stock({1: 7})
+    assert error.value.conflict
+    db.session.rollback()
+
+def test_clearing_stock_keeps_summaries_in_step(stock):
+    clear_stock(warehouse_id=2)
+    db.session.commit()
+    assert_summaries_match_inventory()
+    clear_stock(product_id=3)
+    db.session.commit()
+    assert_summaries_match_inventory()
+
+def test_moving_a_product_between_categories_moves_its_stock(stock):
+    move_category_stock(1, 1, 3)
+    db.session.execute(text("UPDATE product SET subcategory_id = 3 WHERE id = 1"))
+    db.session.commit()
+    assert_summaries_match_inventory()
+
+def test_drift_is_reported_and_repaired(app, stock):
+    db.session.execute(text("UPDATE product_stock SET total_stock = total_stock + 1 WHERE product_id = 2"))
+    db.session.execute(text("DELETE FROM category_stock WHERE category_id = 2"))
+    db.session.commit()
+    assert stock_summary_drift() == ([2], [2])
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['inventory', 'rebuild-stock-summary', '--check'])
+    assert "1 product and 1 category totals out of date." in result.output
+    assert stock_summary_drift() == ([2], [2])
+
+    rebuild_stock_summary()
+    db.session.commit()
+    assert_summaries_match_inventory()
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.http import http_date
+
+from app import db, versions
+from app.models import Product
+from app.versions import bump_versions, current_versions
+
+def version(name):
+    return current_versions([name]).get(name, (0, None))[0]
+
+def test_bump_lands_after_commit_and_is_dropped_on_rollback(app):
+    bump_versions('products')
+    assert version('products') == 0
+    db.session.commit()
+    assert version('products') == 1
+
+    bump_versions('products')
+    db.session.rollback()
+    db.session.commit()
+    assert version('products') == 1
+
+def test_etag_changes_after_a_write(client, catalog):
+    first = client.get('/products/filter')
+    assert client.get('/products/filter', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    db.session.add(Product(name='New', price=1.0, subcategory_id=1))
+    bump_versions('products')
+    db.session.commit()
+
+    second = client.get('/products/filter', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+
+class FrozenClock(datetime):
+    current = None
+
+    @classmethod
+    def utcnow(cls):
+        return cls.current
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current.replace(tzinfo=tz)
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(FrozenClock, 'current', datetime(2024, 5, 1, 12, 0, 0, 200000))
+    monkeypatch.setattr(versions, 'datetime', FrozenClock)
+    return FrozenClock
+
+def rename(id, name):
+    db.session.get(Product, id).name = name
+    bump_versions('products')
+    db.session.commit()
+
+def test_write_in_the_same_second_is_not_revalidated_by_date(client, catalog, clock):
+    rename(1, 'First')
+    first = client.get('/products/filter')
+    # The second is still running, so the date cannot tell this copy apart
+    # from a write later in the same second.
+    assert first.last_modified is None
+
+    clock.current += timedelta(milliseconds=500)
+    rename(1, 'Second')
+    response = client.get('/products/filter', headers={'If-Modified-Since': http_date(clock.current)})
+    assert response.status_code == 200
+    assert response.get_json()['products'][0]['name'] == 'Second'
+
+def test_if_modified_since_revalidates_once_the_second_is_over(client, catalog, clock):
+    rename(1, 'First')
+    clock.current += timedelta(seconds=1)
+    first = client.get('/products/filter')
+    assert first.last_modified is not None
+    since = {'If-Modified-Since': first.headers['Last-Modified']}
+    assert client.get('/products/filter', headers=since).status_code == 304
+
+    clock.current += timedelta(milliseconds=10)
+    rename(1, 'Second')
+    assert client.get('/products/filter', headers=since).status_code == 200